@@ -1,8 +1,13 @@
-from .src.main import crawl_website_and_classify_links
-from .src.scraper import WebSiteCrawler
-from .src.classifier import LinkTopicClassifier
-from .src.utils import logger, aggregate_topic_scores
-from .src.database import get_db_manager
+from .src.lazy_exports import lazy_module_attributes
+
+__getattr__, __dir__ = lazy_module_attributes(__name__, {
+    "crawl_website_and_classify_links": ".src.main",
+    "WebSiteCrawler": ".src.scraper",
+    "LinkTopicClassifier": ".src.classifier",
+    "logger": ".src.utils",
+    "aggregate_topic_scores": ".src.utils",
+    "get_db_manager": ".src.database",
+})
 
 __all__ = [
     "crawl_website_and_classify_links",
@@ -11,4 +16,4 @@ __all__ = [
     "logger",
     "aggregate_topic_scores",
     "get_db_manager"
-] 
\ No newline at end of file
+]
@@ -0,0 +1,173 @@
+"""Crawler memory per worker against a local synthetic website.
+
+Usage: python -m urlevaluator.benchmarks.crawler_memory [--workers 1 2 4] [--fan-out 10] [--depth 3]
+       [--page-kb 128] [--live-heap-objects 500000] [--output results.jsonl]
+
+Each worker is a WebSiteCrawler thread crawling its own subtree of the synthetic site from
+crawler_throughput into one shared throwaway database, as in batch mode. Every worker count runs
+in a fresh process whose resident set size is sampled while it crawls. Memory is bounded when
+the growth per worker does not depend on how many pages were crawled, i.e. the RSS hardly grows
+over the second half of the crawl.
+
+--live-heap-objects keeps that many small objects alive during the crawl. That stands in for a
+process that has imported torch and transformers: a large long-lived heap makes full garbage
+collections rare, and objects waiting for one accumulate.
+"""
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import tempfile
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from ..src.scraper.models import CrawledPageData, WebScrapingConfig
+from .crawler_throughput import PAGE_PATH_PREFIX, SyntheticSiteConfig, start_site_process
+
+RSS_SAMPLE_SECONDS = 0.02
+
+
+def current_rss_mb() -> float:
+    with open('/proc/self/statm') as statm:
+        return int(statm.read().split()[1]) * resource.getpagesize() / 2 ** 20
+
+
+class RssSampler:
+    """Samples (pages stored so far, RSS in MiB) on a background thread until stopped."""
+
+    def __init__(self, interval_seconds: float = RSS_SAMPLE_SECONDS):
+        self.interval_seconds = interval_seconds
+        self.samples: List[Tuple[int, float]] = []
+        self.pages_stored = 0
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._sample, name="rss-sampler", daemon=True)
+
+    def record_stored_page(self, crawled_page_data: CrawledPageData) -> None:
+        with self._lock:
+            self.pages_stored += 1
+
+    def _sample(self) -> None:
+        while not self._stopped.wait(self.interval_seconds):
+            self.samples.append((self.pages_stored, current_rss_mb()))
+
+    def __enter__(self) -> "RssSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stopped.set()
+        self._thread.join()
+        self.samples.append((self.pages_stored, current_rss_mb()))
+
+
+def summarize_samples(samples: List[Tuple[int, float]], baseline_rss_mb: float, worker_count: int) -> Dict:
+    pages_stored = samples[-1][0]
+    peak_rss_mb = max(rss_mb for _, rss_mb in samples)
+    halfway_rss_mb = next(rss_mb for pages, rss_mb in samples if pages >= pages_stored / 2)
+    return {
+        'baseline_rss_mb': round(baseline_rss_mb, 1),
+        'peak_rss_mb': round(peak_rss_mb, 1),
+        'final_rss_mb': round(samples[-1][1], 1),
+        'peak_growth_per_worker_mb': round((peak_rss_mb - baseline_rss_mb) / worker_count, 1),
+        'second_half_growth_mb': round(samples[-1][1] - halfway_rss_mb, 1),
+    }
+
+
+def measure_workers(site_url: str, site_config: SyntheticSiteConfig, worker_count: int, live_heap_objects: int) -> Dict:
+    """Crawl worker_count disjoint subtrees concurrently in this process and report its RSS."""
+    from ..src.database.init_db import get_db_manager
+    from ..src.scraper.crawler import WebSiteCrawler
+
+    live_heap = [[object_number] for object_number in range(live_heap_objects)]
+    with tempfile.TemporaryDirectory() as benchmark_directory:
+        os.chdir(benchmark_directory)
+        get_db_manager().create_database()
+        subtree_page_count = sum(site_config.fan_out ** level for level in range(site_config.depth))
+        crawling_config = WebScrapingConfig(request_delay_seconds=0, max_urls_to_crawl=subtree_page_count)
+        rss_sampler = RssSampler()
+        # Level-one pages root disjoint subtrees: links back to the seed are left out of the site.
+        website_crawlers = [
+            WebSiteCrawler(f"{site_url}{PAGE_PATH_PREFIX}{subtree_root}", site_config.depth - 1, crawling_config,
+                           page_stored_callback=rss_sampler.record_stored_page)
+            for subtree_root in range(1, worker_count + 1)
+        ]
+        crawler_threads = [threading.Thread(target=website_crawler.start_website_crawling, name=f"crawler-{worker_number}")
+                           for worker_number, website_crawler in enumerate(website_crawlers)]
+        gc.collect()
+        full_collections_before = gc.get_stats()[2]['collections']
+        baseline_rss_mb = current_rss_mb()
+        started = time.perf_counter()
+        with rss_sampler:
+            for crawler_thread in crawler_threads:
+                crawler_thread.start()
+            for crawler_thread in crawler_threads:
+                crawler_thread.join()
+        elapsed_seconds = time.perf_counter() - started
+    del live_heap
+    return {
+        'workers': worker_count,
+        'pages_stored': rss_sampler.pages_stored,
+        'seconds': round(elapsed_seconds, 2),
+        'pages_per_second': round(rss_sampler.pages_stored / elapsed_seconds, 2),
+        **summarize_samples(rss_sampler.samples, baseline_rss_mb, worker_count),
+        'full_collections': gc.get_stats()[2]['collections'] - full_collections_before,
+    }
+
+
+def _measure_in_child(result_queue, *measure_arguments) -> None:
+    result_queue.put(measure_workers(*measure_arguments))
+
+
+def run_benchmark(site_config: SyntheticSiteConfig, worker_counts: List[int], live_heap_objects: int = 500_000) -> Dict:
+    if max(worker_counts) > site_config.fan_out:
+        raise ValueError(f"At most fan_out ({site_config.fan_out}) workers: each crawls one level-one subtree")
+    site_process, site_url = start_site_process(site_config)
+    context = multiprocessing.get_context('spawn')
+    worker_runs = []
+    try:
+        for worker_count in worker_counts:
+            result_queue = context.Queue()
+            measure_process = context.Process(target=_measure_in_child,
+                                              args=(result_queue, site_url, site_config, worker_count, live_heap_objects))
+            measure_process.start()
+            worker_runs.append(result_queue.get())
+            measure_process.join()
+    finally:
+        site_process.terminate()
+        site_process.join()
+    return {
+        'benchmark': 'crawler_memory',
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'site': {'fan_out': site_config.fan_out, 'depth': site_config.depth, 'page_bytes': site_config.page_bytes},
+        'live_heap_objects': live_heap_objects,
+        'runs': worker_runs,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4], help='concurrent crawler threads to measure')
+    parser.add_argument('--fan-out', type=int, default=10, help='links from each page to new pages')
+    parser.add_argument('--depth', type=int, default=3, help='depth of the site tree')
+    parser.add_argument('--page-kb', type=float, default=128, help='approximate size of each page')
+    parser.add_argument('--live-heap-objects', type=int, default=500_000,
+                        help='long-lived objects kept during the crawl, like a process holding the model')
+    parser.add_argument('--output', help='append the result as one JSON line to this file')
+    arguments = parser.parse_args()
+
+    site_config = SyntheticSiteConfig(arguments.fan_out, arguments.depth, int(arguments.page_kb * 1024))
+    benchmark_result = run_benchmark(site_config, arguments.workers, arguments.live_heap_objects)
+    print(json.dumps(benchmark_result, indent=2))
+    if arguments.output:
+        with open(arguments.output, 'a') as output_file:
+            output_file.write(json.dumps(benchmark_result) + "\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,233 @@
+"""Crawler throughput against a local synthetic website.
+
+Usage: python -m urlevaluator.benchmarks.crawler_throughput [--fan-out 4] [--depth 3] [--page-kb 16]
+       [--latency-ms 5] [--error-rate 0.01] [--output results.jsonl]
+
+A separate server process generates a site graph of the given fan-out and depth, with padded
+pages, injected latency and 5xx errors. WebSiteCrawler crawls it into a throwaway database.
+The result is printed as JSON and, with --output, appended as one JSON line for tracking
+regressions across runs.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import statistics
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+import requests
+
+from ..src.scraper.models import CrawledPageData, WebScrapingConfig
+
+STATS_PATH = '/__stats'
+PAGE_PATH_PREFIX = '/page/'
+FILLER_WORDS = "latest news sports science politics technology film election match research review".split()
+
+
+@dataclass
+class SyntheticSiteConfig:
+    fan_out: int = 4
+    depth: int = 3
+    page_bytes: int = 16 * 1024
+    latency_ms: float = 0.0
+    error_rate: float = 0.0
+    seed: int = 0
+
+    @property
+    def page_count(self) -> int:
+        return sum(self.fan_out ** level for level in range(self.depth + 1))
+
+
+def child_page_ids(page_id: int, site_config: SyntheticSiteConfig) -> List[int]:
+    """Pages form a complete fan_out-ary tree in breadth-first numbering; page 0 is the root."""
+    first_child_id = page_id * site_config.fan_out + 1
+    return [child_id for child_id in range(first_child_id, first_child_id + site_config.fan_out)
+            if child_id < site_config.page_count]
+
+
+def is_error_page(page_id: int, site_config: SyntheticSiteConfig) -> bool:
+    return page_id != 0 and random.Random(site_config.seed * 1_000_003 + page_id).random() < site_config.error_rate
+
+
+def render_page(page_id: int, site_config: SyntheticSiteConfig) -> bytes:
+    page_random = random.Random(site_config.seed * 1_000_003 + page_id)
+    # Every page but the root also links back to its parent, so the crawler's visited check is exercised.
+    parent_page_id = (page_id - 1) // site_config.fan_out
+    linked_page_ids = child_page_ids(page_id, site_config) + ([parent_page_id] if page_id > 0 else [])
+    link_items = "".join(
+        f'<li><a href="{PAGE_PATH_PREFIX}{linked_id}">{" ".join(page_random.choices(FILLER_WORDS, k=4))}</a></li>'
+        for linked_id in linked_page_ids
+    )
+    page_head = f"<html><head><title>Synthetic page {page_id}</title></head><body><ul>{link_items}</ul>"
+    filler_paragraph = f"<p>{' '.join(page_random.choices(FILLER_WORDS, k=40))}</p>"
+    filler_count = max(0, (site_config.page_bytes - len(page_head)) // len(filler_paragraph))
+    return (page_head + filler_paragraph * filler_count + "</body></html>").encode('utf-8')
+
+
+class SyntheticSiteHandler(BaseHTTPRequestHandler):
+    server: "SyntheticSiteServer"
+
+    def _send(self, status_code: int, body: bytes, content_type: str = "text/html; charset=utf-8") -> None:
+        self.send_response(status_code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        if self.path == STATS_PATH:
+            self._send(200, json.dumps(self.server.stats()).encode('utf-8'), "application/json")
+            return
+        arrived_at = time.time()
+        if not self.path.startswith(PAGE_PATH_PREFIX) or not self.path[len(PAGE_PATH_PREFIX):].isdigit():
+            self._send(404, b"not found")
+            return
+        page_id = int(self.path[len(PAGE_PATH_PREFIX):])
+        site_config = self.server.site_config
+        if page_id >= site_config.page_count:
+            self._send(404, b"not found")
+            return
+        self.server.record_request(page_id, arrived_at)
+        if site_config.latency_ms:
+            time.sleep(site_config.latency_ms / 1000)
+        if is_error_page(page_id, site_config):
+            self._send(503, b"injected error")
+            return
+        self._send(200, render_page(page_id, site_config))
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+class SyntheticSiteServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, site_config: SyntheticSiteConfig, port: int = 0):
+        self.site_config = site_config
+        self._first_request_at: Dict[int, float] = {}
+        self._request_count = 0
+        self._lock = threading.Lock()
+        super().__init__(('127.0.0.1', port), SyntheticSiteHandler)
+
+    def record_request(self, page_id: int, arrived_at: float) -> None:
+        with self._lock:
+            self._request_count += 1
+            self._first_request_at.setdefault(page_id, arrived_at)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'requests': self._request_count, 'first_request_at': dict(self._first_request_at)}
+
+
+def _serve_site(site_config: SyntheticSiteConfig, port_queue) -> None:
+    site_server = SyntheticSiteServer(site_config)
+    port_queue.put(site_server.server_address[1])
+    site_server.serve_forever()
+
+
+def start_site_process(site_config: SyntheticSiteConfig):
+    """Serve the site from its own process, so it does not compete with the crawler for the GIL or count in its RSS."""
+    context = multiprocessing.get_context('spawn')
+    port_queue = context.Queue()
+    site_process = context.Process(target=_serve_site, args=(site_config, port_queue), daemon=True)
+    site_process.start()
+    return site_process, f"http://127.0.0.1:{port_queue.get(timeout=30)}"
+
+
+def _percentile(values: List[float], percentile: int) -> Optional[float]:
+    if not values:
+        return None
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[percentile - 1]
+
+
+def run_benchmark(site_config: SyntheticSiteConfig, request_delay_seconds: float = 0.0) -> Dict:
+    # Imported after the working directory moves, so the crawl database lands in a throwaway directory.
+    from ..src.database.init_db import get_db_manager
+    from ..src.scraper.crawler import WebSiteCrawler
+
+    site_process, site_url = start_site_process(site_config)
+    working_directory = os.getcwd()
+    stored_at: Dict[str, float] = {}
+    try:
+        with tempfile.TemporaryDirectory() as benchmark_directory:
+            os.chdir(benchmark_directory)
+            get_db_manager().create_database()
+            crawling_config = WebScrapingConfig(request_delay_seconds=request_delay_seconds,
+                                                max_urls_to_crawl=site_config.page_count)
+
+            def record_stored_page(crawled_page_data: CrawledPageData) -> None:
+                stored_at[crawled_page_data.url] = time.time()
+
+            website_crawler = WebSiteCrawler(f"{site_url}{PAGE_PATH_PREFIX}0", site_config.depth, crawling_config,
+                                             page_stored_callback=record_stored_page)
+            rss_before_crawl_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+            started = time.perf_counter()
+            website_crawler.start_website_crawling()
+            elapsed_seconds = time.perf_counter() - started
+            peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        server_stats = requests.get(f"{site_url}{STATS_PATH}", timeout=10).json()
+    finally:
+        os.chdir(working_directory)
+        site_process.terminate()
+        site_process.join()
+
+    first_request_at = {int(page_id): arrived_at for page_id, arrived_at in server_stats['first_request_at'].items()}
+    fetch_to_store_ms = sorted(
+        (stored_time - first_request_at[int(url.rsplit('/', 1)[1])]) * 1000
+        for url, stored_time in stored_at.items()
+    )
+    return {
+        'benchmark': 'crawler_throughput',
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'site': {**asdict(site_config), 'page_count': site_config.page_count},
+        'request_delay_seconds': request_delay_seconds,
+        'pages_requested': len(first_request_at),
+        'pages_refetched': server_stats['requests'] - len(first_request_at),
+        'pages_stored': len(stored_at),
+        'pages_failed': len(first_request_at) - len(stored_at),
+        'seconds': round(elapsed_seconds, 3),
+        'pages_per_second': round(len(stored_at) / elapsed_seconds, 2),
+        'fetch_to_store_ms': {
+            'p50': round(_percentile(fetch_to_store_ms, 50), 2) if fetch_to_store_ms else None,
+            'p99': round(_percentile(fetch_to_store_ms, 99), 2) if fetch_to_store_ms else None,
+            'max': round(fetch_to_store_ms[-1], 2) if fetch_to_store_ms else None,
+        },
+        'rss_before_crawl_mb': round(rss_before_crawl_mb, 1),
+        'peak_rss_mb': round(peak_rss_mb, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--fan-out', type=int, default=4, help='links from each page to new pages')
+    parser.add_argument('--depth', type=int, default=3, help='depth of the site tree (and of the crawl)')
+    parser.add_argument('--page-kb', type=float, default=16, help='approximate size of each page')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='server-side delay added to every response')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of pages answered with HTTP 503')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--request-delay', type=float, default=0.0, help="crawler's politeness delay between pages")
+    parser.add_argument('--output', help='append the result as one JSON line to this file')
+    arguments = parser.parse_args()
+
+    site_config = SyntheticSiteConfig(arguments.fan_out, arguments.depth, int(arguments.page_kb * 1024),
+                                      arguments.latency_ms, arguments.error_rate, arguments.seed)
+    benchmark_result = run_benchmark(site_config, arguments.request_delay)
+    print(json.dumps(benchmark_result, indent=2))
+    if arguments.output:
+        with open(arguments.output, 'a') as output_file:
+            output_file.write(json.dumps(benchmark_result) + "\n")
+
+
+if __name__ == '__main__':
+    main()
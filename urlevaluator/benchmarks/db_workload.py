@@ -0,0 +1,314 @@
+"""Database access paths at scale, per schema variant.
+
+Usage: python -m urlevaluator.benchmarks.db_workload [--links 100000 1000000 10000000] [--runs 4]
+       [--classified 0.5] [--variant NAME "SQL; SQL"] [--work-dir DIR] [--output results.jsonl]
+
+For each --links scale, one synthetic database is generated with set-based SQL. Pages are spread
+over hosts with a skewed distribution, links point to known pages or to new URLs, anchor and
+excerpt texts repeat, and a --classified fraction of each run already has JSON topic scores.
+Each schema variant then gets a copy of that database with its DDL applied. The crawler,
+queue and analytics code run against every copy, and per-call latencies are reported as JSON
+together with the p50 ratio to the baseline variant. Generated databases are kept in --work-dir
+(a temporary directory by default) and reused on later runs with the same shape.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+from ..src.classifier.link_processor import DEFAULT_TOPIC_CATEGORIES
+from ..src.database.connection import connection_registry
+from ..src.database.init_db import get_db_manager
+from ..src.database.queue import QueueManager
+from ..src.database.url_db_manager import WebCrawlDatabaseManager
+from ..src.scraper.models import CrawledPageData, ExtractedLink
+from ..src.utils.analytics import aggregate_topic_scores
+
+SCHEMA_VARIANTS: Dict[str, List[str]] = {
+    'baseline': [],
+    'links_url_index': ['CREATE INDEX links_url_idx ON links (url)'],
+    'links_url_run_indexes': ['CREATE INDEX links_url_idx ON links (url)',
+                              'CREATE INDEX links_run_id_idx ON links (run_id)'],
+}
+LINKS_PER_PAGE = 25
+HOST_COUNT = 1000
+INTERNAL_LINK_PERCENT = 60
+WORDS = ['latest', 'news', 'sports', 'science', 'politics', 'technology', 'film', 'election', 'match',
+         'research', 'review', 'weather', 'market', 'health', 'travel', 'opinion']
+
+# Deterministic pseudo-random values in [0, 1): DuckDB's random() is not reproducible across threads.
+GENERATOR_MACROS = [
+    "CREATE OR REPLACE TEMP MACRO bucket(n, salt, buckets) AS CAST(hash(n, salt) % buckets AS BIGINT)",
+    "CREATE OR REPLACE TEMP MACRO unit(n, salt) AS bucket(n, salt, 1000000) / 1000000.0",
+    # Cubing a uniform value skews pages towards a few large hosts.
+    f"CREATE OR REPLACE TEMP MACRO host_of(n) AS CAST(floor({HOST_COUNT} * pow(unit(n, 'host'), 3)) AS BIGINT)",
+    "CREATE OR REPLACE TEMP MACRO page_url(p) AS "
+    f"'https://site' || host_of(p) || '.example/' || {WORDS}[1 + p % {len(WORDS)}] || '/page-' || p",
+    "CREATE OR REPLACE TEMP MACRO synthetic_text(kind, n) AS "
+    f"kind || ' ' || n || ' ' || {WORDS}[1 + n % {len(WORDS)}] || ' ' || {WORDS}[1 + (n // {len(WORDS)}) % {len(WORDS)}]",
+]
+
+
+def synthetic_database_name(link_count: int, run_count: int, classified_fraction: float, topics: Sequence[str]) -> str:
+    return f"workload_{link_count}_links_{run_count}_runs_{int(classified_fraction * 100)}pct_{len(topics)}topics.db"
+
+
+def run_seed_url(run_id: int) -> str:
+    return f"https://seed{run_id}.example/"
+
+
+def generate_synthetic_database(db_name: str, link_count: int, run_count: int = 4, classified_fraction: float = 0.5,
+                                topics: Sequence[str] = DEFAULT_TOPIC_CATEGORIES) -> None:
+    """Create resources/<db_name> with the application schema and link_count links over run_count crawl runs."""
+    database_manager = get_db_manager(db_name)
+    database_manager.create_database()
+    connection = database_manager.get_cursor()
+    for macro in GENERATOR_MACROS:
+        connection.execute(macro)
+    page_count = max(1, link_count // LINKS_PER_PAGE)
+    anchor_text_count = max(100, link_count // 20)
+    excerpt_text_count = max(100, link_count // 5)
+    topic_scores_expression = "json_object(" + ", ".join(
+        f"'{topic}', round(unit(i, '{topic}'), 4)" for topic in topics) + ")"
+
+    connection.execute("""
+        INSERT INTO crawl_runs (id, seed_url, max_depth, status, started_at, finished_at)
+        SELECT r, 'https://seed' || r || '.example/', 3, 'completed',
+               TIMESTAMP '2024-01-01' + to_days(CAST(r AS INTEGER)), TIMESTAMP '2024-01-01' + to_days(CAST(r AS INTEGER))
+        FROM range(1, ? + 1) t(r)
+    """, [run_count])
+    connection.execute(f"""
+        INSERT INTO pages (id, run_id, url, source_url, depth, title, content_hash,
+                           first_fetched_at, last_fetched_at, created_at)
+        SELECT i + 1, i * {run_count} // {page_count} + 1, page_url(i),
+               CASE WHEN i > 0 THEN page_url(i // {LINKS_PER_PAGE}) END, CAST(floor(log(1 + i) / log({LINKS_PER_PAGE})) AS INTEGER),
+               'Synthetic page ' || i, md5(CAST(i AS VARCHAR)),
+               TIMESTAMP '2024-01-01', TIMESTAMP '2024-01-01', TIMESTAMP '2024-01-01'
+        FROM range({page_count}) t(i)
+    """)
+    connection.execute(f"""
+        INSERT INTO texts (id, content)
+        SELECT md5_number_lower(content), content
+        FROM (SELECT synthetic_text('anchor', i) AS content FROM range({anchor_text_count}) t(i)
+              UNION ALL
+              SELECT synthetic_text('excerpt', i) FROM range({excerpt_text_count}) t(i))
+    """)
+    connection.execute(f"""
+        INSERT INTO links (id, run_id, page_id, url, link_text_id, content_id, topic_scores, visited_at, created_at, updated_at)
+        SELECT i + 1, page_index * {run_count} // {page_count} + 1, page_index + 1,
+               CASE WHEN internal THEN page_url(bucket(i, 'target', {page_count}))
+                    ELSE 'https://site' || host_of(i + {page_count}) || '.example/item/' || i END,
+               md5_number_lower(synthetic_text('anchor', bucket(i, 'anchor', {anchor_text_count}))),
+               md5_number_lower(synthetic_text('excerpt', bucket(i, 'excerpt', {excerpt_text_count}))),
+               -- Links of the first classified_fraction of each run's pages are already scored.
+               CASE WHEN page_index * {run_count} % {page_count} < {classified_fraction} * {page_count}
+                    THEN {topic_scores_expression} END,
+               CASE WHEN internal THEN TIMESTAMP '2024-01-01' END,
+               TIMESTAMP '2024-01-01', TIMESTAMP '2024-01-01'
+        FROM (SELECT i, LEAST(i // {LINKS_PER_PAGE}, {page_count} - 1) AS page_index,
+                     bucket(i, 'internal', 100) < {INTERNAL_LINK_PERCENT} AS internal
+              FROM range({link_count}) t(i))
+    """)
+    # Rows were inserted with explicit ids; move the sequences past them so the application's inserts do not collide.
+    for sequence_name, row_count in [('crawl_runs_id_seq', run_count), ('pages_id_seq', page_count), ('links_id_seq', link_count)]:
+        connection.execute(f"SELECT max(nextval('{sequence_name}')) FROM range(?)", [row_count])
+    connection.close()
+    connection_registry.close(database_manager.get_db_path())
+
+
+def _latency_summary(call_seconds: List[float]) -> Dict:
+    call_milliseconds = sorted(seconds * 1000 for seconds in call_seconds)
+    if not call_milliseconds:
+        return {'calls': 0}
+    quantiles = (statistics.quantiles(call_milliseconds, n=100, method='inclusive')
+                 if len(call_milliseconds) > 1 else [call_milliseconds[0]] * 99)
+    return {
+        'calls': len(call_milliseconds),
+        'p50_ms': round(quantiles[49], 3),
+        'p99_ms': round(quantiles[98], 3),
+        'mean_ms': round(statistics.fmean(call_milliseconds), 3),
+        'total_seconds': round(sum(call_milliseconds) / 1000, 3),
+    }
+
+
+def _time_calls(call: Callable, call_arguments: Sequence[tuple]) -> List[float]:
+    call_seconds = []
+    for arguments in call_arguments:
+        started = time.perf_counter()
+        call(*arguments)
+        call_seconds.append(time.perf_counter() - started)
+    return call_seconds
+
+
+def _synthetic_crawled_page(page_number: int, links_per_page: int) -> CrawledPageData:
+    page_url = f"https://benchmark.example/new/page-{page_number}"
+    return CrawledPageData(
+        url=page_url,
+        source_url="https://benchmark.example/",
+        crawl_depth=1,
+        page_title=f"Benchmark page {page_number}",
+        extracted_links=[ExtractedLink(f"{page_url}/link-{link_number}", f"new anchor {page_number} {link_number}",
+                                       f"new excerpt {page_number} {link_number % 5}")
+                         for link_number in range(links_per_page)],
+        content_hash=f"{page_number:064x}",
+    )
+
+
+def benchmark_access_paths(db_name: str, run_id: int, topics: Sequence[str], calls: int = 100,
+                           batch_size: int = 64) -> Dict:
+    """Time each access path on resources/<db_name>; read paths run before the write paths that change the data."""
+    topics = list(topics)
+    crawl_database = WebCrawlDatabaseManager(db_name)
+    crawl_database.crawl_run_id = run_id
+    queue_manager = QueueManager(run_seed_url(run_id), db_name, crawl_run_id=run_id)
+    connection = crawl_database.database_connection
+    access_paths = {}
+    try:
+        known_urls = [row[0] for row in connection.execute(
+            f"SELECT url FROM links WHERE visited_at IS NOT NULL USING SAMPLE reservoir({calls // 2} ROWS) REPEATABLE (7)"
+        ).fetchall()]
+        unknown_urls = [f"https://unknown.example/page-{url_number}" for url_number in range(calls - len(known_urls))]
+        access_paths['is_url_already_visited'] = _latency_summary(
+            _time_calls(crawl_database.is_url_already_visited, [(url,) for url in known_urls + unknown_urls]))
+
+        fetch_seconds, last_link_id = [], None
+        for _ in range(max(1, calls // 5)):
+            started = time.perf_counter()
+            pending_batch = queue_manager.fetch_pending_batch(batch_size, last_link_id, topics)
+            fetch_seconds.append(time.perf_counter() - started)
+            if not pending_batch:
+                break
+            last_link_id = pending_batch[-1][0]
+        access_paths['fetch_pending_batch'] = _latency_summary(fetch_seconds)
+        access_paths['get_total_pending'] = _latency_summary(
+            _time_calls(queue_manager.get_total_pending, [(topics,)] * 5))
+        access_paths['aggregate_topic_scores'] = _latency_summary(_time_calls(
+            aggregate_topic_scores, [(run_seed_url(run_id), get_db_manager(db_name).get_db_path(), run_id)] * 3))
+
+        crawled_pages = [_synthetic_crawled_page(page_number, LINKS_PER_PAGE) for page_number in range(max(1, calls // 2))]
+        access_paths['store_crawled_page_data'] = _latency_summary(
+            _time_calls(crawl_database.store_crawled_page_data, [(crawled_page,) for crawled_page in crawled_pages]))
+        access_paths['mark_url_as_visited'] = _latency_summary(_time_calls(
+            crawl_database.mark_url_as_visited,
+            [(crawled_page.extracted_links[0].url,) for crawled_page in crawled_pages]))
+
+        pending_link_ids = [row[0] for row in connection.execute(
+            "SELECT id FROM links WHERE run_id = ? AND topic_scores IS NULL ORDER BY id LIMIT ?",
+            [run_id, batch_size * max(1, calls // 5)]
+        ).fetchall()]
+        classified_batches = [
+            ([(link_id, {topic: 0.5 for topic in topics}) for link_id in pending_link_ids[start:start + batch_size]],)
+            for start in range(0, len(pending_link_ids), batch_size)
+        ]
+        access_paths['update_classifications'] = _latency_summary(
+            _time_calls(queue_manager.update_classifications, classified_batches))
+    finally:
+        queue_manager.close()
+        crawl_database.close_database_connection()
+    return access_paths
+
+
+def run_benchmark(link_counts: Sequence[int], run_count: int = 4, classified_fraction: float = 0.5,
+                  schema_variants: Optional[Dict[str, List[str]]] = None, calls: int = 100,
+                  topics: Sequence[str] = DEFAULT_TOPIC_CATEGORIES, work_directory: Optional[str] = None) -> Dict:
+    schema_variants = schema_variants or SCHEMA_VARIANTS
+    original_directory = os.getcwd()
+    temporary_directory = None if work_directory else tempfile.TemporaryDirectory()
+    scale_results = []
+    try:
+        os.chdir(work_directory or temporary_directory.name)
+        for link_count in link_counts:
+            base_db_name = synthetic_database_name(link_count, run_count, classified_fraction, topics)
+            base_db_path = get_db_manager(base_db_name).get_db_path()
+            generation_seconds = None
+            if not os.path.exists(base_db_path):
+                started = time.perf_counter()
+                generate_synthetic_database(base_db_name, link_count, run_count, classified_fraction, topics)
+                generation_seconds = round(time.perf_counter() - started, 3)
+
+            variant_results = {}
+            for variant_name, variant_statements in schema_variants.items():
+                variant_db_name = base_db_name.replace('.db', f'_{variant_name}.db')
+                variant_db_path = get_db_manager(variant_db_name).get_db_path()
+                shutil.copyfile(base_db_path, variant_db_path)
+                variant_connection = get_db_manager(variant_db_name).get_cursor()
+                started = time.perf_counter()
+                for statement in variant_statements:
+                    variant_connection.execute(statement)
+                variant_connection.execute("CHECKPOINT")
+                variant_connection.close()
+                apply_seconds = time.perf_counter() - started
+                variant_results[variant_name] = {
+                    'statements': variant_statements,
+                    'apply_seconds': round(apply_seconds, 3),
+                    'file_mb': round(os.path.getsize(variant_db_path) / 2 ** 20, 1),
+                    'access_paths': benchmark_access_paths(variant_db_name, run_count, topics, calls),
+                }
+                connection_registry.close(variant_db_path)
+                os.remove(variant_db_path)
+
+            baseline_name = next(iter(variant_results))
+            for variant_result in variant_results.values():
+                variant_result['p50_vs_' + baseline_name] = {
+                    access_path: round(summary['p50_ms'] / variant_results[baseline_name]['access_paths'][access_path]['p50_ms'], 2)
+                    for access_path, summary in variant_result['access_paths'].items()
+                    if summary.get('p50_ms') and variant_results[baseline_name]['access_paths'][access_path].get('p50_ms')
+                }
+            scale_results.append({
+                'links': link_count,
+                'pages': max(1, link_count // LINKS_PER_PAGE),
+                'runs': run_count,
+                'classified_fraction': classified_fraction,
+                'generation_seconds': generation_seconds,
+                'base_file_mb': round(os.path.getsize(base_db_path) / 2 ** 20, 1),
+                'variants': variant_results,
+            })
+    finally:
+        os.chdir(original_directory)
+        if temporary_directory:
+            connection_registry.close_all()
+            temporary_directory.cleanup()
+    return {
+        'benchmark': 'db_workload',
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'duckdb_threads': os.environ.get('DUCKDB_THREADS'),
+        'topics': len(topics),
+        'calls_per_path': calls,
+        'scales': scale_results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--links', nargs='+', type=int, default=[100_000], help='number of links per generated database')
+    parser.add_argument('--runs', type=int, default=4, help='crawl runs the links are spread over; the last one is queried')
+    parser.add_argument('--classified', type=float, default=0.5, help='fraction of each run that already has topic scores')
+    parser.add_argument('--calls', type=int, default=100, help='calls per point-lookup path (batch paths use a fifth)')
+    parser.add_argument('--variant', nargs=2, action='append', metavar=('NAME', 'SQL'),
+                        help='add a schema variant: DDL statements separated by ";" applied to the baseline schema')
+    parser.add_argument('--only-custom', action='store_true', help='compare baseline with the --variant schemas only')
+    parser.add_argument('--work-dir', help='keep generated databases here and reuse them on later runs')
+    parser.add_argument('--output', help='append the result as one JSON line to this file')
+    arguments = parser.parse_args()
+
+    schema_variants = {'baseline': []} if arguments.only_custom else dict(SCHEMA_VARIANTS)
+    for variant_name, variant_sql in arguments.variant or []:
+        schema_variants[variant_name] = [statement.strip() for statement in variant_sql.split(';') if statement.strip()]
+    if arguments.work_dir:
+        os.makedirs(arguments.work_dir, exist_ok=True)
+    benchmark_result = run_benchmark(arguments.links, arguments.runs, arguments.classified, schema_variants,
+                                     arguments.calls, work_directory=arguments.work_dir)
+    print(json.dumps(benchmark_result, indent=2))
+    if arguments.output:
+        with open(arguments.output, 'a') as output_file:
+            output_file.write(json.dumps(benchmark_result) + "\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Import time and memory of the package's entry points, each measured in a fresh interpreter.
+
+Usage: python -m urlevaluator.benchmarks.import_time [--repeats 3]
+
+Reports the best wall time, peak RSS and whether torch/transformers were loaded, as JSON.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List
+
+HEAVY_MODULES = ('torch', 'transformers')
+# The fresh interpreter finds the package from here, whichever directory the caller runs in.
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Entry points that must stay free of the ML stack, followed by the ones that need it.
+LIGHT_IMPORT_TARGETS = [
+    'urlevaluator',
+    'urlevaluator.src',
+    'urlevaluator.src.classifier',
+    'urlevaluator.src.database.init_db',
+    'urlevaluator.src.utils.query_db',
+    'urlevaluator.src.scraper.crawler',
+]
+HEAVY_IMPORT_TARGETS = [
+    'urlevaluator.src.classifier.topic_classifier',
+    'urlevaluator.src.main',
+]
+
+_MEASURE_IMPORT = """
+import json, resource, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{'seconds': elapsed, 'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+                   'heavy_modules': [name for name in {heavy_modules!r} if name in sys.modules]}}))
+"""
+
+
+def measure_import(module: str) -> Dict:
+    completed = subprocess.run([sys.executable, '-c', _MEASURE_IMPORT.format(module=module, heavy_modules=HEAVY_MODULES)],
+                               capture_output=True, text=True, check=True, cwd=PROJECT_ROOT)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def run_benchmark(targets: List[str], repeats: int) -> List[Dict]:
+    import_results = []
+    for module in targets:
+        measurements = [measure_import(module) for _ in range(repeats)]
+        best = min(measurements, key=lambda measurement: measurement['seconds'])
+        import_results.append({
+            'module': module,
+            'seconds': round(best['seconds'], 3),
+            'peak_rss_mb': round(max(measurement['peak_rss_mb'] for measurement in measurements), 1),
+            'heavy_modules': best['heavy_modules'],
+        })
+    return import_results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeats', type=int, default=3, help='fresh interpreters per module (best time is reported)')
+    arguments = parser.parse_args()
+    print(json.dumps(run_benchmark(LIGHT_IMPORT_TARGETS + HEAVY_IMPORT_TARGETS, arguments.repeats), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""Accuracy parity and latency/throughput of the topic classifier's inference backends.
+
+Usage: python -m urlevaluator.benchmarks.inference_backends [--backends torch onnx-int8] [--texts 256] [--bf16]
+
+Scores from every backend are compared with the fp32 torch reference; results are printed as JSON.
+"""
+import argparse
+import json
+import statistics
+import time
+from typing import Dict, List
+
+from ..src.classifier.download_model import INFERENCE_BACKENDS, TORCH_BACKEND
+from ..src.classifier.link_processor import DEFAULT_TOPIC_CATEGORIES
+from ..src.classifier.topic_classifier import BF16_PRECISION, FP32_PRECISION, TopicClassifier
+from ..src.database import get_db_manager
+
+SAMPLE_LINK_TEXTS = [
+    "Home", "Contact us", "Latest smartphone reviews and benchmarks", "Premier League results and fixtures",
+    "Parliament passes new budget bill", "Box office: weekend's top movies", "NASA confirms water on the Moon",
+    "How to set up a Python virtual environment", "Olympic swimming records broken in Paris",
+    "Election polls tighten ahead of the debate", "Streaming series renewed for a third season",
+    "New study links sleep and memory", "Privacy policy", "Cloud GPU pricing compared",
+]
+
+
+def load_benchmark_texts(text_count: int, from_database: bool) -> List[str]:
+    texts: List[str] = []
+    if from_database:
+        connection = get_db_manager().get_cursor()
+        try:
+            texts = [row[0] for row in connection.execute(
+                "SELECT content FROM texts WHERE length(content) > 0 LIMIT ?", [text_count]
+            ).fetchall()]
+        finally:
+            connection.close()
+    while len(texts) < text_count:
+        texts.extend(SAMPLE_LINK_TEXTS)
+    return texts[:text_count]
+
+
+def compare_scores(reference_scores: List[Dict[str, float]], candidate_scores: List[Dict[str, float]]) -> Dict[str, float]:
+    absolute_differences = [abs(reference[topic] - candidate[topic])
+                            for reference, candidate in zip(reference_scores, candidate_scores)
+                            for topic in reference]
+    top_topic_matches = [max(reference, key=reference.get) == max(candidate, key=candidate.get)
+                         for reference, candidate in zip(reference_scores, candidate_scores)]
+    return {
+        'max_abs_diff': max(absolute_differences),
+        'mean_abs_diff': statistics.fmean(absolute_differences),
+        'top_topic_agreement': sum(top_topic_matches) / len(top_topic_matches),
+    }
+
+
+def benchmark_backend(inference_backend: str, texts: List[str], repeats: int, latency_samples: int,
+                      precision: str = FP32_PRECISION) -> Dict:
+    load_started = time.perf_counter()
+    topic_classifier = TopicClassifier(DEFAULT_TOPIC_CATEGORIES, inference_backend=inference_backend, precision=precision)
+    load_seconds = time.perf_counter() - load_started
+
+    topic_classifier.classify_batch(texts[:8])  # warm-up
+    batch_durations = []
+    for _ in range(repeats):
+        batch_started = time.perf_counter()
+        scores = topic_classifier.classify_batch(texts)
+        batch_durations.append(time.perf_counter() - batch_started)
+
+    single_text_latencies_ms = []
+    for text in texts[:latency_samples]:
+        text_started = time.perf_counter()
+        topic_classifier.classify_text(text)
+        single_text_latencies_ms.append((time.perf_counter() - text_started) * 1000)
+
+    best_batch_seconds = min(batch_durations)
+    return {
+        'backend': inference_backend,
+        'precision': topic_classifier.precision,
+        'load_seconds': round(load_seconds, 3),
+        'batch_seconds': round(best_batch_seconds, 4),
+        'texts_per_second': round(len(texts) / best_batch_seconds, 2),
+        'single_text_p50_ms': round(statistics.median(single_text_latencies_ms), 2),
+        'single_text_max_ms': round(max(single_text_latencies_ms), 2),
+        'scores': scores,
+    }
+
+
+def run_benchmark(backends: List[str], text_count: int, repeats: int, latency_samples: int, from_database: bool,
+                  include_bf16: bool = False) -> Dict:
+    texts = load_benchmark_texts(text_count, from_database)
+    backend_results = [benchmark_backend(backend, texts, repeats, latency_samples)
+                       for backend in dict.fromkeys([TORCH_BACKEND, *backends])]
+    if include_bf16:
+        backend_results.append(benchmark_backend(TORCH_BACKEND, texts, repeats, latency_samples, BF16_PRECISION))
+    reference_scores = backend_results[0]['scores']
+    for backend_result in backend_results:
+        backend_result['parity'] = compare_scores(reference_scores, backend_result.pop('scores'))
+    return {'texts': len(texts), 'topics': len(DEFAULT_TOPIC_CATEGORIES), 'results': backend_results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--backends', nargs='+', choices=INFERENCE_BACKENDS, default=list(INFERENCE_BACKENDS))
+    parser.add_argument('--texts', type=int, default=256, help='number of link texts to classify per pass')
+    parser.add_argument('--repeats', type=int, default=3, help='timed batch passes per backend (best is reported)')
+    parser.add_argument('--latency-samples', type=int, default=32, help='single-text calls used for latency percentiles')
+    parser.add_argument('--from-db', action='store_true', help='use anchor texts from the crawl database')
+    parser.add_argument('--bf16', action='store_true', help='also run the torch backend with bf16 autocast on CPU')
+    arguments = parser.parse_args()
+    print(json.dumps(run_benchmark(arguments.backends, arguments.texts, arguments.repeats,
+                                   arguments.latency_samples, arguments.from_db, arguments.bf16), indent=2))
+
+
+if __name__ == '__main__':
+    main()
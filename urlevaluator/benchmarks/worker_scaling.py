@@ -0,0 +1,55 @@
+"""Throughput of multi-process CPU inference as the number of workers grows.
+
+Usage: python -m urlevaluator.benchmarks.worker_scaling [--workers 1 2 4 8] [--texts 2048]
+
+Each worker count gets a fresh InferenceWorkerPool whose workers load the model themselves (the warm-up
+batch waits for them); results are printed as JSON.
+"""
+import argparse
+import json
+import time
+from typing import Dict, List
+
+from ..src.classifier.link_processor import DEFAULT_TOPIC_CATEGORIES
+from ..src.classifier.topic_classifier import TopicClassifier
+from ..src.classifier.worker_pool import InferenceWorkerPool, available_cores
+from .inference_backends import load_benchmark_texts
+
+
+def run_benchmark(worker_counts: List[int], text_count: int, from_database: bool) -> Dict:
+    topic_classifier = TopicClassifier(DEFAULT_TOPIC_CATEGORIES)
+    # Distinct texts, so no work is shared between duplicates.
+    texts = [f"{text} {text_index}" for text_index, text in enumerate(load_benchmark_texts(text_count, from_database))]
+    scaling_results = []
+    for worker_count in worker_counts:
+        inference_pool = InferenceWorkerPool(topic_classifier, worker_count)
+        try:
+            inference_pool.classify_batch(texts[:worker_count * 8])  # warm-up
+            started = time.perf_counter()
+            inference_pool.classify_batch(texts)
+            elapsed_seconds = time.perf_counter() - started
+        finally:
+            inference_pool.close()
+        scaling_results.append({
+            'workers': worker_count,
+            'seconds': round(elapsed_seconds, 3),
+            'texts_per_second': round(len(texts) / elapsed_seconds, 2),
+        })
+    baseline = scaling_results[0]['texts_per_second']
+    for scaling_result in scaling_results:
+        scaling_result['speedup'] = round(scaling_result['texts_per_second'] / baseline, 2)
+    return {'cores': len(available_cores()), 'texts': len(texts), 'topics': len(DEFAULT_TOPIC_CATEGORIES),
+            'results': scaling_results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', nargs='+', type=int, default=[1, 2, 4, 8])
+    parser.add_argument('--texts', type=int, default=2048, help='number of link texts to classify per worker count')
+    parser.add_argument('--from-db', action='store_true', help='use anchor texts from the crawl database')
+    arguments = parser.parse_args()
+    print(json.dumps(run_benchmark(arguments.workers, arguments.texts, arguments.from_db), indent=2))
+
+
+if __name__ == '__main__':
+    main()
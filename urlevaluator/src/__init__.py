@@ -1,25 +1,54 @@
-from .main import crawl_website_and_classify_links
-from .scraper import WebSiteCrawler, WebScrapingConfig, ExtractedLink, CrawledPageData
-from .classifier import LinkTopicClassifier, TopicClassifier, ModelManager
-from .database import WebCrawlDatabaseManager, DatabaseManager, QueueManager, get_db_manager
-from .utils import (
-    logger, 
-    aggregate_topic_scores, 
-    get_db_connection,
-    delete_all_but_eight_rows,
-    clear_topic_columns,
-    truncate_tables,
-    get_table_info
-)
+from .lazy_exports import lazy_module_attributes
+
+__getattr__, __dir__ = lazy_module_attributes(__name__, {
+    "crawl_website_and_classify_links": ".main",
+    "recrawl_website_and_classify_links": ".main",
+    "crawl_seed_file_and_classify_links": ".main",
+    "classify_crawl_run_links": ".main",
+    "BatchCrawlClassifier": ".batch_pipeline",
+    "SeedCrawlResult": ".batch_pipeline",
+    "StreamingCrawlClassifier": ".streaming_pipeline",
+    "WebSiteCrawler": ".scraper",
+    "WebScrapingConfig": ".scraper",
+    "ExtractedLink": ".scraper",
+    "CrawledPageData": ".scraper",
+    "IncrementalRecrawler": ".scraper",
+    "RecrawlConfig": ".scraper",
+    "LinkTopicClassifier": ".classifier",
+    "TopicClassifier": ".classifier",
+    "EmbeddingTopicClassifier": ".classifier",
+    "ModelManager": ".classifier",
+    "WebCrawlDatabaseManager": ".database",
+    "DatabaseManager": ".database",
+    "QueueManager": ".database",
+    "get_db_manager": ".database",
+    "logger": ".utils",
+    "aggregate_topic_scores": ".utils",
+    "TopicAnalytics": ".utils",
+    "get_db_connection": ".utils",
+    "delete_all_but_eight_rows": ".utils",
+    "clear_topic_columns": ".utils",
+    "truncate_tables": ".utils",
+    "get_table_info": ".utils",
+})
 
 __all__ = [
     "crawl_website_and_classify_links",
+    "recrawl_website_and_classify_links",
+    "crawl_seed_file_and_classify_links",
+    "classify_crawl_run_links",
+    "BatchCrawlClassifier",
+    "SeedCrawlResult",
+    "StreamingCrawlClassifier",
     "WebSiteCrawler",
     "WebScrapingConfig", 
     "ExtractedLink",
     "CrawledPageData",
+    "IncrementalRecrawler",
+    "RecrawlConfig",
     "LinkTopicClassifier",
     "TopicClassifier",
+    "EmbeddingTopicClassifier",
     "ModelManager",
     "WebCrawlDatabaseManager",
     "DatabaseManager", 
@@ -27,6 +56,7 @@ __all__ = [
     "get_db_manager",
     "logger",
     "aggregate_topic_scores",
+    "TopicAnalytics",
     "get_db_connection",
     "delete_all_but_eight_rows",
     "clear_topic_columns", 
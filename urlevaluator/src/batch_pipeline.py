@@ -0,0 +1,134 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+
+from tqdm.auto import tqdm
+
+from .classifier import LinkTopicClassifier
+from .database import get_db_manager
+from .scraper import WebSiteCrawler
+from .scraper.models import WebScrapingConfig
+from .utils import logger
+from .utils.analytics import aggregate_topic_scores_by_run
+
+DEFAULT_BATCH_CONCURRENCY = 4
+
+
+def read_seed_file(seed_file_path: str) -> List[str]:
+    """Seed URLs from a file with one URL per line; blank lines, '#' comment lines and repeated seeds are skipped."""
+    with open(seed_file_path) as seed_file:
+        seed_urls = [line.strip() for line in seed_file if line.strip() and not line.lstrip().startswith('#')]
+    return list(dict.fromkeys(seed_urls))
+
+
+@dataclass
+class SeedCrawlResult:
+    seed_url: str
+    crawl_run_id: Optional[int] = None
+    status: str = 'pending'
+    pages_crawled: int = 0
+    links_classified: int = 0
+    average_topic_scores: Dict[str, float] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+class BatchCrawlClassifier:
+    """Crawl many seeds concurrently and classify all of their links with one loaded model.
+
+    Seeds are crawled by a pool of `concurrency` threads (BATCH_CRAWL_CONCURRENCY, default 4),
+    each crawler on its own cursor of the shared database. The calling thread loads a single
+    LinkTopicClassifier while the first crawls run, then classifies each seed's crawl run as
+    soon as its crawl finishes, so inference overlaps with fetching the remaining seeds. A
+    failed crawl is reported per seed and does not stop the batch; the links it stored before
+    failing are still classified. A seed whose classification fails is reported the same way.
+    """
+
+    def __init__(self, seed_urls: List[str], maximum_crawl_depth: int,
+                 additional_topic_categories: Optional[List[str]] = None,
+                 config: Optional[WebScrapingConfig] = None, concurrency: Optional[int] = None):
+        if not seed_urls:
+            raise ValueError("No seed URLs to crawl")
+        self._seed_urls = seed_urls
+        self._maximum_crawl_depth = maximum_crawl_depth
+        self._additional_topic_categories = additional_topic_categories
+        self._config = config
+        self._concurrency = concurrency or int(os.environ.get('BATCH_CRAWL_CONCURRENCY', DEFAULT_BATCH_CONCURRENCY))
+
+    def _crawl_seed(self, seed_result: SeedCrawlResult) -> SeedCrawlResult:
+        website_crawler = None
+        try:
+            website_crawler = WebSiteCrawler(seed_result.seed_url, self._maximum_crawl_depth, self._config)
+            website_crawler.start_website_crawling()
+            seed_result.status = 'completed'
+        except Exception as crawl_error:
+            logger.error(f"Crawl of seed {seed_result.seed_url} failed: {crawl_error}")
+            seed_result.status = 'failed'
+            seed_result.error = str(crawl_error)
+        if website_crawler:
+            seed_result.crawl_run_id = website_crawler.crawl_run_id
+            seed_result.pages_crawled = website_crawler.total_pages_crawled_count
+        return seed_result
+
+    @staticmethod
+    def _classify_seed(link_classifier: LinkTopicClassifier, seed_result: SeedCrawlResult) -> None:
+        try:
+            seed_result.links_classified = link_classifier.classify_crawl_run(seed_result.crawl_run_id)
+        except Exception as classification_error:
+            logger.error(f"Classification of seed {seed_result.seed_url} failed: {classification_error}")
+            seed_result.status = 'failed'
+            seed_result.error = str(classification_error)
+
+    def run(self) -> List[SeedCrawlResult]:
+        """Crawl and classify every seed; return one result per seed, in seed order, with its topic averages."""
+        seed_results = [SeedCrawlResult(seed_url) for seed_url in self._seed_urls]
+        logger.info(f"Starting batch crawl of {len(seed_results)} seeds with {self._concurrency} concurrent crawls")
+        crawl_pool = ThreadPoolExecutor(max_workers=self._concurrency, thread_name_prefix="batch-crawler")
+        seed_progress = tqdm(total=len(seed_results), desc="Crawling and classifying seeds")
+        link_classifier = None
+        try:
+            crawl_futures = [crawl_pool.submit(self._crawl_seed, seed_result) for seed_result in seed_results]
+            # The model loads while the first seeds are being crawled. No run is bound to it yet: each
+            # run is selected before it is classified, and autotuning samples the first one.
+            link_classifier = LinkTopicClassifier(None, self._additional_topic_categories)
+            for crawl_future in as_completed(crawl_futures):
+                seed_result = crawl_future.result()
+                if seed_result.crawl_run_id is not None:
+                    self._classify_seed(link_classifier, seed_result)
+                seed_progress.update(1)
+                logger.info("Seed %s %s: %d pages crawled, %d links classified", seed_result.seed_url,
+                            seed_result.status, seed_result.pages_crawled, seed_result.links_classified)
+        finally:
+            crawl_pool.shutdown(wait=True, cancel_futures=True)
+            seed_progress.close()
+            if link_classifier:
+                link_classifier.close()
+
+        average_scores_by_run = aggregate_topic_scores_by_run(
+            [seed_result.crawl_run_id for seed_result in seed_results if seed_result.crawl_run_id is not None],
+            get_db_manager().get_db_path()
+        )
+        for seed_result in seed_results:
+            seed_result.average_topic_scores = average_scores_by_run.get(seed_result.crawl_run_id, {})
+        return seed_results
+
+
+def log_seed_results(seed_results: List[SeedCrawlResult]) -> None:
+    topics = sorted({topic for seed_result in seed_results for topic in seed_result.average_topic_scores})
+    logger.info("\nPer-Seed Topic Score Aggregation Results:")
+    logger.info(f"{'Seed':<40} {'Status':<10} {'Pages':>6} {'Links':>7} " + " ".join(f"{topic[:13]:>13}" for topic in topics))
+    for seed_result in seed_results:
+        topic_columns = " ".join(
+            f"{seed_result.average_topic_scores[topic]:>13.4f}" if topic in seed_result.average_topic_scores else f"{'-':>13}"
+            for topic in topics
+        )
+        logger.info(f"{seed_result.seed_url[:40]:<40} {seed_result.status:<10} {seed_result.pages_crawled:>6} "
+                    f"{seed_result.links_classified:>7} {topic_columns}")
+
+
+def write_seed_results(seed_results: List[SeedCrawlResult], output_path: str) -> None:
+    """Write one JSON line per seed."""
+    with open(output_path, 'w') as output_file:
+        for seed_result in seed_results:
+            output_file.write(json.dumps(asdict(seed_result)) + "\n")
@@ -1,9 +1,18 @@
-from .download_model import ModelManager
-from .link_processor import LinkTopicClassifier
-from .topic_classifier import TopicClassifier
+from ..lazy_exports import lazy_module_attributes
+
+# Submodules import torch/transformers, so they load on first use rather than with the package.
+__getattr__, __dir__ = lazy_module_attributes(__name__, {
+    "LinkTopicClassifier": ".link_processor",
+    "TopicClassifier": ".topic_classifier",
+    "ModelManager": ".download_model",
+    "EmbeddingTopicClassifier": ".embedding_classifier",
+    "create_topic_classifier": ".classifier_factory",
+})
 
 __all__ = [
     "LinkTopicClassifier",
     "TopicClassifier", 
     "ModelManager",
+    "EmbeddingTopicClassifier",
+    "create_topic_classifier",
 ] 
\ No newline at end of file
@@ -0,0 +1,135 @@
+import json
+import os
+import socket
+import time
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Sequence
+
+import torch
+
+from ..utils import logger
+from .topic_classifier import BF16_PRECISION, FP32_PRECISION, TopicClassifier, cpu_supports_bf16
+
+AUTOTUNE_DIRECTORY = 'autotune'
+DEFAULT_TOKEN_BUDGET_CANDIDATES = (2048, 4096, 8192, 16384)
+DEFAULT_LINK_BATCH_CANDIDATES = (32, 64, 128, 256)
+DEFAULT_AUTOTUNE_SAMPLE_TEXTS = 256
+# Every link batch candidate has to fit in the sample, or a small first run would pick (and cache) a tiny batch size.
+MIN_AUTOTUNE_SAMPLE_TEXTS = max(DEFAULT_LINK_BATCH_CANDIDATES)
+# bf16 trades some accuracy for speed, so it has to be clearly faster than fp32 to be picked.
+BF16_MIN_SPEEDUP = 1.05
+
+
+@dataclass
+class BatchSettings:
+    max_tokens_per_batch: int
+    link_batch_size: int
+    precision: str
+    texts_per_second: float
+    fp32_texts_per_second: float
+
+
+def autotune_cache_path(model_path: str) -> str:
+    return os.path.join(model_path, AUTOTUNE_DIRECTORY, f"{socket.gethostname()}.json")
+
+
+def autotune_cache_key(topic_classifier: TopicClassifier, precision_candidates: Sequence[str]) -> str:
+    """Results only carry over to runs with the same backend, device, thread count, topic count and allowed precisions."""
+    return ":".join([topic_classifier.inference_backend, topic_classifier.device.type, str(torch.get_num_threads()),
+                     str(len(topic_classifier.topics)), "+".join(precision_candidates)])
+
+
+def measure_texts_per_second(topic_classifier: TopicClassifier, texts: List[str], link_batch_size: int,
+                             repeats: int = 2) -> float:
+    """Best-of-repeats throughput of raw model inference (no cache or cascade) over the texts in link-sized chunks."""
+    best_seconds = float('inf')
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for start in range(0, len(texts), link_batch_size):
+            topic_classifier._infer_batch(texts[start:start + link_batch_size])
+        best_seconds = min(best_seconds, time.perf_counter() - started)
+    return len(texts) / best_seconds
+
+
+def autotune_batch_settings(topic_classifier: TopicClassifier, sample_texts: List[str],
+                            precision_candidates: Sequence[str] = (FP32_PRECISION,),
+                            token_budget_candidates: Sequence[int] = DEFAULT_TOKEN_BUDGET_CANDIDATES,
+                            link_batch_candidates: Sequence[int] = DEFAULT_LINK_BATCH_CANDIDATES) -> BatchSettings:
+    """Measure throughput on sample_texts and return the fastest precision, token budget and link batch size.
+
+    Token budgets are swept first with the whole sample as one link batch, then link batch
+    sizes with the winning budget. fp32 throughput is always measured as the baseline, and
+    bf16 wins only with at least BF16_MIN_SPEEDUP over it. The sample must hold at least the
+    largest link batch candidate.
+    """
+    if len(sample_texts) < max(link_batch_candidates):
+        raise ValueError(f"Autotuning needs at least {max(link_batch_candidates)} sample texts, got {len(sample_texts)}")
+    original_settings = (topic_classifier.precision, topic_classifier.max_tokens_per_batch)
+    topic_classifier._infer_batch(sample_texts[:8])  # warm-up
+    measurements: Dict[tuple, float] = {}
+    try:
+        for precision in precision_candidates:
+            topic_classifier.precision = precision
+            for max_tokens_per_batch in token_budget_candidates:
+                topic_classifier.max_tokens_per_batch = max_tokens_per_batch
+                texts_per_second = measure_texts_per_second(topic_classifier, sample_texts, len(sample_texts))
+                measurements[(precision, max_tokens_per_batch)] = texts_per_second
+                logger.info(f"Autotune {precision} max_tokens_per_batch={max_tokens_per_batch}: {texts_per_second:.1f} texts/s")
+        best_by_precision = {
+            candidate_precision: max((setting for setting in measurements if setting[0] == candidate_precision), key=measurements.get)
+            for candidate_precision in precision_candidates
+        }
+        fp32_texts_per_second = measurements[best_by_precision[FP32_PRECISION]]
+        precision, max_tokens_per_batch = best_by_precision[FP32_PRECISION]
+        if BF16_PRECISION in best_by_precision and \
+                measurements[best_by_precision[BF16_PRECISION]] >= fp32_texts_per_second * BF16_MIN_SPEEDUP:
+            precision, max_tokens_per_batch = best_by_precision[BF16_PRECISION]
+
+        topic_classifier.precision, topic_classifier.max_tokens_per_batch = precision, max_tokens_per_batch
+        link_batch_throughputs = {}
+        for link_batch_size in link_batch_candidates:
+            link_batch_throughputs[link_batch_size] = measure_texts_per_second(topic_classifier, sample_texts, link_batch_size)
+            logger.info(f"Autotune link_batch_size={link_batch_size}: {link_batch_throughputs[link_batch_size]:.1f} texts/s")
+        link_batch_size = max(link_batch_throughputs, key=link_batch_throughputs.get)
+    finally:
+        topic_classifier.precision, topic_classifier.max_tokens_per_batch = original_settings
+
+    return BatchSettings(max_tokens_per_batch, link_batch_size, precision,
+                         round(link_batch_throughputs[link_batch_size], 2),
+                         round(fp32_texts_per_second, 2))
+
+
+def load_or_autotune(topic_classifier: TopicClassifier, sample_texts: List[str]) -> Optional[BatchSettings]:
+    """Apply this host's tuned batch settings to the classifier, tuning (and caching) them on first use.
+
+    bf16 is only a candidate when INFERENCE_PRECISION=bf16 was requested and the classifier kept it.
+    """
+    precision_candidates = ((FP32_PRECISION, BF16_PRECISION)
+                            if topic_classifier.precision == BF16_PRECISION and cpu_supports_bf16() else (FP32_PRECISION,))
+    cache_path = autotune_cache_path(topic_classifier.model_manager.get_model_path())
+    cache_key = autotune_cache_key(topic_classifier, precision_candidates)
+    cached_settings = {}
+    if os.path.exists(cache_path):
+        with open(cache_path) as cache_file:
+            cached_settings = json.load(cache_file)
+
+    if cache_key in cached_settings:
+        batch_settings = BatchSettings(**cached_settings[cache_key])
+        logger.info(f"Using cached autotune result from {cache_path}")
+    elif len(sample_texts) < MIN_AUTOTUNE_SAMPLE_TEXTS:
+        logger.info(f"Only {len(sample_texts)} texts to autotune on (at least {MIN_AUTOTUNE_SAMPLE_TEXTS} needed), "
+                    f"keeping the configured batch settings")
+        return None
+    else:
+        batch_settings = autotune_batch_settings(topic_classifier, sample_texts, precision_candidates)
+        cached_settings[cache_key] = asdict(batch_settings)
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(cache_path, 'w') as cache_file:
+            json.dump(cached_settings, cache_file, indent=2)
+
+    topic_classifier.precision = batch_settings.precision
+    topic_classifier.max_tokens_per_batch = batch_settings.max_tokens_per_batch
+    logger.info(f"Autotuned batching: {batch_settings.precision}, max_tokens_per_batch={batch_settings.max_tokens_per_batch}, "
+                f"link_batch_size={batch_settings.link_batch_size}, {batch_settings.texts_per_second} texts/s "
+                f"(fp32 best {batch_settings.fp32_texts_per_second} texts/s)")
+    return batch_settings
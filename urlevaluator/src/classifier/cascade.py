@@ -0,0 +1,264 @@
+import hashlib
+import json
+import os
+import re
+import zlib
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..utils import logger
+
+DEFAULT_HASH_FEATURE_COUNT = 2 ** 18
+DEFAULT_LOW_THRESHOLD = 0.1
+DEFAULT_HIGH_THRESHOLD = 0.9
+DEFAULT_MIN_FEATURE_COVERAGE = 1.0
+CASCADE_DIRECTORY = 'cascade'
+_WORD_PATTERN = re.compile(r"\w+")
+_DIGIT_PATTERN = re.compile(r"\d")
+
+
+def _text_tokens(text: str) -> List[str]:
+    """Word unigrams plus character trigrams, with digits folded so "Page 2" and "Page 17" share features."""
+    words = [_DIGIT_PATTERN.sub("0", word) for word in _WORD_PATTERN.findall(text.lower())]
+    if not words:
+        return ["<no-words>"]
+    tokens = [f"w:{word}" for word in words]
+    for word in words:
+        padded_word = f"<{word}>"
+        tokens.extend(f"c:{padded_word[start:start + 3]}" for start in range(len(padded_word) - 2))
+    return tokens
+
+
+def hash_text_features(text: str, feature_count: int) -> np.ndarray:
+    """Sorted, de-duplicated feature indices of a text (crc32 is stable across processes, unlike hash())."""
+    return np.unique(np.fromiter((zlib.crc32(token.encode('utf-8')) % feature_count for token in _text_tokens(text)),
+                                 dtype=np.int64))
+
+
+class HashedLinearScorer:
+    """Per-topic logistic regression over hashed text features, fitted to historical NLI scores.
+
+    Training uses the stored scores as soft targets, so predictions live on the same scale as
+    the full model. It also remembers which features it has seen, which tells the cascade
+    whether a new text resembles anything it was trained on.
+    """
+
+    def __init__(self, topics: List[str], feature_count: int = DEFAULT_HASH_FEATURE_COUNT):
+        self.topics = list(topics)
+        self.feature_count = feature_count
+        self.weights = np.zeros((feature_count, len(self.topics)), dtype=np.float32)
+        self.bias = np.zeros(len(self.topics), dtype=np.float32)
+        self.seen_features = np.zeros(feature_count, dtype=bool)
+
+    def _featurize(self, texts: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """CSR-style layout: feature indices, per-entry values (L2-normalized rows) and row offsets."""
+        rows = [hash_text_features(text, self.feature_count) for text in texts]
+        row_offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        row_offsets[1:] = np.cumsum([len(row) for row in rows])
+        feature_indices = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+        feature_values = np.concatenate([np.full(len(row), 1 / np.sqrt(len(row)), dtype=np.float32) for row in rows]) \
+            if rows else np.zeros(0, dtype=np.float32)
+        return feature_indices, feature_values, row_offsets
+
+    def _logits(self, feature_indices: np.ndarray, feature_values: np.ndarray, row_offsets: np.ndarray) -> np.ndarray:
+        weighted_features = self.weights[feature_indices] * feature_values[:, None]
+        return np.add.reduceat(weighted_features, row_offsets[:-1], axis=0) + self.bias
+
+    def fit(self, texts: List[str], target_scores: np.ndarray, epochs: int = 30,
+            learning_rate: float = 0.5, l2_penalty: float = 1e-6) -> None:
+        feature_indices, feature_values, row_offsets = self._featurize(texts)
+        row_of_entry = np.repeat(np.arange(len(texts)), np.diff(row_offsets))
+        self.seen_features[feature_indices] = True
+        # Adagrad over full-batch gradients: sparse features with very different frequencies.
+        weight_history = np.full_like(self.weights, 1e-8)
+        bias_history = np.full_like(self.bias, 1e-8)
+        for _ in range(epochs):
+            prediction_errors = (1 / (1 + np.exp(-self._logits(feature_indices, feature_values, row_offsets)))
+                                 - target_scores) / len(texts)
+            weight_gradient = np.zeros_like(self.weights)
+            np.add.at(weight_gradient, feature_indices, prediction_errors[row_of_entry] * feature_values[:, None])
+            weight_gradient += l2_penalty * self.weights
+            bias_gradient = prediction_errors.sum(axis=0)
+            weight_history += weight_gradient ** 2
+            bias_history += bias_gradient ** 2
+            self.weights -= learning_rate * weight_gradient / np.sqrt(weight_history)
+            self.bias -= learning_rate * bias_gradient / np.sqrt(bias_history)
+
+    def predict(self, texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (scores per text and topic, fraction of each text's features seen in training)."""
+        if not texts:
+            return np.zeros((0, len(self.topics)), dtype=np.float32), np.zeros(0)
+        feature_indices, feature_values, row_offsets = self._featurize(texts)
+        scores = 1 / (1 + np.exp(-self._logits(feature_indices, feature_values, row_offsets)))
+        feature_coverage = np.add.reduceat(self.seen_features[feature_indices].astype(np.float32), row_offsets[:-1]) \
+            / np.diff(row_offsets)
+        return scores, feature_coverage
+
+    def save(self, scorer_path: str) -> None:
+        os.makedirs(os.path.dirname(scorer_path), exist_ok=True)
+        np.savez_compressed(scorer_path, weights=self.weights, bias=self.bias,
+                            seen_features=np.packbits(self.seen_features), topics=json.dumps(self.topics))
+
+    @classmethod
+    def load(cls, scorer_path: str) -> "HashedLinearScorer":
+        with np.load(scorer_path) as stored_scorer:
+            scorer = cls(json.loads(str(stored_scorer['topics'])), stored_scorer['weights'].shape[0])
+            scorer.weights = stored_scorer['weights']
+            scorer.bias = stored_scorer['bias']
+            scorer.seen_features = np.unpackbits(stored_scorer['seen_features'])[:scorer.feature_count].astype(bool)
+        return scorer
+
+
+def cascade_scorer_path(model_path: str, topics: List[str]) -> str:
+    topics_digest = hashlib.sha256("\n".join(topics).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(model_path, CASCADE_DIRECTORY, f"{topics_digest}.npz")
+
+
+class CascadeGate:
+    """First stage in front of the full model: answers confident texts, escalates the rest.
+
+    A text is answered by the cheap scorer when its features were all seen in training
+    (CASCADE_MIN_FEATURE_COVERAGE) and its top predicted score is clearly low (no topical
+    signal, CASCADE_LOW_THRESHOLD) or clearly high (CASCADE_HIGH_THRESHOLD).
+    """
+
+    def __init__(self, scorer: HashedLinearScorer, low_threshold: float = None, high_threshold: float = None,
+                 min_feature_coverage: float = None):
+        self.scorer = scorer
+        self.low_threshold = low_threshold if low_threshold is not None else \
+            float(os.environ.get('CASCADE_LOW_THRESHOLD', DEFAULT_LOW_THRESHOLD))
+        self.high_threshold = high_threshold if high_threshold is not None else \
+            float(os.environ.get('CASCADE_HIGH_THRESHOLD', DEFAULT_HIGH_THRESHOLD))
+        self.min_feature_coverage = min_feature_coverage if min_feature_coverage is not None else \
+            float(os.environ.get('CASCADE_MIN_FEATURE_COVERAGE', DEFAULT_MIN_FEATURE_COVERAGE))
+        self.answered_count = 0
+        self.escalated_count = 0
+
+    def confident_mask(self, scores: np.ndarray, feature_coverage: np.ndarray) -> np.ndarray:
+        top_scores = scores.max(axis=1) if scores.size else np.zeros(0)
+        return (feature_coverage >= self.min_feature_coverage) & (
+            (top_scores <= self.low_threshold) | (top_scores >= self.high_threshold)
+        )
+
+    def route(self, texts: List[str], classify_uncertain: Callable[[List[str]], List[Dict[str, float]]]) -> List[Dict[str, float]]:
+        scores, feature_coverage = self.scorer.predict(texts)
+        confident = self.confident_mask(scores, feature_coverage)
+        batch_results: List[Optional[Dict[str, float]]] = [
+            dict(zip(self.scorer.topics, text_scores.tolist())) if is_confident else None
+            for text_scores, is_confident in zip(scores, confident)
+        ]
+        uncertain_indices = [text_index for text_index, is_confident in enumerate(confident) if not is_confident]
+        if uncertain_indices:
+            uncertain_scores = classify_uncertain([texts[text_index] for text_index in uncertain_indices])
+            for text_index, topic_scores in zip(uncertain_indices, uncertain_scores):
+                batch_results[text_index] = topic_scores
+        self.answered_count += len(texts) - len(uncertain_indices)
+        self.escalated_count += len(uncertain_indices)
+        return batch_results
+
+    @property
+    def answered_fraction(self) -> float:
+        routed_total = self.answered_count + self.escalated_count
+        return self.answered_count / routed_total if routed_total else 0.0
+
+    def summary(self) -> str:
+        return (f"Cascade: {self.answered_count}/{self.answered_count + self.escalated_count} texts answered by the "
+                f"hashed linear stage ({self.answered_fraction:.1%}), {self.escalated_count} sent to the full model")
+
+
+def load_cascade_gate(topics: List[str], model_path: str) -> Optional[CascadeGate]:
+    """Return the trained gate for these topics, or None when cascade is disabled or not trained yet."""
+    if os.environ.get('CASCADE', '1') == '0':
+        return None
+    scorer_path = cascade_scorer_path(model_path, topics)
+    if not os.path.exists(scorer_path):
+        return None
+    logger.info(f"Loading cascade scorer from {scorer_path}")
+    return CascadeGate(HashedLinearScorer.load(scorer_path))
+
+
+def load_historical_scores(connection, topics: List[str], scoring_key: str) -> Tuple[List[str], np.ndarray]:
+    """Texts the full model scored for every topic, read from the classification cache.
+
+    Only model output reaches the cache (cascade answers never do), so the stage is not
+    trained on its own predictions. Only scores of the exact scoring_key are used, so the
+    stage learns the scorer it stands in for, not a mix of backends and precisions.
+    """
+    topic_placeholders = ", ".join(["?"] * len(topics))
+    query_results = connection.execute(f"""
+        SELECT texts.content, classification_cache.topic, classification_cache.score
+        FROM classification_cache
+        JOIN texts ON texts.id = classification_cache.text_id
+        WHERE classification_cache.scorer_key = ?
+        AND classification_cache.topic IN ({topic_placeholders})
+    """, [scoring_key, *topics]).fetchall()
+    scores_by_text: Dict[str, Dict[str, float]] = {}
+    for text_content, topic, score in query_results:
+        scores_by_text.setdefault(text_content, {})[topic] = score
+    texts = [text for text, topic_scores in scores_by_text.items() if all(topic in topic_scores for topic in topics)]
+    target_scores = np.array([[scores_by_text[text][topic] for topic in topics] for text in texts], dtype=np.float32) \
+        .reshape(len(texts), len(topics))
+    return texts, target_scores
+
+
+def train_cascade(topics: List[str], model_path: str, connection, scoring_key: str, validation_fraction: float = 0.1,
+                  feature_count: int = DEFAULT_HASH_FEATURE_COUNT, seed: int = 0) -> Dict:
+    """Fit the hashed linear stage on cached scores of scoring_key, report held-out quality at the configured thresholds, and save it."""
+    texts, target_scores = load_historical_scores(connection, topics, scoring_key)
+    if len(texts) < 10:
+        raise ValueError(f"Need at least 10 link texts scored by the full model in the classification cache "
+                         f"to train the cascade, found {len(texts)}")
+
+    shuffled_indices = np.random.default_rng(seed).permutation(len(texts))
+    validation_count = max(1, int(len(texts) * validation_fraction))
+    validation_indices, training_indices = shuffled_indices[:validation_count], shuffled_indices[validation_count:]
+
+    scorer = HashedLinearScorer(topics, feature_count)
+    scorer.fit([texts[i] for i in training_indices], target_scores[training_indices])
+    validation_scores, validation_coverage = scorer.predict([texts[i] for i in validation_indices])
+    absolute_errors = np.abs(validation_scores - target_scores[validation_indices]).mean(axis=1)
+    answered = CascadeGate(scorer).confident_mask(validation_scores, validation_coverage)
+
+    # Refit on everything before saving, so all known texts count as seen.
+    scorer = HashedLinearScorer(topics, feature_count)
+    scorer.fit(texts, target_scores)
+    scorer_path = cascade_scorer_path(model_path, topics)
+    scorer.save(scorer_path)
+    training_report = {
+        'scorer_path': scorer_path,
+        'training_texts': len(texts),
+        'validation_texts': int(validation_count),
+        'validation_mae': float(absolute_errors.mean()),
+        'validation_answered_fraction': float(answered.mean()),
+        'validation_answered_mae': float(absolute_errors[answered].mean()) if answered.any() else None,
+    }
+    logger.info(f"Cascade trained: {training_report}")
+    return training_report
+
+
+if __name__ == "__main__":
+    import sys
+    from ..database import get_db_manager
+    from .classifier_factory import create_topic_classifier
+    from .download_model import get_model_manager
+    from .inference_client import fetch_server_info
+    from .link_processor import DEFAULT_TOPIC_CATEGORIES
+
+    cascade_topics = [*DEFAULT_TOPIC_CATEGORIES, *sys.argv[1:]]
+    # Train on the scores of the classifier that classification would use, as LinkTopicClassifier picks it.
+    inference_server_url = os.environ.get('INFERENCE_SERVER_URL')
+    if inference_server_url:
+        server_info = fetch_server_info(inference_server_url)
+        model_manager, scoring_key = get_model_manager(server_info['model_name']), server_info['scoring_key']
+    else:
+        topic_classifier = create_topic_classifier(cascade_topics)
+        model_manager, scoring_key = topic_classifier.model_manager, topic_classifier.scoring_key
+    database_connection = get_db_manager().get_cursor()
+    try:
+        print(json.dumps(train_cascade(cascade_topics,
+                                       model_manager.get_model_path(),
+                                       database_connection,
+                                       scoring_key), indent=2))
+    finally:
+        database_connection.close()
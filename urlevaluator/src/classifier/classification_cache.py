@@ -0,0 +1,139 @@
+import os
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ..database import get_db_manager
+from ..database.text_store import compute_text_id, store_texts
+
+DEFAULT_MEMORY_CACHE_SIZE = 100_000
+
+
+def normalize_text_for_cache(text: str) -> str:
+    return " ".join(unicodedata.normalize('NFKC', text).split())
+
+
+class ClassificationCache:
+    """Topic scores keyed by normalized text, topic and scorer key.
+
+    The scorer key is the classifier's scoring_key: the model plus every setting that changes
+    its scores, so results from different backends never stand in for each other. Lookups go
+    to an in-process LRU first and then to the classification_cache table, so repeated anchor
+    texts ("Home", "Contact", ...) are scored once per scorer across runs. Normalized texts go
+    to the texts table too, so the cache doubles as the cascade's training set of full-model scores.
+    """
+
+    def __init__(self, db_name: str = None, max_memory_entries: int = None):
+        self.max_memory_entries = max_memory_entries or int(
+            os.environ.get('CLASSIFICATION_CACHE_SIZE', DEFAULT_MEMORY_CACHE_SIZE)
+        )
+        self.connection = get_db_manager(db_name).get_cursor()
+        self._memory_cache: "OrderedDict[Tuple[str, int], Dict[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+
+    def _remember(self, scorer_key: str, text_key: int, topic_scores: Dict[str, float]) -> None:
+        with self._lock:
+            cached_scores = self._memory_cache.setdefault((scorer_key, text_key), {})
+            cached_scores.update(topic_scores)
+            self._memory_cache.move_to_end((scorer_key, text_key))
+            while len(self._memory_cache) > self.max_memory_entries:
+                self._memory_cache.popitem(last=False)
+
+    def _lookup_memory(self, scorer_key: str, text_key: int, topics: List[str]) -> Optional[Dict[str, float]]:
+        with self._lock:
+            cached_scores = self._memory_cache.get((scorer_key, text_key))
+            if cached_scores is None or not all(topic in cached_scores for topic in topics):
+                return None
+            self._memory_cache.move_to_end((scorer_key, text_key))
+            return {topic: cached_scores[topic] for topic in topics}
+
+    def _lookup_persistent(self, scorer_key: str, text_keys: List[int], topics: List[str]) -> Dict[int, Dict[str, float]]:
+        if not text_keys:
+            return {}
+        text_placeholders = ", ".join(["?"] * len(text_keys))
+        topic_placeholders = ", ".join(["?"] * len(topics))
+        query_results = self.connection.execute(f"""
+            SELECT text_id, topic, score
+            FROM classification_cache
+            WHERE scorer_key = ?
+            AND text_id IN ({text_placeholders})
+            AND topic IN ({topic_placeholders})
+        """, [scorer_key, *text_keys, *topics]).fetchall()
+        persistent_scores: Dict[int, Dict[str, float]] = {}
+        for text_key, topic, score in query_results:
+            persistent_scores.setdefault(text_key, {})[topic] = score
+        return persistent_scores
+
+    def get_many(self, scorer_key: str, texts: List[str], topics: List[str]) -> List[Optional[Dict[str, float]]]:
+        """Return cached scores per text, or None where any topic is missing."""
+        text_keys = [compute_text_id(normalize_text_for_cache(text)) for text in texts]
+        cached_results: List[Optional[Dict[str, float]]] = [
+            self._lookup_memory(scorer_key, text_key, topics) for text_key in text_keys
+        ]
+        self.memory_hits += sum(result is not None for result in cached_results)
+
+        unresolved_keys = list({text_key for text_key, result in zip(text_keys, cached_results) if result is None})
+        persistent_scores = self._lookup_persistent(scorer_key, unresolved_keys, topics)
+        for text_index, text_key in enumerate(text_keys):
+            if cached_results[text_index] is not None:
+                continue
+            stored_scores = persistent_scores.get(text_key, {})
+            if all(topic in stored_scores for topic in topics):
+                self._remember(scorer_key, text_key, stored_scores)
+                cached_results[text_index] = {topic: stored_scores[topic] for topic in topics}
+                self.persistent_hits += 1
+            else:
+                self.misses += 1
+        return cached_results
+
+    def put_many(self, scorer_key: str, texts: List[str], topic_scores: List[Dict[str, float]]) -> None:
+        rows = {}
+        normalized_texts = [normalize_text_for_cache(text) for text in texts]
+        for normalized_text, scores in zip(normalized_texts, topic_scores):
+            text_key = compute_text_id(normalized_text)
+            self._remember(scorer_key, text_key, scores)
+            for topic, score in scores.items():
+                rows[(text_key, topic)] = score
+        if not rows:
+            return
+        store_texts(self.connection, normalized_texts)
+        placeholders = ", ".join(["(?, ?, ?, ?)"] * len(rows))
+        params = [value for (text_key, topic), score in rows.items() for value in (text_key, topic, scorer_key, score)]
+        self.connection.execute(
+            f"INSERT OR IGNORE INTO classification_cache (text_id, topic, scorer_key, score) VALUES {placeholders}",
+            params
+        )
+
+    def resolve(self, scorer_key: str, texts: List[str], topics: List[str],
+                infer_batch: Callable[[List[str]], List[Dict[str, float]]]) -> List[Dict[str, float]]:
+        """Return scores for every text, running infer_batch only on the cache misses and storing its results."""
+        batch_results = self.get_many(scorer_key, texts, topics)
+        uncached_indices = [text_index for text_index, cached_scores in enumerate(batch_results) if cached_scores is None]
+        if uncached_indices:
+            uncached_texts = [texts[text_index] for text_index in uncached_indices]
+            inferred_scores = infer_batch(uncached_texts)
+            self.put_many(scorer_key, uncached_texts, inferred_scores)
+            for text_index, topic_scores in zip(uncached_indices, inferred_scores):
+                batch_results[text_index] = topic_scores
+        return batch_results
+
+    @property
+    def lookups(self) -> int:
+        return self.memory_hits + self.persistent_hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        return (self.memory_hits + self.persistent_hits) / self.lookups if self.lookups else 0.0
+
+    def summary(self) -> str:
+        return (f"Classification cache: {self.memory_hits + self.persistent_hits}/{self.lookups} hits "
+                f"({self.hit_rate:.1%}; memory {self.memory_hits}, persistent {self.persistent_hits})")
+
+    def close(self) -> None:
+        if self.connection:
+            self.connection.close()
+            self.connection = None
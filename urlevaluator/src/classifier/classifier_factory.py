@@ -0,0 +1,12 @@
+from typing import List
+
+from .download_model import get_model_manager, EMBEDDING_CLASSIFIER_MODE
+from .embedding_classifier import EmbeddingTopicClassifier
+from .topic_classifier import TopicClassifier
+
+
+def create_topic_classifier(topics: List[str], model_name: str = None, **classifier_options) -> TopicClassifier:
+    """Build the classifier matching the model's mode (CLASSIFIER_MODE, or inferred from MODEL_NAME)."""
+    if get_model_manager(model_name).classifier_mode == EMBEDDING_CLASSIFIER_MODE:
+        return EmbeddingTopicClassifier(topics, model_name, **classifier_options)
+    return TopicClassifier(topics, model_name, **classifier_options)
@@ -1,9 +1,22 @@
 from typing import Optional
+import inspect
 import os
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
+import torch
+from transformers import AutoTokenizer, AutoModel, AutoModelForSequenceClassification
 
 from ..utils import logger
 
+NLI_CLASSIFIER_MODE = 'nli'
+EMBEDDING_CLASSIFIER_MODE = 'embedding'
+
+TORCH_BACKEND = 'torch'
+TORCH_INT8_BACKEND = 'torch-int8'
+ONNX_BACKEND = 'onnx'
+ONNX_INT8_BACKEND = 'onnx-int8'
+INFERENCE_BACKENDS = (TORCH_BACKEND, TORCH_INT8_BACKEND, ONNX_BACKEND, ONNX_INT8_BACKEND)
+ONNX_DIRECTORY = 'onnx'
+ONNX_OPSET_VERSION = 17
+
 class ModelManager:
     def __init__(self, model_name: str = None):
         self.model_name = model_name
@@ -11,6 +24,15 @@ class ModelManager:
             self.model_name = os.environ.get('MODEL_NAME', 'facebook/bart-large-mnli')
         os.makedirs('resources', exist_ok=True)
         self.model_path = os.path.join('resources', self.model_name)
+        self.classifier_mode = os.environ.get('CLASSIFIER_MODE') or self._infer_classifier_mode()
+        self.inference_backend = os.environ.get('INFERENCE_BACKEND', TORCH_BACKEND)
+        if self.inference_backend not in INFERENCE_BACKENDS:
+            raise ValueError(f"Unknown INFERENCE_BACKEND '{self.inference_backend}', expected one of {INFERENCE_BACKENDS}")
+
+    def _infer_classifier_mode(self) -> str:
+        if self.model_name.startswith('sentence-transformers/'):
+            return EMBEDDING_CLASSIFIER_MODE
+        return NLI_CLASSIFIER_MODE
 
     def get_model_path(self) -> str:
         return self.model_path
@@ -19,9 +41,60 @@ class ModelManager:
         logger.info(f"Downloading model and tokenizer: {self.model_name}")
         os.makedirs(self.model_path, exist_ok=True)
         AutoTokenizer.from_pretrained(self.model_name).save_pretrained(self.model_path)
-        AutoModelForSequenceClassification.from_pretrained(self.model_name).save_pretrained(self.model_path)
+        model_class = AutoModel if self.classifier_mode == EMBEDDING_CLASSIFIER_MODE else AutoModelForSequenceClassification
+        model_class.from_pretrained(self.model_name).save_pretrained(self.model_path)
         logger.info("Model and tokenizer successfully downloaded and cached")
 
+    def get_onnx_model_path(self, quantized: bool = False) -> str:
+        file_name = 'model.int8.onnx' if quantized else 'model.onnx'
+        return os.path.join(self.model_path, ONNX_DIRECTORY, file_name)
+
+    def export_onnx(self) -> str:
+        """Export the sequence-classification model to ONNX with dynamic batch and sequence axes."""
+        onnx_model_path = self.get_onnx_model_path()
+        logger.info(f"Exporting {self.model_name} to ONNX: {onnx_model_path}")
+        os.makedirs(os.path.dirname(onnx_model_path), exist_ok=True)
+        tokenizer = AutoTokenizer.from_pretrained(self.model_path)
+        model = AutoModelForSequenceClassification.from_pretrained(self.model_path).eval()
+        sample_inputs = tokenizer(["Example premise"], ["This text is about example"], return_tensors="pt")
+        # Positional export arguments must follow the order of forward()'s parameters.
+        input_names = [parameter for parameter in inspect.signature(model.forward).parameters if parameter in sample_inputs]
+        dynamic_axes = {input_name: {0: 'batch', 1: 'sequence'} for input_name in input_names}
+        dynamic_axes['logits'] = {0: 'batch'}
+        # Newer torch releases default to the dynamo exporter, which needs extra packages.
+        export_options = {'dynamo': False} if 'dynamo' in inspect.signature(torch.onnx.export).parameters else {}
+        with torch.no_grad():
+            torch.onnx.export(model,
+                              tuple(sample_inputs[input_name] for input_name in input_names),
+                              onnx_model_path,
+                              input_names=input_names,
+                              output_names=['logits'],
+                              dynamic_axes=dynamic_axes,
+                              opset_version=ONNX_OPSET_VERSION,
+                              **export_options)
+        return onnx_model_path
+
+    def quantize_onnx(self) -> str:
+        """Write an int8 dynamically quantized copy of the exported ONNX model."""
+        try:
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+        except ImportError as e:
+            raise ImportError("ONNX quantization requires onnxruntime: pip install 'urlevaluator[onnx]'") from e
+        onnx_model_path = self.get_onnx_model_path()
+        if not os.path.exists(onnx_model_path):
+            self.export_onnx()
+        quantized_model_path = self.get_onnx_model_path(quantized=True)
+        logger.info(f"Quantizing ONNX model to int8: {quantized_model_path}")
+        quantize_dynamic(onnx_model_path, quantized_model_path, weight_type=QuantType.QInt8)
+        return quantized_model_path
+
+    def prepare_onnx_model(self, quantized: bool = False) -> str:
+        """Return the ONNX model path, exporting (and quantizing) it on first use."""
+        onnx_model_path = self.get_onnx_model_path(quantized)
+        if os.path.exists(onnx_model_path):
+            return onnx_model_path
+        return self.quantize_onnx() if quantized else self.export_onnx()
+
     def download_model(self) -> None:
         logger.info(f"Starting model download: {self.model_name}")
         if os.path.exists(self.model_path):
@@ -0,0 +1,92 @@
+import hashlib
+import os
+from typing import Dict, List
+
+import torch
+from transformers import AutoTokenizer, AutoModel
+
+from ..utils import logger
+from .download_model import EMBEDDING_CLASSIFIER_MODE, TORCH_BACKEND
+from .topic_classifier import TopicClassifier, pack_by_token_budget
+
+DEFAULT_SCORE_CENTER = 0.3
+DEFAULT_SCORE_SCALE = 10.0
+TOPIC_EMBEDDINGS_DIRECTORY = 'topic_embeddings'
+
+
+class EmbeddingTopicClassifier(TopicClassifier):
+    """Zero-shot topic scores from sentence embeddings instead of NLI.
+
+    Each topic description is encoded once (and cached next to the model), each text is
+    encoded once, and scores are the cosine similarity passed through a sigmoid
+    calibration. Cost grows with the number of texts, not texts x topics.
+    """
+    classifier_mode = EMBEDDING_CLASSIFIER_MODE
+
+    def __init__(self, topics, model_name=None, max_tokens_per_batch: int = None, cache=None, inference_backend: str = None,
+                 cascade=None, precision: str = None):
+        self.score_center = float(os.environ.get('EMBEDDING_SCORE_CENTER', DEFAULT_SCORE_CENTER))
+        self.score_scale = float(os.environ.get('EMBEDDING_SCORE_SCALE', DEFAULT_SCORE_SCALE))
+        super().__init__(topics, model_name, max_tokens_per_batch, cache, inference_backend, cascade, precision)
+        self.topic_embeddings = self._load_topic_embeddings()
+
+    @property
+    def scoring_key(self) -> str:
+        # Calibrated scores change with the calibration, so cached ones only hold for the same parameters.
+        return f"{super().scoring_key}:center={self.score_center}:scale={self.score_scale}"
+
+    def _load_model(self, model_path: str) -> None:
+        if self.inference_backend != TORCH_BACKEND:
+            logger.warning(f"Inference backend '{self.inference_backend}' is not supported in embedding mode, using torch")
+            self.inference_backend = TORCH_BACKEND
+        self.tokenizer = AutoTokenizer.from_pretrained(model_path)
+        self.model = AutoModel.from_pretrained(model_path).to(self.device)
+
+    def _encode(self, texts: List[str]) -> torch.Tensor:
+        """Mean-pooled, L2-normalized embeddings, computed in length-sorted batches."""
+        token_lengths = [len(input_ids) for input_ids in self.tokenizer(texts, truncation=True, max_length=512)['input_ids']]
+        embeddings: List[torch.Tensor] = [None] * len(texts)
+        for text_indices in pack_by_token_budget(token_lengths, self.max_tokens_per_batch):
+            inputs = self.tokenizer([texts[text_index] for text_index in text_indices],
+                                    truncation=True,
+                                    max_length=512,
+                                    return_tensors="pt",
+                                    padding=True).to(self.device)
+            with self._inference_context():
+                token_embeddings = self.model(**inputs).last_hidden_state.float()
+            attention_mask = inputs['attention_mask'].unsqueeze(-1).to(token_embeddings.dtype)
+            pooled = (token_embeddings * attention_mask).sum(dim=1) / attention_mask.sum(dim=1).clamp(min=1e-9)
+            for text_index, embedding in zip(text_indices, torch.nn.functional.normalize(pooled, dim=-1)):
+                embeddings[text_index] = embedding
+        return torch.stack(embeddings)
+
+    def _topic_embeddings_path(self) -> str:
+        descriptions_digest = hashlib.sha256("\n".join(self._topic_hypotheses()).encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.model_manager.get_model_path(), TOPIC_EMBEDDINGS_DIRECTORY, f"{descriptions_digest}.pt")
+
+    def _load_topic_embeddings(self) -> torch.Tensor:
+        embeddings_path = self._topic_embeddings_path()
+        if os.path.exists(embeddings_path):
+            logger.info(f"Loading cached topic embeddings from {embeddings_path}")
+            return torch.load(embeddings_path).to(self.device)
+        topic_embeddings = self._encode(self._topic_hypotheses())
+        os.makedirs(os.path.dirname(embeddings_path), exist_ok=True)
+        torch.save(topic_embeddings.cpu(), embeddings_path)
+        return topic_embeddings
+
+    def with_topics(self, topics: List[str]) -> "EmbeddingTopicClassifier":
+        topic_classifier = super().with_topics(topics)
+        topic_classifier.topic_embeddings = topic_classifier._load_topic_embeddings()
+        return topic_classifier
+
+    def _calibrate(self, cosine_similarities: torch.Tensor) -> torch.Tensor:
+        return torch.sigmoid((cosine_similarities - self.score_center) * self.score_scale)
+
+    def _infer_batch(self, texts: List[str]) -> List[Dict[str, float]]:
+        if not texts:
+            return []
+        topic_scores = self._calibrate(self._encode(texts) @ self.topic_embeddings.T)
+        return [dict(zip(self.topics, text_scores)) for text_scores in topic_scores.tolist()]
+
+    def classify_text(self, text: str) -> Dict[str, float]:
+        return self.classify_batch([text])[0]
@@ -0,0 +1,50 @@
+from typing import Dict, List, Optional
+
+import requests
+
+from .cascade import CascadeGate
+from .classification_cache import ClassificationCache
+from .topic_classifier import BatchClassificationMixin
+
+DEFAULT_CLIENT_TIMEOUT_SECONDS = 300
+
+
+def fetch_server_info(server_url: str, timeout_seconds: float = 10) -> Dict:
+    response = requests.get(f"{server_url.rstrip('/')}/health", timeout=timeout_seconds)
+    response.raise_for_status()
+    return response.json()
+
+
+class RemoteTopicClassifier(BatchClassificationMixin):
+    """Drop-in TopicClassifier backend that sends inference to a running inference server.
+
+    The cascade stage and the classification cache still run in this process, so only texts
+    that really need the model cross the socket, and the database stays local. Cached scores
+    are keyed on the server's scoring_key, fetched from /health unless given.
+    """
+
+    def __init__(self, server_url: str, topics: List[str], cache: Optional[ClassificationCache] = None,
+                 cascade: Optional[CascadeGate] = None, timeout_seconds: float = DEFAULT_CLIENT_TIMEOUT_SECONDS,
+                 scoring_key: str = None):
+        self.server_url = server_url.rstrip('/')
+        self.topics = topics
+        self.scoring_key = scoring_key or (fetch_server_info(self.server_url)['scoring_key'] if cache else None)
+        self.cache = cache
+        self.cascade = cascade
+        self.timeout_seconds = timeout_seconds
+        self._session = requests.Session()
+
+    def _infer_batch(self, texts: List[str]) -> List[Dict[str, float]]:
+        if not texts:
+            return []
+        response = self._session.post(f"{self.server_url}/classify", json={'texts': texts, 'topics': self.topics},
+                                      timeout=self.timeout_seconds)
+        if response.status_code != 200:
+            raise RuntimeError(f"Inference server returned {response.status_code}: {response.text}")
+        return response.json()['scores']
+
+    def classify_text(self, text: str) -> Dict[str, float]:
+        return self.classify_batch([text])[0]
+
+    def close(self) -> None:
+        self._session.close()
@@ -0,0 +1,205 @@
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+from ..utils import logger
+from ..utils.metrics import QUEUE_DEPTH, metrics, start_metrics_export
+from .topic_classifier import TopicClassifier
+
+DEFAULT_SERVER_HOST = '127.0.0.1'
+DEFAULT_SERVER_PORT = 8008
+DEFAULT_MAX_BATCH_TEXTS = 256
+DEFAULT_MAX_BATCH_WAIT_MS = 10
+SERVER_BATCH_TEXTS = metrics.histogram('inference_server_batch_texts', 'Texts per coalesced server batch',
+                                       buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024))
+SERVER_REQUEST_SECONDS = metrics.histogram('inference_server_request_seconds', 'Time from enqueue to result per request')
+
+
+class InferenceRequest:
+    def __init__(self, texts: List[str], topics: Tuple[str, ...]):
+        self.texts = texts
+        self.topics = topics
+        self.scores: Optional[List[Dict[str, float]]] = None
+        self.error: Optional[Exception] = None
+        self.completed = threading.Event()
+
+
+class DynamicBatcher:
+    """Coalesce concurrent classification requests into shared model batches.
+
+    Requests queue up while the model is busy; the batching thread then takes everything that
+    arrives within max_batch_wait_ms (up to max_batch_texts texts), runs one _infer_batch per
+    topic set, and hands each request its slice of the results. Only this thread touches the model.
+    """
+
+    def __init__(self, topic_classifier: TopicClassifier, max_batch_texts: int = None, max_batch_wait_ms: float = None):
+        self.topic_classifier = topic_classifier
+        self.max_batch_texts = max_batch_texts or int(os.environ.get('SERVER_MAX_BATCH_TEXTS', DEFAULT_MAX_BATCH_TEXTS))
+        self.max_batch_wait_seconds = (max_batch_wait_ms if max_batch_wait_ms is not None else
+                                       float(os.environ.get('SERVER_MAX_BATCH_WAIT_MS', DEFAULT_MAX_BATCH_WAIT_MS))) / 1000
+        self._requests: "queue.Queue[Optional[InferenceRequest]]" = queue.Queue()
+        self._classifiers_by_topics: Dict[Tuple[str, ...], TopicClassifier] = {tuple(topic_classifier.topics): topic_classifier}
+        self.batches_run = 0
+        self.requests_served = 0
+        self._queue_depth = QUEUE_DEPTH.labels('server_requests')
+        self._thread = threading.Thread(target=self._run, name="dynamic-batcher", daemon=True)
+        self._thread.start()
+
+    def classify(self, texts: List[str], topics: List[str]) -> List[Dict[str, float]]:
+        inference_request = InferenceRequest(texts, tuple(topics))
+        with SERVER_REQUEST_SECONDS.time():
+            self._requests.put(inference_request)
+            inference_request.completed.wait()
+        if inference_request.error:
+            raise inference_request.error
+        return inference_request.scores
+
+    def _collect_batch(self, first_request: InferenceRequest) -> List[InferenceRequest]:
+        batch_requests = [first_request]
+        batch_texts = len(first_request.texts)
+        deadline = time.monotonic() + self.max_batch_wait_seconds
+        while batch_texts < self.max_batch_texts:
+            try:
+                inference_request = self._requests.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if inference_request is None:
+                self._requests.put(None)
+                break
+            batch_requests.append(inference_request)
+            batch_texts += len(inference_request.texts)
+        return batch_requests
+
+    def _classifier_for(self, topics: Tuple[str, ...]) -> TopicClassifier:
+        if topics not in self._classifiers_by_topics:
+            self._classifiers_by_topics[topics] = self.topic_classifier.with_topics(list(topics))
+        return self._classifiers_by_topics[topics]
+
+    def _run_batch(self, batch_requests: List[InferenceRequest]) -> None:
+        self._queue_depth.set(self._requests.qsize())
+        SERVER_BATCH_TEXTS.observe(sum(len(inference_request.texts) for inference_request in batch_requests))
+        requests_by_topics: Dict[Tuple[str, ...], List[InferenceRequest]] = defaultdict(list)
+        for inference_request in batch_requests:
+            requests_by_topics[inference_request.topics].append(inference_request)
+        for topics, topic_requests in requests_by_topics.items():
+            try:
+                batch_scores = self._classifier_for(topics)._infer_batch(
+                    [text for inference_request in topic_requests for text in inference_request.texts]
+                )
+                offset = 0
+                for inference_request in topic_requests:
+                    inference_request.scores = batch_scores[offset:offset + len(inference_request.texts)]
+                    offset += len(inference_request.texts)
+            except Exception as inference_error:
+                logger.error(f"Batch inference failed: {inference_error}")
+                for inference_request in topic_requests:
+                    inference_request.error = inference_error
+            finally:
+                for inference_request in topic_requests:
+                    inference_request.completed.set()
+        self.batches_run += 1
+        self.requests_served += len(batch_requests)
+
+    def _run(self) -> None:
+        while True:
+            first_request = self._requests.get()
+            if first_request is None:
+                return
+            self._run_batch(self._collect_batch(first_request))
+
+    def close(self) -> None:
+        self._requests.put(None)
+        self._thread.join()
+
+
+class InferenceRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "InferenceServer"
+
+    def _send_json(self, status_code: int, payload: Dict) -> None:
+        response_body = json.dumps(payload).encode('utf-8')
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(response_body)))
+        self.end_headers()
+        self.wfile.write(response_body)
+
+    def do_GET(self) -> None:
+        if self.path != '/health':
+            self._send_json(404, {'error': f"Unknown path {self.path}"})
+            return
+        self._send_json(200, self.server.describe())
+
+    def do_POST(self) -> None:
+        if self.path != '/classify':
+            self._send_json(404, {'error': f"Unknown path {self.path}"})
+            return
+        try:
+            request_payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            texts, topics = request_payload['texts'], request_payload['topics']
+        except (ValueError, KeyError) as request_error:
+            self._send_json(400, {'error': f"Invalid request: {request_error}"})
+            return
+        try:
+            self._send_json(200, {'scores': self.server.batcher.classify(texts, topics)})
+        except Exception as inference_error:
+            self._send_json(500, {'error': str(inference_error)})
+
+    def log_message(self, format, *args) -> None:
+        logger.debug(f"{self.address_string()} {format % args}")
+
+
+class InferenceServer(ThreadingHTTPServer):
+    """Localhost HTTP server that keeps one model warm for many short classification runs."""
+
+    daemon_threads = True
+
+    def __init__(self, topic_classifier: TopicClassifier, host: str = DEFAULT_SERVER_HOST, port: int = DEFAULT_SERVER_PORT,
+                 batcher: DynamicBatcher = None):
+        self.topic_classifier = topic_classifier
+        self.batcher = batcher or DynamicBatcher(topic_classifier)
+        super().__init__((host, port), InferenceRequestHandler)
+
+    def describe(self) -> Dict:
+        return {
+            'model_name': self.topic_classifier.model_manager.model_name,
+            'classifier_mode': self.topic_classifier.model_manager.classifier_mode,
+            'inference_backend': self.topic_classifier.inference_backend,
+            'scoring_key': self.topic_classifier.scoring_key,
+            'batches_run': self.batcher.batches_run,
+            'requests_served': self.batcher.requests_served,
+        }
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.batcher.close()
+
+
+def serve(host: str = DEFAULT_SERVER_HOST, port: int = DEFAULT_SERVER_PORT) -> None:
+    from .classifier_factory import create_topic_classifier
+    from .link_processor import DEFAULT_TOPIC_CATEGORIES
+
+    start_metrics_export()
+    inference_server = InferenceServer(create_topic_classifier(DEFAULT_TOPIC_CATEGORIES), host, port)
+    logger.info(f"Inference server for {inference_server.topic_classifier.model_manager.model_name} "
+                f"listening on http://{host}:{inference_server.server_address[1]}")
+    try:
+        inference_server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Inference server stopping")
+    finally:
+        inference_server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve topic classification from a warm model over localhost HTTP")
+    parser.add_argument('--host', default=DEFAULT_SERVER_HOST)
+    parser.add_argument('--port', type=int, default=int(os.environ.get('INFERENCE_SERVER_PORT', DEFAULT_SERVER_PORT)))
+    arguments = parser.parse_args()
+    serve(arguments.host, arguments.port)
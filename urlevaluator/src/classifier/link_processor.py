@@ -1,61 +1,238 @@
+import os
+import time
+from collections import defaultdict
+
 from tqdm.auto import tqdm
 from typing import Optional, List, Tuple, Dict
 
-from ..database import QueueManager
-from ..utils import logger
-from .topic_classifier import TopicClassifier
+from ..database import ClassificationWriter, PrefetchingBatchReader, QueueManager
+from ..utils import logger, rate_limited
+from ..utils.metrics import metrics
+from .autotune import DEFAULT_AUTOTUNE_SAMPLE_TEXTS, load_or_autotune
+from .cascade import load_cascade_gate
+from .classification_cache import ClassificationCache
+from .download_model import get_model_manager
+from .inference_client import RemoteTopicClassifier, fetch_server_info
+from .classifier_factory import create_topic_classifier
+from .worker_pool import InferenceWorkerPool
 
 DEFAULT_TOPIC_CATEGORIES = ["technology", "sports", "politics", "entertainment", "science"]
-LINK_CLASSIFICATION_BATCH_SIZE = 12
+LINK_CLASSIFICATION_BATCH_SIZE = 128
+DEFAULT_PREFETCH_BATCHES = 2
+LINKS_CLASSIFIED = metrics.counter('links_classified_total', 'Links whose topic scores were written')
+LINKS_PER_SECOND = metrics.gauge('classification_links_per_second', 'Links classified per second over the current pass')
+LINK_BATCH_SECONDS = metrics.histogram('classification_link_batch_seconds', 'Classification time per link batch (cascade, cache and model)')
+PENDING_LINKS = metrics.gauge('classification_pending_links', 'Links waiting for classification at the start of the run')
 
 class LinkTopicClassifier:
-    def __init__(self, crawl_starting_url: str, additional_topic_categories: Optional[List[str]]):
+    """Classifies the pending links of a crawl run, by default the latest run of crawl_starting_url.
+
+    Without a starting URL or run (batch mode) no run is selected until classify_crawl_run;
+    autotuning and the worker pool wait for it, so they never sample an unrelated run.
+    """
+
+    def __init__(self, crawl_starting_url: Optional[str], additional_topic_categories: Optional[List[str]],
+                 crawl_run_id: Optional[int] = None):
         logger.info("Starting to initialize LinkTopicClassifier")
         self.all_topic_categories = [*DEFAULT_TOPIC_CATEGORIES, *(additional_topic_categories or [])]
-        self.classification_queue_manager = QueueManager(crawl_starting_url)
-        self.topic_classifier = TopicClassifier(self.all_topic_categories)
+        self.classification_queue_manager = QueueManager(crawl_starting_url, crawl_run_id=crawl_run_id)
+        inference_server_url = os.environ.get('INFERENCE_SERVER_URL')
+        server_info = fetch_server_info(inference_server_url) if inference_server_url else {}
+        # The cascade is per model, so follow the server's model when one is used.
+        model_manager = get_model_manager(server_info.get('model_name'))
+        self.classification_cache = ClassificationCache() if os.environ.get('CLASSIFICATION_CACHE', '1') != '0' else None
+        self.cascade_gate = load_cascade_gate(self.all_topic_categories, model_manager.get_model_path())
+        self.inference_pool = None
+        if inference_server_url:
+            logger.info(f"Using inference server at {inference_server_url} ({model_manager.model_name})")
+            self.topic_classifier = RemoteTopicClassifier(inference_server_url, self.all_topic_categories,
+                                                          cache=self.classification_cache, cascade=self.cascade_gate,
+                                                          scoring_key=server_info['scoring_key'])
+        else:
+            self.topic_classifier = create_topic_classifier(self.all_topic_categories, cache=self.classification_cache,
+                                                            cascade=self.cascade_gate)
+        self._use_batch_classifier(self.topic_classifier, LINK_CLASSIFICATION_BATCH_SIZE)
+        self._local_inference_prepared = bool(inference_server_url)
+        if self.classification_queue_manager.crawl_run_id is not None:
+            self._prepare_local_inference()
+        self._pending_classification_updates: List[Tuple[int, Dict[str, float]]] = []
+        self.prefetch_batches = int(os.environ.get('CLASSIFICATION_PREFETCH_BATCHES', DEFAULT_PREFETCH_BATCHES))
+        self._classification_writer: Optional[ClassificationWriter] = None
+
+    def _use_batch_classifier(self, batch_classifier, link_batch_size: int) -> None:
+        self.batch_classifier = batch_classifier
+        self._classifiers_by_topics = {tuple(self.all_topic_categories): batch_classifier}
+        self.link_batch_size = link_batch_size
+
+    def _prepare_local_inference(self) -> None:
+        """Autotune on the selected run's pending links, then start the worker pool (once)."""
+        if self._local_inference_prepared:
+            return
+        self._local_inference_prepared = True
+        link_batch_size = LINK_CLASSIFICATION_BATCH_SIZE
+        # Tune before the worker pool starts, so the spawned workers load the model with the tuned settings.
+        # Tuning runs torch here in the parent, which is why the workers must not be forked from it.
+        batch_settings = self._autotune_batching() if os.environ.get('AUTOTUNE_BATCHING', '0') != '0' else None
+        if batch_settings:
+            link_batch_size = batch_settings.link_batch_size
+        self.inference_pool = self._start_inference_pool(int(os.environ.get('INFERENCE_WORKERS', 1)))
+        if self.inference_pool:
+            self._use_batch_classifier(self.inference_pool, link_batch_size * self.inference_pool.worker_count)
+        else:
+            self.link_batch_size = link_batch_size
+
+    def _autotune_batching(self):
+        sample_size = int(os.environ.get('AUTOTUNE_SAMPLE_TEXTS', DEFAULT_AUTOTUNE_SAMPLE_TEXTS))
+        pending_sample = self.classification_queue_manager.fetch_pending_batch(sample_size, None, self.all_topic_categories)
+        return load_or_autotune(self.topic_classifier, [text for _, text, _ in pending_sample if text])
 
-    def _classify_single_link_content(self, link_database_id: int, text_content_to_classify: str) -> bool:
-        topic_classification_scores: Dict[str, float] = self.topic_classifier.classify_text(text_content_to_classify)
+    def _start_inference_pool(self, worker_count: int) -> Optional[InferenceWorkerPool]:
+        if worker_count <= 1:
+            return None
+        if self.topic_classifier.device.type != 'cpu':
+            logger.warning(f"INFERENCE_WORKERS={worker_count} ignored: worker processes are for CPU inference")
+            return None
+        return InferenceWorkerPool(self.topic_classifier, worker_count)
 
-        if topic_classification_scores:
-            self.classification_queue_manager.update_classification(link_database_id, topic_classification_scores)
-            return True
-        return False
+    def _classifier_for_topics(self, topics: Tuple[str, ...]):
+        """The batch classifier for a subset of the topic set; only the missing topics are computed."""
+        if topics not in self._classifiers_by_topics:
+            self._classifiers_by_topics[topics] = self.batch_classifier.with_topics(list(topics))
+        return self._classifiers_by_topics[topics]
+
+    def _classify_link_batch(self, link_classification_batch: List[Tuple[int, str, List[str]]]) -> int:
+        link_ids_by_topics: Dict[Tuple[str, ...], Dict[str, List[int]]] = defaultdict(lambda: defaultdict(list))
+        for link_database_id, text_content_to_classify, missing_topics in link_classification_batch:
+            # Links whose text row is missing (e.g. stored before the texts table) have nothing to classify.
+            if text_content_to_classify is None:
+                logger.debug("Skipping link %d: no stored text", link_database_id)
+                continue
+            link_ids_by_topics[tuple(missing_topics)][text_content_to_classify].append(link_database_id)
 
-    def _classify_link_batch(self, link_classification_batch: List[Tuple[int, str]]) -> int:
         successfully_classified_count = 0
-        for link_database_id, text_content_to_classify in tqdm(link_classification_batch, desc="Classifying link content"):
+        for missing_topics, link_ids_by_text in link_ids_by_topics.items():
+            for text_content_to_classify, topic_classification_scores in self._classify_texts(missing_topics, link_ids_by_text):
+                if topic_classification_scores:
+                    link_database_ids = link_ids_by_text[text_content_to_classify]
+                    self._pending_classification_updates.extend(
+                        (link_database_id, topic_classification_scores) for link_database_id in link_database_ids
+                    )
+                    successfully_classified_count += len(link_database_ids)
+        self._write_pending_classifications(link_classification_batch[-1][0])
+        return successfully_classified_count
+
+    def _classify_texts(self, topics: Tuple[str, ...],
+                        link_ids_by_text: Dict[str, List[int]]) -> List[Tuple[str, Optional[Dict[str, float]]]]:
+        """(text, scores) for each text that could be classified.
+
+        A failed batch is retried one text at a time, so a bad input only loses its own scores.
+        """
+        topic_classifier = self._classifier_for_topics(topics)
+        distinct_texts = list(link_ids_by_text)
+        try:
+            return list(zip(distinct_texts, topic_classifier.classify_batch(distinct_texts)))
+        except Exception as classification_error:
+            if len(distinct_texts) == 1:
+                self._log_classification_error(link_ids_by_text[distinct_texts[0]], classification_error)
+                return []
+            logger.warning("Batch of %d texts failed (%s), classifying them one at a time", len(distinct_texts),
+                           classification_error)
+        classified_texts = []
+        for text_content_to_classify in distinct_texts:
             try:
-                if self._classify_single_link_content(link_database_id, text_content_to_classify):
-                    successfully_classified_count += 1
+                classified_texts.append((text_content_to_classify, topic_classifier.classify_batch([text_content_to_classify])[0]))
             except Exception as classification_error:
-                logger.error(f"Error classifying link {link_database_id}: {str(classification_error)}")
-        return successfully_classified_count
+                self._log_classification_error(link_ids_by_text[text_content_to_classify], classification_error)
+        return classified_texts
+
+    @staticmethod
+    def _log_classification_error(link_database_ids: List[int], classification_error: Exception) -> None:
+        logger.error("Error classifying links %s: %s", link_database_ids, classification_error,
+                     extra=rate_limited(f"classification {type(classification_error).__name__}", "classification failures"))
+
+    def _write_pending_classifications(self, last_link_id: int) -> None:
+        pending_updates, self._pending_classification_updates = self._pending_classification_updates, []
+        if self._classification_writer:
+            self._classification_writer.submit(pending_updates, last_link_id)
+        else:
+            self.classification_queue_manager.update_classifications(pending_updates)
+
+    def classify_pending_links(self, last_processed_link_id: Optional[int] = None,
+                               classification_progress: Optional[tqdm] = None) -> Tuple[int, Optional[int]]:
+        """Classify every pending link after last_processed_link_id; return (links classified, last link id written).
+
+        Batches are read ahead on one thread and written back on another, each on its own
+        cursor, so inference never waits on DuckDB. The returned id only covers committed
+        batches, so it is safe to resume from.
+        """
+        self._prepare_local_inference()
+        links_classified = 0
+        pass_started = time.perf_counter()
+        batch_reader = PrefetchingBatchReader(self.classification_queue_manager.clone(), self.link_batch_size,
+                                              self.all_topic_categories, last_processed_link_id, self.prefetch_batches)
+        self._classification_writer = ClassificationWriter(self.classification_queue_manager.clone(), self.prefetch_batches)
+        pass_succeeded = False
+        try:
+            for link_classification_batch in batch_reader:
+                with LINK_BATCH_SECONDS.time():
+                    batch_links_classified = self._classify_link_batch(link_classification_batch)
+                links_classified += batch_links_classified
+                LINKS_CLASSIFIED.inc(batch_links_classified)
+                LINKS_PER_SECOND.set(links_classified / (time.perf_counter() - pass_started))
+                if classification_progress is not None:
+                    classification_progress.update(len(link_classification_batch))
+                logger.info("Classified %d links (up to link id %d)", links_classified, link_classification_batch[-1][0])
+            pass_succeeded = True
+        finally:
+            classification_writer, self._classification_writer = self._classification_writer, None
+            try:
+                self._close_after_pass(batch_reader, pass_succeeded)
+            finally:
+                self._close_after_pass(classification_writer, pass_succeeded)
+        return links_classified, classification_writer.last_written_id or last_processed_link_id
+
+    @staticmethod
+    def _close_after_pass(pass_resource, pass_succeeded: bool) -> None:
+        """Close a pass's reader or writer; after a failed pass, log its close error rather than let it replace the pass's."""
+        try:
+            pass_resource.close()
+        except Exception as close_error:
+            if pass_succeeded:
+                raise
+            logger.error("Error closing %s after a failed classification pass: %s", type(pass_resource).__name__, close_error)
+
+    def classify_crawl_run(self, crawl_run_id: int) -> int:
+        """Classify every pending link of another crawl run with the already loaded model; return links classified."""
+        self.classification_queue_manager.crawl_run_id = crawl_run_id
+        links_classified, _ = self.classify_pending_links()
+        return links_classified
+
+    def close(self) -> None:
+        if self.inference_pool:
+            self.inference_pool.close()
+        if isinstance(self.topic_classifier, RemoteTopicClassifier):
+            self.topic_classifier.close()
+        self.classification_queue_manager.close()
+        if self.classification_cache:
+            logger.info(self.classification_cache.summary())
+            self.classification_cache.close()
+        if self.cascade_gate:
+            logger.info(self.cascade_gate.summary())
 
     def classify_all_pending_links(self):
         total_links_classified = 0
-        last_processed_link_id: Optional[int] = None
-        total_pending_links = self.classification_queue_manager.get_total_pending()
+        total_pending_links = self.classification_queue_manager.get_total_pending(self.all_topic_categories)
+        PENDING_LINKS.set(total_pending_links)
         logger.info(f"Starting to classify {total_pending_links} pending links")
+        classification_progress = tqdm(total=total_pending_links, desc="Classifying link content")
         
         try:
-            while True:
-                link_classification_batch = self.classification_queue_manager.fetch_pending_batch(LINK_CLASSIFICATION_BATCH_SIZE, last_processed_link_id)
-                if not link_classification_batch:
-                    break
-                    
-                successfully_classified_in_batch = self._classify_link_batch(link_classification_batch)
-                total_links_classified += successfully_classified_in_batch
-                last_processed_link_id = link_classification_batch[-1][0]
-                
-                self.classification_queue_manager.connection.commit()
-                logger.info(f"Classified {total_links_classified}/{total_pending_links} links")
+            total_links_classified, _ = self.classify_pending_links(classification_progress=classification_progress)
                 
         except Exception as processing_error:
             logger.error(f"Error in classify_all_pending_links: {str(processing_error)}")
             raise
         finally:
-            self.classification_queue_manager.close()
+            classification_progress.close()
+            self.close()
             logger.info(f"Completed classifying {total_links_classified} links")
-            
@@ -0,0 +1,40 @@
+import os
+from typing import Dict
+
+import torch
+from transformers.modeling_outputs import SequenceClassifierOutput
+
+from ..utils import logger
+
+
+class OnnxSequenceClassifier:
+    """ONNX Runtime session that can stand in for a HuggingFace sequence-classification model.
+
+    Calling it with tokenizer outputs returns an object with ``.logits`` as a torch tensor,
+    so TopicClassifier's batching and scoring code runs unchanged on top of it.
+    """
+
+    def __init__(self, onnx_model_path: str, intra_op_threads: int = None):
+        try:
+            import onnxruntime
+        except ImportError as e:
+            raise ImportError("The ONNX inference backend requires onnxruntime: pip install 'urlevaluator[onnx]'") from e
+
+        session_options = onnxruntime.SessionOptions()
+        session_options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        intra_op_threads = intra_op_threads or int(os.environ.get('ONNX_INTRA_OP_THREADS', 0))
+        if intra_op_threads:
+            session_options.intra_op_num_threads = intra_op_threads
+
+        logger.info(f"Loading ONNX model from {onnx_model_path}")
+        self.session = onnxruntime.InferenceSession(onnx_model_path, session_options, providers=['CPUExecutionProvider'])
+        self.input_names = {session_input.name for session_input in self.session.get_inputs()}
+
+    def __call__(self, **inputs: torch.Tensor) -> SequenceClassifierOutput:
+        session_inputs: Dict[str, object] = {
+            input_name: tensor.detach().cpu().numpy()
+            for input_name, tensor in inputs.items()
+            if input_name in self.input_names
+        }
+        logits = self.session.run(['logits'], session_inputs)[0]
+        return SequenceClassifierOutput(logits=torch.from_numpy(logits))
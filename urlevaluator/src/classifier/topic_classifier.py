@@ -1,41 +1,215 @@
-from typing import List, Dict
+import contextlib
+import copy
+import os
+from abc import ABC, abstractmethod
+from typing import List, Dict, Iterator, Optional
 import torch
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
 
-from .download_model import get_model_manager
+from .cascade import CascadeGate
+from .classification_cache import ClassificationCache
+from .download_model import (
+    get_model_manager, NLI_CLASSIFIER_MODE, TORCH_BACKEND, TORCH_INT8_BACKEND, ONNX_BACKEND, ONNX_INT8_BACKEND
+)
+from .onnx_backend import OnnxSequenceClassifier
 from ..utils import logger
+from ..utils.metrics import metrics
+from ..utils.profiling import profile_torch_calls, torch_profiling_enabled
 
+HYPOTHESIS_TEMPLATE = "This text is about {}"
+DEFAULT_MAX_TOKENS_PER_BATCH = 8192
+INFERENCE_SECONDS = metrics.histogram('inference_batch_seconds', 'Model inference time per call, after cascade and cache',
+                                      ['classifier'])
+INFERENCE_TEXTS = metrics.counter('inference_texts_total', 'Texts sent to the model', ['classifier'])
+FP32_PRECISION = 'fp32'
+BF16_PRECISION = 'bf16'
+INFERENCE_PRECISIONS = (FP32_PRECISION, BF16_PRECISION)
 
-class TopicClassifier:
-    def __init__(self, topics, model_name=None):
+
+def cpu_supports_bf16() -> bool:
+    """Whether oneDNN has native bf16 kernels on this CPU (AVX512-BF16 or AMX); emulated bf16 is slower than fp32."""
+    try:
+        return bool(torch.ops.mkldnn._is_mkldnn_bf16_supported())
+    except (AttributeError, RuntimeError):
+        return False
+
+
+def pack_by_token_budget(sequence_lengths: List[int], max_tokens_per_batch: int) -> Iterator[List[int]]:
+    """Yield index groups sorted by length whose padded size (count x longest) stays within the budget."""
+    current_batch: List[int] = []
+    for sequence_index in sorted(range(len(sequence_lengths)), key=sequence_lengths.__getitem__):
+        padded_batch_tokens = (len(current_batch) + 1) * sequence_lengths[sequence_index]
+        if current_batch and padded_batch_tokens > max_tokens_per_batch:
+            yield current_batch
+            current_batch = []
+        current_batch.append(sequence_index)
+    if current_batch:
+        yield current_batch
+
+
+class BatchClassificationMixin(ABC):
+    """classify_batch on top of an _infer_batch: cascade stage first, then the cache, then the model.
+
+    Shared by the in-process classifier and the frontends that run inference elsewhere
+    (worker processes, the inference server), which set topics, cache and cascade themselves.
+    Cached scores are keyed on scoring_key, which names the model and every setting that
+    changes its scores.
+    """
+    topics: List[str]
+    scoring_key: str
+    cache: Optional[ClassificationCache] = None
+    cascade: Optional[CascadeGate] = None
+
+    @abstractmethod
+    def _infer_batch(self, texts: List[str]) -> List[Dict[str, float]]:
+        """Run the model on every text, with no cascade or cache in front of it."""
+
+    def classify_batch(self, texts: List[str]) -> List[Dict[str, float]]:
+        """Classify many texts against all topics, packing every (text, topic) pair into shared forward passes."""
+        if self.cascade:
+            return self.cascade.route(texts, self._classify_with_model)
+        return self._classify_with_model(texts)
+
+    def with_topics(self, topics: List[str]):
+        """A classifier for another topic set that shares this one's model (and cache)."""
+        topic_classifier = copy.copy(self)
+        topic_classifier.topics = list(topics)
+        if topic_classifier.topics != list(self.topics):
+            # A cascade scorer is trained for one exact topic set.
+            topic_classifier.cascade = None
+        return topic_classifier
+
+    def _classify_with_model(self, texts: List[str]) -> List[Dict[str, float]]:
+        if not self.cache:
+            return self._timed_infer_batch(texts)
+        return self.cache.resolve(self.scoring_key, texts, self.topics, self._timed_infer_batch)
+
+    def _timed_infer_batch(self, texts: List[str]) -> List[Dict[str, float]]:
+        classifier_name = type(self).__name__
+        INFERENCE_TEXTS.labels(classifier_name).inc(len(texts))
+        with INFERENCE_SECONDS.labels(classifier_name).time():
+            return self._infer_batch(texts)
+
+
+class TopicClassifier(BatchClassificationMixin):
+    classifier_mode = NLI_CLASSIFIER_MODE
+
+    def __init__(self, topics, model_name=None, max_tokens_per_batch: int = None, cache: Optional[ClassificationCache] = None,
+                 inference_backend: str = None, cascade: Optional[CascadeGate] = None, precision: str = None):
         self.topics = topics
+        self.cache = cache
+        self.cascade = cascade
+        self.max_tokens_per_batch = max_tokens_per_batch or int(
+            os.environ.get('MAX_TOKENS_PER_BATCH', DEFAULT_MAX_TOKENS_PER_BATCH)
+        )
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         logger.info(f"Using device: {self.device}")
 
-        model_path = get_model_manager(model_name).get_model_path()
-        self.tokenizer = AutoTokenizer.from_pretrained(model_path)
-        self.model = AutoModelForSequenceClassification.from_pretrained(model_path).to(self.device)
+        self.model_manager = get_model_manager(model_name)
+        self.inference_backend = inference_backend or self.model_manager.inference_backend
+        self._load_model(self.model_manager.get_model_path())
+        self.precision = self._resolve_precision(precision or os.environ.get('INFERENCE_PRECISION', FP32_PRECISION))
+        if torch_profiling_enabled():
+            # Wrapped on the instance, so runs without PROFILE_TORCH keep the plain method.
+            self._compute_model_predictions = profile_torch_calls(self._compute_model_predictions)
         logger.info("Model loaded successfully")
 
+    @property
+    def scoring_key(self) -> str:
+        return ":".join([self.model_manager.model_name, self.classifier_mode, self.inference_backend, self.precision])
+
+    def _resolve_precision(self, precision: str) -> str:
+        if precision not in INFERENCE_PRECISIONS:
+            raise ValueError(f"Unknown INFERENCE_PRECISION '{precision}', expected one of {', '.join(INFERENCE_PRECISIONS)}")
+        if precision == BF16_PRECISION:
+            if self.device.type != 'cpu' or self.inference_backend != TORCH_BACKEND:
+                logger.warning(f"bf16 autocast is only used for the torch backend on CPU, running {self.inference_backend} in fp32")
+                return FP32_PRECISION
+            if not cpu_supports_bf16():
+                logger.warning("This CPU has no native bf16 support, running in fp32")
+                return FP32_PRECISION
+        logger.info(f"Inference precision: {precision}")
+        return precision
+
+    @contextlib.contextmanager
+    def _inference_context(self) -> Iterator[None]:
+        """no_grad, plus bf16 autocast when that precision is selected."""
+        with torch.no_grad(), torch.autocast('cpu', dtype=torch.bfloat16, enabled=self.precision == BF16_PRECISION):
+            yield
+
+    def _load_model(self, model_path: str) -> None:
+        self.tokenizer = AutoTokenizer.from_pretrained(model_path)
+        if self.inference_backend in (ONNX_BACKEND, ONNX_INT8_BACKEND):
+            # Quantized and ONNX Runtime backends run on CPU.
+            self.device = torch.device("cpu")
+            self.model = OnnxSequenceClassifier(
+                self.model_manager.prepare_onnx_model(quantized=self.inference_backend == ONNX_INT8_BACKEND)
+            )
+        elif self.inference_backend == TORCH_INT8_BACKEND:
+            self.device = torch.device("cpu")
+            model = AutoModelForSequenceClassification.from_pretrained(model_path).eval()
+            self.model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        else:
+            self.model = AutoModelForSequenceClassification.from_pretrained(model_path).to(self.device)
+        logger.info(f"Inference backend: {self.inference_backend}")
+
+    def _topic_hypotheses(self) -> List[str]:
+        return [HYPOTHESIS_TEMPLATE.format(topic) for topic in self.topics]
+
     def _prepare_model_inputs(self, text: str) -> Dict[str, torch.Tensor]:
         return self.tokenizer([text] * len(self.topics),
-                             [f"This text is about {topic}" for topic in self.topics],
+                             self._topic_hypotheses(),
                              truncation=True,
                              max_length=512,
                              return_tensors="pt",
                              padding=True).to(self.device)
 
     def _compute_model_predictions(self, inputs: Dict[str, torch.Tensor]) -> torch.Tensor:
-        with torch.no_grad():
+        with self._inference_context():
             outputs = self.model(**inputs)
-            return outputs.logits
+            return outputs.logits.float()
 
-    def _calculate_topic_scores(self, scores: torch.Tensor) -> Dict[str, float]:
+    def _calculate_confidences(self, scores: torch.Tensor) -> List[float]:
         probabilities = torch.softmax(scores, dim=-1)
-        confidences = probabilities[:, 1].tolist()
-        return dict(zip(self.topics, confidences))
+        return probabilities[:, 1].tolist()
+
+    def _calculate_topic_scores(self, scores: torch.Tensor) -> Dict[str, float]:
+        return dict(zip(self.topics, self._calculate_confidences(scores)))
 
     def classify_text(self, text: str) -> Dict[str, float]:
+        if self.cache or self.cascade:
+            return self.classify_batch([text])[0]
         inputs = self._prepare_model_inputs(text)
         scores = self._compute_model_predictions(inputs)
         return self._calculate_topic_scores(scores)
+
+    def _pack_pairs_by_token_budget(self, pair_lengths: List[int]) -> Iterator[List[int]]:
+        """Group premise/hypothesis pairs of similar length so each padded batch stays within the token budget."""
+        return pack_by_token_budget(pair_lengths, self.max_tokens_per_batch)
+
+    def _infer_batch(self, texts: List[str]) -> List[Dict[str, float]]:
+        if not texts:
+            return []
+        hypotheses = self._topic_hypotheses()
+        premises = [text for text in texts for _ in hypotheses]
+        pair_hypotheses = [hypothesis for _ in texts for hypothesis in hypotheses]
+        pair_lengths = [len(input_ids) for input_ids in self.tokenizer(premises,
+                                                                       pair_hypotheses,
+                                                                       truncation=True,
+                                                                       max_length=512)['input_ids']]
+
+        pair_confidences = [0.0] * len(pair_lengths)
+        for pair_indices in self._pack_pairs_by_token_budget(pair_lengths):
+            batch_inputs = self.tokenizer([premises[pair_index] for pair_index in pair_indices],
+                                          [pair_hypotheses[pair_index] for pair_index in pair_indices],
+                                          truncation=True,
+                                          max_length=512,
+                                          return_tensors="pt",
+                                          padding=True).to(self.device)
+            batch_confidences = self._calculate_confidences(self._compute_model_predictions(batch_inputs))
+            for pair_index, confidence in zip(pair_indices, batch_confidences):
+                pair_confidences[pair_index] = confidence
+
+        topic_count = len(self.topics)
+        return [dict(zip(self.topics, pair_confidences[text_index * topic_count:(text_index + 1) * topic_count]))
+                for text_index in range(len(texts))]
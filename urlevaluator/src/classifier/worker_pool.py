@@ -0,0 +1,134 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple
+
+import torch
+
+from ..utils import logger
+from .topic_classifier import BatchClassificationMixin, TopicClassifier
+
+_worker_classifier: Optional[TopicClassifier] = None
+_worker_classifiers_by_topics: Dict[Tuple[str, ...], TopicClassifier] = {}
+
+
+def available_cores() -> List[int]:
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def assign_worker_cores(worker_count: int, cores: List[int]) -> List[List[int]]:
+    """Split the cores into worker_count contiguous groups (workers share cores when there are fewer cores than workers)."""
+    if worker_count >= len(cores):
+        return [[cores[worker_index % len(cores)]] for worker_index in range(worker_count)]
+    group_size, remainder = divmod(len(cores), worker_count)
+    core_groups, start = [], 0
+    for worker_index in range(worker_count):
+        end = start + group_size + (worker_index < remainder)
+        core_groups.append(cores[start:end])
+        start = end
+    return core_groups
+
+
+def _initialize_worker(workers_started, core_groups: List[List[int]], pin_cores: bool, threads_per_worker: Optional[int],
+                       classifier_class: type, classifier_arguments: Dict) -> None:
+    global _worker_classifier
+    with workers_started.get_lock():
+        worker_index = workers_started.value
+        workers_started.value += 1
+    worker_cores = core_groups[worker_index]
+    if pin_cores and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, worker_cores)
+    torch.set_num_threads(threads_per_worker or len(worker_cores))
+    _worker_classifier = classifier_class(**classifier_arguments)
+
+
+def _infer_in_worker(texts: List[str], topics: Tuple[str, ...]) -> List[Dict[str, float]]:
+    if list(topics) == list(_worker_classifier.topics):
+        return _worker_classifier._infer_batch(texts)
+    if topics not in _worker_classifiers_by_topics:
+        _worker_classifiers_by_topics[topics] = _worker_classifier.with_topics(list(topics))
+    return _worker_classifiers_by_topics[topics]._infer_batch(texts)
+
+
+class _SpawnedWorkers:
+    """The worker processes behind an InferenceWorkerPool, started again after one of them dies."""
+
+    def __init__(self, worker_count: int, initialize_arguments: Tuple):
+        self.worker_count = worker_count
+        self.initialize_arguments = initialize_arguments
+        self.executor = self._start()
+
+    def _start(self) -> ProcessPoolExecutor:
+        context = multiprocessing.get_context('spawn')
+        return ProcessPoolExecutor(self.worker_count, mp_context=context, initializer=_initialize_worker,
+                                   initargs=(context.Value('i', 0), *self.initialize_arguments))
+
+    def map(self, function, *argument_lists) -> List:
+        try:
+            return list(self.executor.map(function, *argument_lists))
+        except BrokenProcessPool:
+            logger.error("An inference worker died, restarting the inference workers")
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = self._start()
+            raise
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=True)
+
+
+class InferenceWorkerPool(BatchClassificationMixin):
+    """Run a TopicClassifier's CPU inference in K worker processes.
+
+    Workers are spawned, not forked, and each loads its own copy of the model with the
+    parent's settings: a child forked after the parent has run torch (autotuning, topic
+    embeddings) deadlocks in the OpenMP thread pool, and would also inherit the parent's
+    database cursors and threads. Each worker is pinned to its own group of cores with a
+    matching torch thread count; several small intra-op pools scale better than one large
+    pool at link-sized batches. The parent keeps the classification cache and all database
+    access, so it stays the only writer.
+
+    A worker that dies fails the batch it was part of with BrokenProcessPool instead of
+    hanging, and the next batch runs on a fresh set of workers.
+    """
+
+    def __init__(self, topic_classifier: TopicClassifier, worker_count: int,
+                 threads_per_worker: int = None, pin_cores: bool = None):
+        self.topic_classifier = topic_classifier
+        self.worker_count = worker_count
+        self.topics = topic_classifier.topics
+        self.cache = topic_classifier.cache
+        self.cascade = topic_classifier.cascade
+        threads_per_worker = threads_per_worker or int(os.environ.get('INFERENCE_THREADS_PER_WORKER', 0)) or None
+        if pin_cores is None:
+            pin_cores = os.environ.get('INFERENCE_PIN_CORES', '1') != '0'
+
+        core_groups = assign_worker_cores(worker_count, available_cores())
+        classifier_arguments = {
+            'topics': topic_classifier.topics,
+            'model_name': topic_classifier.model_manager.model_name,
+            'max_tokens_per_batch': topic_classifier.max_tokens_per_batch,
+            'inference_backend': topic_classifier.inference_backend,
+            'precision': topic_classifier.precision,
+        }
+        # Shared with the with_topics copies, so a restart after a dead worker reaches all of them.
+        self._workers = _SpawnedWorkers(worker_count, (core_groups, pin_cores, threads_per_worker,
+                                                       type(topic_classifier), classifier_arguments))
+        logger.info(f"Started {worker_count} inference workers on core groups {core_groups}")
+
+    @property
+    def scoring_key(self) -> str:
+        return self.topic_classifier.scoring_key
+
+    def _infer_batch(self, texts: List[str]) -> List[Dict[str, float]]:
+        if not texts:
+            return []
+        chunk_size = -(-len(texts) // self.worker_count)
+        text_chunks = [texts[start:start + chunk_size] for start in range(0, len(texts), chunk_size)]
+        chunk_results = self._workers.map(_infer_in_worker, text_chunks, [tuple(self.topics)] * len(text_chunks))
+        return [topic_scores for chunk_scores in chunk_results for topic_scores in chunk_scores]
+
+    def close(self) -> None:
+        self._workers.shutdown()
@@ -1,10 +1,12 @@
 from .url_db_manager import WebCrawlDatabaseManager
 from .init_db import DatabaseManager, get_db_manager
-from .queue import QueueManager
+from .queue import QueueManager, PrefetchingBatchReader, ClassificationWriter
 
 __all__ = [
     "WebCrawlDatabaseManager",
     "DatabaseManager",
     "QueueManager",
+    "PrefetchingBatchReader",
+    "ClassificationWriter",
     "get_db_manager",
 ] 
\ No newline at end of file
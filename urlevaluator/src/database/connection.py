@@ -0,0 +1,79 @@
+import atexit
+import os
+import random
+import threading
+import time
+from typing import Dict, Optional, Sequence
+
+import duckdb
+
+CONFLICT_RETRY_ATTEMPTS = 5
+
+
+def _duckdb_settings_from_env() -> Dict[str, str]:
+    settings = {
+        'threads': os.environ.get('DUCKDB_THREADS'),
+        'memory_limit': os.environ.get('DUCKDB_MEMORY_LIMIT'),
+        'checkpoint_threshold': os.environ.get('DUCKDB_CHECKPOINT_THRESHOLD'),
+    }
+    return {name: value for name, value in settings.items() if value}
+
+
+class DuckDBConnectionRegistry:
+    """Process-wide registry that opens each database file once.
+
+    DuckDB refuses a second connection to the same file with a different
+    configuration, and a connection object must not be shared across threads.
+    The registry keeps one root connection per file and hands out cursors,
+    which share the database instance but are safe to use from one thread each.
+    """
+
+    def __init__(self):
+        self._connections: Dict[str, duckdb.DuckDBPyConnection] = {}
+        self._lock = threading.Lock()
+
+    def get_connection(self, db_path: str) -> duckdb.DuckDBPyConnection:
+        registry_key = os.path.abspath(db_path)
+        with self._lock:
+            connection = self._connections.get(registry_key)
+            if connection is None:
+                connection = duckdb.connect(db_path, config=_duckdb_settings_from_env())
+                self._connections[registry_key] = connection
+            return connection
+
+    def cursor(self, db_path: str) -> duckdb.DuckDBPyConnection:
+        """Return a new cursor owned by the caller; closing it leaves the database open."""
+        return self.get_connection(db_path).cursor()
+
+    def close(self, db_path: str) -> None:
+        with self._lock:
+            connection = self._connections.pop(os.path.abspath(db_path), None)
+        if connection is not None:
+            connection.close()
+
+    def close_all(self) -> None:
+        with self._lock:
+            connections, self._connections = list(self._connections.values()), {}
+        for connection in connections:
+            connection.close()
+
+
+def execute_with_conflict_retry(connection: duckdb.DuckDBPyConnection, query: str, params: Optional[Sequence] = None,
+                                attempts: int = CONFLICT_RETRY_ATTEMPTS) -> duckdb.DuckDBPyConnection:
+    """Execute an idempotent autocommit statement, retrying when a concurrent cursor touched the same rows.
+
+    DuckDB's optimistic concurrency control fails the later of two transactions that update
+    the same row, or insert the same key even with INSERT OR IGNORE. Concurrent crawls hit
+    this on shared link URLs and texts; the retry sees the other transaction's committed rows.
+    """
+    for attempt in range(1, attempts + 1):
+        try:
+            return connection.execute(query, params)
+        except (duckdb.TransactionException, duckdb.ConstraintException):
+            if attempt == attempts:
+                raise
+            time.sleep(random.uniform(0, 0.005 * attempt))
+
+
+connection_registry = DuckDBConnectionRegistry()
+atexit.register(connection_registry.close_all)
@@ -2,6 +2,7 @@ import os
 from dotenv import load_dotenv
 import duckdb
 
+from .connection import connection_registry
 from ..utils.log_handler import logger
 
 load_dotenv()
@@ -16,13 +17,20 @@ class DatabaseManager:
     def get_db_path(self) -> str:
         return self.db_path
 
+    def get_cursor(self) -> duckdb.DuckDBPyConnection:
+        """Get a cursor on the process-wide connection to this database."""
+        return connection_registry.cursor(self.db_path)
+
     def create_database(self) -> None:
         if os.path.exists(self.db_path):
-            logger.info(f"Database already exists in {self.db_path}. Skipping initialization.")
+            logger.info(f"Database already exists in {self.db_path}. Applying schema updates only.")
+            conn: duckdb.DuckDBPyConnection = self.get_cursor()
+            self._apply_schema_updates(conn)
+            conn.close()
             return
 
         logger.info(f"Starting database initialization at {self.db_path}")
-        conn: duckdb.DuckDBPyConnection = duckdb.connect(self.db_path)
+        conn: duckdb.DuckDBPyConnection = self.get_cursor()
         
         conn.execute('CREATE SEQUENCE pages_id_seq')
         conn.execute('CREATE SEQUENCE links_id_seq')
@@ -30,10 +38,17 @@ class DatabaseManager:
         conn.execute('''
             CREATE TABLE pages (
                 id BIGINT PRIMARY KEY DEFAULT nextval('pages_id_seq'),
+                run_id BIGINT,
                 url VARCHAR(2048) UNIQUE,
                 source_url VARCHAR(2048),
                 depth INTEGER,
                 title VARCHAR(255),
+                content_hash VARCHAR(64),
+                first_fetched_at TIMESTAMP,
+                last_fetched_at TIMESTAMP,
+                fetch_count INTEGER DEFAULT 1,
+                change_count INTEGER DEFAULT 0,
+                change_rate DOUBLE,
                 created_at TIMESTAMP
             )
         ''')
@@ -41,10 +56,11 @@ class DatabaseManager:
         conn.execute('''
             CREATE TABLE links (
                 id BIGINT PRIMARY KEY DEFAULT nextval('links_id_seq'),
+                run_id BIGINT,
                 page_id BIGINT,
                 url VARCHAR(2048),
-                link_text VARCHAR(255),
-                content VARCHAR(2048),
+                link_text_id UBIGINT,
+                content_id UBIGINT,
                 topic_scores JSON,
                 visited_at TIMESTAMP,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -52,14 +68,149 @@ class DatabaseManager:
                 FOREIGN KEY (page_id) REFERENCES pages (id)
             )
         ''')
-        
+
+        self._apply_schema_updates(conn)
         conn.close()
         logger.info("Database initialization completed successfully")
 
+    def _apply_schema_updates(self, conn: duckdb.DuckDBPyConnection) -> None:
+        """Create tables and columns added after the initial schema and migrate older data into them. Safe to re-run."""
+        conn.execute('CREATE SEQUENCE IF NOT EXISTS crawl_runs_id_seq')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS crawl_runs (
+                id BIGINT PRIMARY KEY DEFAULT nextval('crawl_runs_id_seq'),
+                seed_url VARCHAR(2048),
+                max_depth INTEGER,
+                status VARCHAR(32),
+                started_at TIMESTAMP,
+                finished_at TIMESTAMP
+            )
+        ''')
+        conn.execute('ALTER TABLE pages ADD COLUMN IF NOT EXISTS run_id BIGINT')
+        conn.execute('ALTER TABLE pages ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)')
+        conn.execute('ALTER TABLE pages ADD COLUMN IF NOT EXISTS first_fetched_at TIMESTAMP')
+        conn.execute('ALTER TABLE pages ADD COLUMN IF NOT EXISTS last_fetched_at TIMESTAMP')
+        conn.execute('ALTER TABLE pages ADD COLUMN IF NOT EXISTS fetch_count INTEGER DEFAULT 1')
+        conn.execute('ALTER TABLE pages ADD COLUMN IF NOT EXISTS change_count INTEGER DEFAULT 0')
+        conn.execute('ALTER TABLE pages ADD COLUMN IF NOT EXISTS change_rate DOUBLE')
+        conn.execute('ALTER TABLE links ADD COLUMN IF NOT EXISTS run_id BIGINT')
+        self._assign_legacy_pages_to_crawl_runs(conn)
+
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS texts (
+                id UBIGINT PRIMARY KEY,
+                content VARCHAR
+            )
+        ''')
+        conn.execute('ALTER TABLE links ADD COLUMN IF NOT EXISTS link_text_id UBIGINT')
+        conn.execute('ALTER TABLE links ADD COLUMN IF NOT EXISTS content_id UBIGINT')
+        self._move_inline_link_texts_to_text_table(conn)
+
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS classification_cache (
+                text_id UBIGINT,
+                topic VARCHAR,
+                scorer_key VARCHAR,
+                score DOUBLE,
+                PRIMARY KEY (text_id, topic, scorer_key)
+            )
+        ''')
+        self._rekey_classification_cache(conn)
+
+    def _assign_legacy_pages_to_crawl_runs(self, conn: duckdb.DuckDBPyConnection) -> None:
+        """Older databases have pages and links without a run_id, which run-scoped queries never see.
+
+        Every seed page (one whose source page was not stored) becomes a 'legacy' crawl run holding the
+        pages reached from it through source_url, and links take the run of their page.
+        """
+        if conn.execute('SELECT count(*) FROM pages WHERE run_id IS NULL').fetchone()[0] == 0:
+            return
+        logger.info("Assigning pages stored before crawl runs to legacy runs")
+        conn.execute('''
+            CREATE OR REPLACE TEMP TABLE legacy_page_seeds AS
+            WITH RECURSIVE reached (page_id, url, seed_url) AS (
+                SELECT id, url, coalesce(source_url, url)
+                FROM pages
+                WHERE run_id IS NULL AND (
+                    source_url IS NULL OR source_url = url
+                    OR NOT EXISTS (SELECT 1 FROM pages AS source_page WHERE source_page.url = pages.source_url)
+                )
+                UNION
+                SELECT child_page.id, child_page.url, reached.seed_url
+                FROM pages AS child_page
+                JOIN reached ON child_page.source_url = reached.url
+                WHERE child_page.run_id IS NULL AND child_page.source_url <> child_page.url
+            )
+            SELECT page_id, min(seed_url) AS seed_url
+            FROM reached
+            GROUP BY page_id
+        ''')
+        last_run_id = conn.execute('SELECT coalesce(max(id), 0) FROM crawl_runs').fetchone()[0]
+        conn.execute('''
+            INSERT INTO crawl_runs (seed_url, max_depth, status, started_at, finished_at)
+            SELECT legacy_page_seeds.seed_url, max(pages.depth), 'legacy', min(pages.created_at), max(pages.created_at)
+            FROM legacy_page_seeds
+            JOIN pages ON pages.id = legacy_page_seeds.page_id
+            GROUP BY legacy_page_seeds.seed_url
+            ORDER BY min(pages.created_at), legacy_page_seeds.seed_url
+        ''')
+        conn.execute('''
+            UPDATE pages SET run_id = crawl_runs.id
+            FROM legacy_page_seeds, crawl_runs
+            WHERE pages.id = legacy_page_seeds.page_id
+              AND crawl_runs.seed_url = legacy_page_seeds.seed_url
+              AND crawl_runs.id > ?
+        ''', [last_run_id])
+        conn.execute('''
+            UPDATE links SET run_id = pages.run_id
+            FROM pages
+            WHERE links.page_id = pages.id AND links.run_id IS NULL
+        ''')
+        conn.execute('DROP TABLE legacy_page_seeds')
+        unassigned_pages = conn.execute('SELECT count(*) FROM pages WHERE run_id IS NULL').fetchone()[0]
+        if unassigned_pages:
+            logger.warning(f"{unassigned_pages} legacy pages are not reachable from a seed page and keep no run")
+
+    def _rekey_classification_cache(self, conn: duckdb.DuckDBPyConnection) -> None:
+        """Older caches were keyed on the model name alone, so their rows cannot tell which backend scored them."""
+        cache_columns = {
+            row[0] for row in conn.execute(
+                "SELECT column_name FROM information_schema.columns WHERE table_name = 'classification_cache'"
+            ).fetchall()
+        }
+        if 'model_name' not in cache_columns:
+            return
+        logger.info("Dropping classification cache rows keyed on the model name only")
+        conn.execute('DELETE FROM classification_cache')
+        conn.execute('ALTER TABLE classification_cache RENAME COLUMN model_name TO scorer_key')
+
+    def _move_inline_link_texts_to_text_table(self, conn: duckdb.DuckDBPyConnection) -> None:
+        """Older databases stored anchor text and excerpts inline on every link row."""
+        inline_text_columns = {
+            'link_text': 'link_text_id',
+            'content': 'content_id',
+        }
+        existing_columns = {
+            row[0] for row in conn.execute(
+                "SELECT column_name FROM information_schema.columns WHERE table_name = 'links'"
+            ).fetchall()
+        }
+        for text_column, text_id_column in inline_text_columns.items():
+            if text_column not in existing_columns:
+                continue
+            logger.info(f"Moving links.{text_column} into the texts table")
+            conn.execute(f'''
+                INSERT OR IGNORE INTO texts (id, content)
+                SELECT DISTINCT md5_number_lower({text_column}), {text_column}
+                FROM links
+                WHERE {text_column} IS NOT NULL
+            ''')
+            conn.execute(f'UPDATE links SET {text_id_column} = md5_number_lower({text_column}) WHERE {text_column} IS NOT NULL')
+            conn.execute(f'ALTER TABLE links DROP COLUMN {text_column}')
+
 def get_db_manager(db_name: str = None):
     """Get a new database manager instance."""
     return DatabaseManager(db_name)
 
 if __name__ == "__main__":
     get_db_manager().create_database()
-
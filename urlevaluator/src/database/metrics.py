@@ -0,0 +1,4 @@
+from ..utils.metrics import metrics
+
+DB_READ_SECONDS = metrics.histogram('db_read_seconds', 'Database read time per call', ['operation'])
+DB_WRITE_SECONDS = metrics.histogram('db_write_seconds', 'Database write time per page or batch', ['operation'])
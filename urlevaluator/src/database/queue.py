@@ -1,50 +1,224 @@
-from typing import List, Optional, Tuple
-
-import duckdb
+import copy
+import json
+import queue
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 
+from .connection import execute_with_conflict_retry
+from .metrics import DB_READ_SECONDS, DB_WRITE_SECONDS
 from .init_db import get_db_manager
+from .text_store import fetch_texts
+from ..utils.metrics import QUEUE_DEPTH
 
 
 class QueueManager:
-    def __init__(self, initial_url: str, db_name=None):
-        self.connection = duckdb.connect(get_db_manager(db_name).get_db_path())
+    def __init__(self, initial_url: Optional[str], db_name=None, crawl_run_id: Optional[int] = None):
+        self.connection = get_db_manager(db_name).get_cursor()
         self.initial_url = initial_url
+        if crawl_run_id is None and initial_url is not None:
+            crawl_run_id = self._find_latest_crawl_run_id()
+        self.crawl_run_id = crawl_run_id
+
+    def clone(self) -> "QueueManager":
+        """A QueueManager for the same crawl run on its own cursor, for use from another thread."""
+        queue_manager = copy.copy(self)
+        queue_manager.connection = self.connection.cursor()
+        return queue_manager
+
+    def _find_latest_crawl_run_id(self) -> Optional[int]:
+        query = """
+            SELECT MAX(id)
+            FROM crawl_runs
+            WHERE seed_url = ?
+        """
+        return self.connection.execute(query, [self.initial_url]).fetchone()[0]
 
-    def fetch_pending_batch(self, batch_size: int, last_id: Optional[int]) -> List[Tuple[int, str]]:
+    def fetch_pending_batch(self, batch_size: int, last_id: Optional[int],
+                            topics: List[str]) -> List[Tuple[int, str, List[str]]]:
+        """Return (link id, link text, topics still missing from its scores) for the next pending links.
+
+        A link is pending until its topic_scores hold every requested topic, so adding a topic
+        only queues the (link, new topic) pairs instead of a full reclassification.
+        """
         query = """
-            SELECT l.id, l.link_text 
-            FROM links l
-            JOIN pages p ON l.page_id = p.id
-            WHERE l.topic_scores IS NULL
-            AND p.source_url = ?
-            AND l.id > ?
-            ORDER BY l.id
+            SELECT id, link_text_id, missing_topics
+            FROM (
+                SELECT id, link_text_id,
+                       list_filter(?::VARCHAR[], topic -> topic_scores IS NULL
+                                   OR NOT list_contains(json_keys(topic_scores), topic)) AS missing_topics
+                FROM links
+                WHERE run_id = ?
+                AND id > ?
+            )
+            WHERE len(missing_topics) > 0
+            ORDER BY id
             LIMIT ?
         """
-        params = [self.initial_url,
+        params = [topics,
+                  self.crawl_run_id,
                   last_id if last_id is not None else 0,
                   batch_size]
-        return self.connection.execute(query, params).fetchall()
+        with DB_READ_SECONDS.labels('fetch_pending_batch').time():
+            pending_links = self.connection.execute(query, params).fetchall()
+            link_texts = fetch_texts(self.connection, [link_text_id for _, link_text_id, _ in pending_links])
+        return [(link_id, link_texts.get(link_text_id), missing_topics) for link_id, link_text_id, missing_topics in pending_links]
 
     def update_classification(self, link_id: int, topic_scores: dict) -> None:
         query = """
             UPDATE links 
-            SET topic_scores = ?, updated_at = CURRENT_TIMESTAMP
+            SET topic_scores = json_merge_patch(COALESCE(topic_scores, '{}'), ?::JSON), updated_at = CURRENT_TIMESTAMP
             WHERE id = ?
         """
-        self.connection.execute(query, [topic_scores, link_id])
+        self.connection.execute(query, [json.dumps(topic_scores), link_id])
 
-    def get_total_pending(self) -> int:
+    def update_classifications(self, classified_links: List[Tuple[int, Dict[str, float]]]) -> None:
+        """Merge a whole batch of scores into topic_scores with one staging insert and one UPDATE ... FROM join.
+
+        Topics already scored on a link are kept; changes are not committed here; callers commit once per batch.
+        """
+        if not classified_links:
+            return
+        with DB_WRITE_SECONDS.labels('classification_batch').time():
+            self._stage_and_merge_classifications(classified_links)
+
+    def _stage_and_merge_classifications(self, classified_links: List[Tuple[int, Dict[str, float]]]) -> None:
+        self.connection.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS classification_staging (
+                link_id BIGINT,
+                topic_scores VARCHAR
+            )
+        """)
+        placeholders = ", ".join(["(?, ?)"] * len(classified_links))
+        params = [value
+                  for link_id, topic_scores in classified_links
+                  for value in (link_id, json.dumps(topic_scores))]
+        self.connection.execute(f"INSERT INTO classification_staging VALUES {placeholders}", params)
+        # Crawls running alongside update the same link rows when they mark URLs visited.
+        execute_with_conflict_retry(self.connection, """
+            UPDATE links
+            SET topic_scores = json_merge_patch(COALESCE(links.topic_scores, '{}'), s.topic_scores::JSON), updated_at = CURRENT_TIMESTAMP
+            FROM classification_staging s
+            WHERE links.id = s.link_id
+        """)
+        self.connection.execute("DELETE FROM classification_staging")
+
+    def get_total_pending(self, topics: List[str]) -> int:
         query = """
             SELECT COUNT(*) 
-            FROM links l
-            JOIN pages p ON l.page_id = p.id
-            WHERE l.topic_scores IS NULL
-            AND p.source_url = ?
+            FROM links
+            WHERE run_id = ?
+            AND (topic_scores IS NULL OR NOT list_has_all(json_keys(topic_scores), ?::VARCHAR[]))
         """
-        return self.connection.execute(query, [self.initial_url]).fetchone()[0]
+        return self.connection.execute(query, [self.crawl_run_id, topics]).fetchone()[0]
 
     def close(self):
         if self.connection:
             self.connection.close()
             self.connection = None
+
+
+class PrefetchingBatchReader:
+    """Iterate pending batches while a background thread reads the next ones ahead.
+
+    Pagination is keyset on link id, so reading ahead never returns a link twice even though
+    earlier batches are not written yet. At most prefetch_batches batches wait in the buffer.
+    Iteration stops at the first empty batch, like a fetch_pending_batch loop.
+    """
+
+    def __init__(self, queue_manager: QueueManager, batch_size: int, topics: List[str],
+                 last_id: Optional[int] = None, prefetch_batches: int = 2):
+        self.queue_manager = queue_manager
+        self.batch_size = batch_size
+        self.topics = topics
+        self.last_id = last_id
+        self._batches: "queue.Queue[Union[List[Tuple[int, str, List[str]]], Exception]]" = queue.Queue(maxsize=max(1, prefetch_batches))
+        self._stopped = threading.Event()
+        self._buffer_depth = QUEUE_DEPTH.labels('prefetch')
+        self._thread = threading.Thread(target=self._read_batches, name="queue-prefetch", daemon=True)
+        self._thread.start()
+
+    def _put(self, item) -> bool:
+        while not self._stopped.is_set():
+            try:
+                self._batches.put(item, timeout=0.1)
+                self._buffer_depth.set(self._batches.qsize())
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _read_batches(self) -> None:
+        last_id = self.last_id
+        try:
+            while True:
+                pending_batch = self.queue_manager.fetch_pending_batch(self.batch_size, last_id, self.topics)
+                if not self._put(pending_batch) or not pending_batch:
+                    return
+                last_id = pending_batch[-1][0]
+        except Exception as read_error:
+            self._put(read_error)
+
+    def __iter__(self) -> Iterator[List[Tuple[int, str, List[str]]]]:
+        while True:
+            pending_batch = self._batches.get()
+            self._buffer_depth.set(self._batches.qsize())
+            if isinstance(pending_batch, Exception):
+                raise pending_batch
+            if not pending_batch:
+                return
+            yield pending_batch
+
+    def close(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+        self.queue_manager.close()
+
+
+class ClassificationWriter:
+    """Write classification batches and commit them on a background thread, in submission order.
+
+    last_written_id is the last link id of the newest batch that is committed, which is
+    what a resumed run can safely continue from. A failed write is raised on the next
+    submit or on close.
+    """
+
+    def __init__(self, queue_manager: QueueManager, max_pending_batches: int = 2):
+        self.queue_manager = queue_manager
+        self.last_written_id: Optional[int] = None
+        self._write_error: Optional[Exception] = None
+        self._writes_depth = QUEUE_DEPTH.labels('writeback')
+        self._writes: "queue.Queue[Optional[Tuple[List[Tuple[int, Dict[str, float]]], int]]]" = queue.Queue(maxsize=max(1, max_pending_batches))
+        self._thread = threading.Thread(target=self._write_batches, name="classification-writer", daemon=True)
+        self._thread.start()
+
+    def _write_batches(self) -> None:
+        while True:
+            pending_write = self._writes.get()
+            self._writes_depth.set(self._writes.qsize())
+            if pending_write is None:
+                return
+            if self._write_error:
+                continue
+            classified_links, last_link_id = pending_write
+            try:
+                self.queue_manager.update_classifications(classified_links)
+                self.queue_manager.connection.commit()
+                self.last_written_id = last_link_id
+            except Exception as write_error:
+                self._write_error = write_error
+
+    def _raise_write_error(self) -> None:
+        if self._write_error:
+            raise self._write_error
+
+    def submit(self, classified_links: List[Tuple[int, Dict[str, float]]], last_link_id: int) -> None:
+        self._raise_write_error()
+        self._writes.put((classified_links, last_link_id))
+        self._writes_depth.set(self._writes.qsize())
+
+    def close(self) -> None:
+        """Wait for every submitted batch to be written."""
+        self._writes.put(None)
+        self._thread.join()
+        self.queue_manager.close()
+        self._raise_write_error()
@@ -0,0 +1,36 @@
+import hashlib
+from typing import Dict, Iterable, List
+
+import duckdb
+
+from .connection import execute_with_conflict_retry
+
+TEXT_INSERT_CHUNK_SIZE = 500
+
+
+def compute_text_id(text: str) -> int:
+    """Content address of a text: the lower 64 bits of its MD5, matching DuckDB's md5_number_lower()."""
+    return int.from_bytes(hashlib.md5(text.encode('utf-8')).digest()[8:], 'little')
+
+
+def store_texts(connection: duckdb.DuckDBPyConnection, texts: Iterable[str]) -> Dict[str, int]:
+    """Insert each distinct text once and return the id of every text passed in."""
+    text_ids = {text: compute_text_id(text) for text in texts}
+    distinct_texts = list(text_ids.items())
+    for chunk_start in range(0, len(distinct_texts), TEXT_INSERT_CHUNK_SIZE):
+        chunk = distinct_texts[chunk_start:chunk_start + TEXT_INSERT_CHUNK_SIZE]
+        placeholders = ", ".join(["(?, ?)"] * len(chunk))
+        params = [value for text, text_id in chunk for value in (text_id, text)]
+        execute_with_conflict_retry(connection, f"INSERT OR IGNORE INTO texts (id, content) VALUES {placeholders}", params)
+    return text_ids
+
+
+def fetch_texts(connection: duckdb.DuckDBPyConnection, text_ids: Iterable[int]) -> Dict[int, str]:
+    distinct_text_ids: List[int] = list(set(text_ids))
+    if not distinct_text_ids:
+        return {}
+    placeholders = ", ".join(["?"] * len(distinct_text_ids))
+    query_results = connection.execute(
+        f"SELECT id, content FROM texts WHERE id IN ({placeholders})", distinct_text_ids
+    ).fetchall()
+    return dict(query_results)
@@ -1,23 +1,50 @@
+import itertools
 import os
-import duckdb
+from typing import Iterable, List, Optional
+
+from .connection import execute_with_conflict_retry
+from .metrics import DB_WRITE_SECONDS
 from .init_db import get_db_manager
-from ..scraper.models import CrawledPageData
+from .text_store import compute_text_id, store_texts
+from ..scraper.models import CrawledPageData, ExtractedLink, RecrawlCandidate
 from datetime import datetime
 
+LINK_INSERT_CHUNK_SIZE = 500
+
 class WebCrawlDatabaseManager:
     def __init__(self, db_name=None):
-        self.database_connection = duckdb.connect(get_db_manager(db_name).get_db_path())
+        self.database_connection = get_db_manager(db_name).get_cursor()
         self.current_timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        self.crawl_run_id: Optional[int] = None
+
+    def start_crawl_run(self, seed_url: str, max_depth: int) -> int:
+        self.crawl_run_id = self.database_connection.execute(
+            "INSERT INTO crawl_runs (seed_url, max_depth, status, started_at) VALUES (?, ?, 'running', ?) RETURNING id",
+            [seed_url, max_depth, self.current_timestamp]
+        ).fetchone()[0]
+        return self.crawl_run_id
+
+    def finish_crawl_run(self, status: str = 'completed') -> None:
+        if self.crawl_run_id is None:
+            return
+        self.database_connection.execute(
+            'UPDATE crawl_runs SET status = ?, finished_at = ? WHERE id = ?',
+            [status, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), self.crawl_run_id]
+        )
 
     def is_url_already_visited(self, url: str) -> bool:
+        # A seed has no link row when it is crawled, so marking it visited updates nothing;
+        # its page row from this run is what stops back-links from fetching it again.
         visited_url_count = self.database_connection.execute(
-            'SELECT COUNT(*) FROM links WHERE url = ? AND visited_at IS NOT NULL', 
-            [url]
+            'SELECT (SELECT COUNT(*) FROM links WHERE url = ? AND visited_at IS NOT NULL) '
+            '+ (SELECT COUNT(*) FROM pages WHERE url = ? AND run_id = ?)',
+            [url, url, self.crawl_run_id]
         ).fetchone()[0]
         return visited_url_count > 0
 
     def mark_url_as_visited(self, url: str) -> None:
-        self.database_connection.execute(
+        execute_with_conflict_retry(
+            self.database_connection,
             'UPDATE links SET visited_at = ?, updated_at = ? WHERE url = ?',
             [self.current_timestamp, self.current_timestamp, url]
         )
@@ -28,27 +55,118 @@ class WebCrawlDatabaseManager:
         ).fetchall()
         return {row[0] for row in query_results}
 
-    def store_crawled_page_data(self, crawled_page_data: CrawledPageData):
+    def store_crawled_page_data(self, crawled_page_data: CrawledPageData) -> int:
+        """Store the page row, then its links as they are consumed; returns the page's id."""
         try:
-            self.database_connection.execute(
-                'INSERT OR IGNORE INTO pages (url, source_url, depth, title, created_at) VALUES (?, ?, ?, ?, ?)',
-                [crawled_page_data.url, crawled_page_data.source_url, crawled_page_data.crawl_depth, crawled_page_data.page_title, self.current_timestamp]
-            )
+            with DB_WRITE_SECONDS.labels('store_page').time():
+                execute_with_conflict_retry(
+                    self.database_connection,
+                    'INSERT INTO pages (run_id, url, source_url, depth, title, content_hash, first_fetched_at, last_fetched_at, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) '
+                    'ON CONFLICT (url) DO UPDATE SET run_id = excluded.run_id, title = excluded.title, '
+                    'content_hash = excluded.content_hash, last_fetched_at = excluded.last_fetched_at',
+                    [self.crawl_run_id, crawled_page_data.url, crawled_page_data.source_url, crawled_page_data.crawl_depth, crawled_page_data.page_title,
+                     crawled_page_data.content_hash, self.current_timestamp, self.current_timestamp, self.current_timestamp]
+                )
             
-            page_database_id = self.database_connection.execute(
-                'SELECT id FROM pages WHERE url = ?', 
-                [crawled_page_data.url]
-            ).fetchone()[0]
+                page_database_id = self.database_connection.execute(
+                    'SELECT id FROM pages WHERE url = ?', 
+                    [crawled_page_data.url]
+                ).fetchone()[0]
             
-            for extracted_link in crawled_page_data.extracted_links:
-                self.database_connection.execute(
-                    'INSERT OR IGNORE INTO links (page_id, url, link_text, content) VALUES (?, ?, ?, ?)',
-                    [page_database_id, extracted_link.url, extracted_link.anchor_text, extracted_link.surrounding_content]
-                )
+                self._insert_page_links(page_database_id, crawled_page_data.extracted_links)
+            return page_database_id
             
         except Exception as database_error:
             raise database_error
 
+    def update_page_content_hash(self, page_id: int, content_hash: str) -> None:
+        execute_with_conflict_retry(
+            self.database_connection,
+            'UPDATE pages SET content_hash = ? WHERE id = ?',
+            [content_hash, page_id]
+        )
+
+    def _insert_page_links(self, page_database_id: int, extracted_links: Iterable[ExtractedLink]) -> None:
+        """Insert links in chunks of LINK_INSERT_CHUNK_SIZE, consuming extracted_links (a list or a stream) as it goes."""
+        link_iterator = iter(extracted_links)
+        while link_chunk := list(itertools.islice(link_iterator, LINK_INSERT_CHUNK_SIZE)):
+            text_ids = store_texts(
+                self.database_connection,
+                [text for extracted_link in link_chunk for text in (extracted_link.anchor_text, extracted_link.surrounding_content)]
+            )
+            placeholders = ", ".join(["(?, ?, ?, ?, ?)"] * len(link_chunk))
+            params = [
+                value
+                for extracted_link in link_chunk
+                for value in (self.crawl_run_id, page_database_id, extracted_link.url,
+                              text_ids[extracted_link.anchor_text], text_ids[extracted_link.surrounding_content])
+            ]
+            self.database_connection.execute(
+                f'INSERT INTO links (run_id, page_id, url, link_text_id, content_id) VALUES {placeholders}',
+                params
+            )
+
+    def select_pages_due_for_recrawl(self, seed_url: str, fetch_budget: int, default_change_rate_per_hour: float,
+                                     min_change_probability: float = 0.0) -> List[RecrawlCandidate]:
+        """Rank the seed's pages by the probability that they changed since their last fetch.
+
+        Changes are modelled as a Poisson process, so a page with change rate r (per hour)
+        fetched h hours ago has changed with probability 1 - exp(-r * h).
+        """
+        query_results = self.database_connection.execute("""
+            WITH scored_pages AS (
+                SELECT
+                    id, url, source_url, depth, content_hash,
+                    COALESCE(fetch_count, 1) AS fetch_count,
+                    COALESCE(change_count, 0) AS change_count,
+                    COALESCE(first_fetched_at, created_at) AS first_fetched_at,
+                    1 - exp(-COALESCE(change_rate, ?)
+                            * (epoch(?::TIMESTAMP) - epoch(COALESCE(last_fetched_at, created_at))) / 3600.0)
+                        AS change_probability
+                FROM pages
+                WHERE run_id IN (SELECT id FROM crawl_runs WHERE seed_url = ?)
+            )
+            SELECT * FROM scored_pages
+            WHERE change_probability >= ?
+            ORDER BY change_probability DESC, id
+            LIMIT ?
+        """, [default_change_rate_per_hour, self.current_timestamp, seed_url, min_change_probability, fetch_budget]).fetchall()
+        return [RecrawlCandidate(*row) for row in query_results]
+
+    def record_page_refetch(self, page_id: int, content_hash: str, content_changed: bool, change_rate_per_hour: float) -> None:
+        self.database_connection.execute(
+            'UPDATE pages SET content_hash = ?, last_fetched_at = ?, fetch_count = COALESCE(fetch_count, 1) + 1, '
+            'change_count = COALESCE(change_count, 0) + ?, change_rate = ? WHERE id = ?',
+            [content_hash, self.current_timestamp, int(content_changed), change_rate_per_hour, page_id]
+        )
+
+    def replace_page_links(self, page_id: int, extracted_links: List[ExtractedLink]) -> int:
+        """Sync a changed page's links, keeping rows (and their classifications) that are still present.
+
+        Returns the number of newly inserted links.
+        """
+        existing_links = {
+            (url, link_text_id): link_id
+            for link_id, url, link_text_id in self.database_connection.execute(
+                'SELECT id, url, link_text_id FROM links WHERE page_id = ?', [page_id]
+            ).fetchall()
+        }
+        current_link_keys = {(extracted_link.url, compute_text_id(extracted_link.anchor_text)) for extracted_link in extracted_links}
+
+        stale_link_ids = [link_id for link_key, link_id in existing_links.items() if link_key not in current_link_keys]
+        if stale_link_ids:
+            self.database_connection.execute('DELETE FROM links WHERE id IN (SELECT UNNEST(?::BIGINT[]))', [stale_link_ids])
+
+        new_links = []
+        stored_link_keys = set(existing_links)
+        for extracted_link in extracted_links:
+            link_key = (extracted_link.url, compute_text_id(extracted_link.anchor_text))
+            if link_key not in stored_link_keys:
+                stored_link_keys.add(link_key)
+                new_links.append(extracted_link)
+        self._insert_page_links(page_id, new_links)
+        return len(new_links)
+
     def close_database_connection(self):
         if self.database_connection:
             self.database_connection.close()
@@ -0,0 +1,24 @@
+import importlib
+from typing import Any, Callable, Dict, List, Tuple
+
+
+def lazy_module_attributes(package_name: str, export_modules: Dict[str, str]) -> Tuple[Callable[[str], Any], Callable[[], List[str]]]:
+    """Build a package's module-level __getattr__ and __dir__ (PEP 562) for lazily imported exports.
+
+    export_modules maps each exported name to the relative module defining it. The module is
+    imported on first attribute access, so importing the package itself stays cheap and torch
+    or transformers load only when something that needs them is actually used.
+    """
+    package = importlib.import_module(package_name)
+
+    def __getattr__(name: str) -> Any:
+        if name not in export_modules:
+            raise AttributeError(f"module {package_name!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(export_modules[name], package_name), name)
+        setattr(package, name, value)
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted({*vars(package), *export_modules})
+
+    return __getattr__, __dir__
@@ -7,16 +7,22 @@ This module provides the primary interface for crawling websites and classifying
 
 from typing import List, Optional
 
-from .scraper import WebSiteCrawler
+from .scraper import WebSiteCrawler, IncrementalRecrawler, RecrawlConfig
 from .classifier import LinkTopicClassifier
-from .utils import logger, aggregate_topic_scores
+from .utils import (
+    logger, aggregate_topic_scores, start_metrics_export, get_run_profiler, profile_stage, end_run_profiling
+)
 from .database import get_db_manager
+from .streaming_pipeline import StreamingCrawlClassifier
+from .batch_pipeline import BatchCrawlClassifier, SeedCrawlResult, log_seed_results, read_seed_file, write_seed_results
 
 
 def crawl_website_and_classify_links(
     starting_url: str,
     maximum_crawl_depth: int,
-    additional_topic_categories: Optional[List[str]] = None
+    additional_topic_categories: Optional[List[str]] = None,
+    pipelined: bool = False,
+    profile: Optional[bool] = None
 ) -> None:
     """
     Crawl a website and classify the content of discovered links.
@@ -28,32 +34,196 @@ def crawl_website_and_classify_links(
         starting_url: The URL to start crawling from
         maximum_crawl_depth: Maximum depth to crawl (0 = only starting page)
         additional_topic_categories: Additional topic categories beyond defaults
+        pipelined: Classify newly stored links while the crawl is still running
+        profile: Profile each stage into PROFILE_DIR (defaults to the PROFILE environment variable)
         
     Raises:
         ValueError: If starting_url is invalid
         Exception: If crawling or classification fails
     """
+    start_metrics_export()
+    run_profiler = get_run_profiler(profile)
     try:
-        logger.info(f"Starting website crawl from: {starting_url}")
-        WebSiteCrawler(
-            starting_url, 
-            maximum_crawl_depth=maximum_crawl_depth
-        ).start_website_crawling()
-        
-        logger.info("Starting link classification")
-        LinkTopicClassifier(
-            starting_url, 
-            additional_topic_categories
-        ).classify_all_pending_links()
+        if pipelined:
+            logger.info(f"Starting pipelined website crawl and classification from: {starting_url}")
+            with profile_stage(run_profiler, 'crawl_and_classify'):
+                crawl_run_id = StreamingCrawlClassifier(
+                    starting_url,
+                    maximum_crawl_depth,
+                    additional_topic_categories
+                ).run()
+        else:
+            logger.info(f"Starting website crawl from: {starting_url}")
+            with profile_stage(run_profiler, 'crawl'):
+                website_crawler = WebSiteCrawler(
+                    starting_url, 
+                    maximum_crawl_depth=maximum_crawl_depth
+                )
+                website_crawler.start_website_crawling()
+            crawl_run_id = website_crawler.crawl_run_id
+            
+            logger.info(f"Starting link classification for crawl run {crawl_run_id}")
+            with profile_stage(run_profiler, 'classify'):
+                LinkTopicClassifier(
+                    starting_url, 
+                    additional_topic_categories,
+                    crawl_run_id=crawl_run_id
+                ).classify_all_pending_links()
         
         logger.info("Aggregating topic scores")
-        aggregate_topic_scores(starting_url, get_db_manager().get_db_path())
+        with profile_stage(run_profiler, 'aggregate'):
+            aggregate_topic_scores(starting_url, get_db_manager().get_db_path(), crawl_run_id)
         
         logger.info("Link classification processing completed successfully")
         
     except Exception as e:
         logger.error(f"Error during website crawling and classification: {e}")
         raise
+    finally:
+        end_run_profiling(run_profiler)
+
+
+def recrawl_website_and_classify_links(
+    starting_url: str,
+    fetch_budget: int,
+    additional_topic_categories: Optional[List[str]] = None,
+    profile: Optional[bool] = None
+) -> None:
+    """
+    Incrementally recrawl a previously crawled website and classify only new links.
+    
+    Pages are re-fetched in order of their estimated probability of having changed,
+    up to fetch_budget pages. Links of unchanged pages keep their classifications.
+    
+    Args:
+        starting_url: The seed URL of the earlier crawl
+        fetch_budget: Maximum number of pages to re-fetch in this run
+        additional_topic_categories: Additional topic categories beyond defaults
+        profile: Profile each stage into PROFILE_DIR (defaults to the PROFILE environment variable)
+    """
+    start_metrics_export()
+    run_profiler = get_run_profiler(profile)
+    try:
+        logger.info(f"Starting incremental recrawl of: {starting_url}")
+        recrawler = IncrementalRecrawler(starting_url, RecrawlConfig(fetch_budget=fetch_budget))
+        with profile_stage(run_profiler, 'recrawl'):
+            recrawl_summary = recrawler.start_recrawl()
+
+        if recrawl_summary['new_links']:
+            logger.info(f"Classifying {recrawl_summary['new_links']} new links from recrawl run {recrawler.crawl_run_id}")
+            with profile_stage(run_profiler, 'classify'):
+                LinkTopicClassifier(
+                    starting_url,
+                    additional_topic_categories,
+                    crawl_run_id=recrawler.crawl_run_id
+                ).classify_all_pending_links()
+
+        logger.info("Incremental recrawl completed successfully")
+
+    except Exception as e:
+        logger.error(f"Error during incremental recrawl: {e}")
+        raise
+    finally:
+        end_run_profiling(run_profiler)
+
+
+def classify_crawl_run_links(
+    starting_url: str,
+    additional_topic_categories: Optional[List[str]] = None,
+    crawl_run_id: Optional[int] = None,
+    profile: Optional[bool] = None
+) -> None:
+    """
+    Classify the links of an existing crawl run against the current topic set, without crawling.
+
+    Links that already have scores are only scored for the topics they are missing, so adding
+    a topic to an earlier run costs one topic's worth of inference per link.
+
+    Args:
+        starting_url: The seed URL of the earlier crawl
+        additional_topic_categories: Additional topic categories beyond defaults
+        crawl_run_id: Crawl run to classify (defaults to the latest run of starting_url)
+        profile: Profile each stage into PROFILE_DIR (defaults to the PROFILE environment variable)
+
+    Raises:
+        ValueError: If starting_url has no crawl run
+    """
+    start_metrics_export()
+    run_profiler = get_run_profiler(profile)
+    try:
+        link_classifier = LinkTopicClassifier(
+            starting_url,
+            additional_topic_categories,
+            crawl_run_id=crawl_run_id
+        )
+        crawl_run_id = link_classifier.classification_queue_manager.crawl_run_id
+        if crawl_run_id is None:
+            link_classifier.close()
+            raise ValueError(f"No crawl run found for {starting_url}")
+
+        logger.info(f"Classifying missing topics for crawl run {crawl_run_id}")
+        with profile_stage(run_profiler, 'classify'):
+            link_classifier.classify_all_pending_links()
+
+        logger.info("Aggregating topic scores")
+        with profile_stage(run_profiler, 'aggregate'):
+            aggregate_topic_scores(starting_url, get_db_manager().get_db_path(), crawl_run_id)
+
+    except Exception as e:
+        logger.error(f"Error during classification of crawl run: {e}")
+        raise
+    finally:
+        end_run_profiling(run_profiler)
+
+
+def crawl_seed_file_and_classify_links(
+    seed_file_path: str,
+    maximum_crawl_depth: int,
+    additional_topic_categories: Optional[List[str]] = None,
+    concurrency: Optional[int] = None,
+    output_path: Optional[str] = None,
+    profile: Optional[bool] = None
+) -> List[SeedCrawlResult]:
+    """
+    Crawl every seed in a file concurrently and classify all of their links with one model.
+    
+    The model is loaded once for the whole batch, and each seed's links are classified as
+    soon as its crawl finishes while the other seeds are still being crawled.
+    
+    Args:
+        seed_file_path: File with one seed URL per line ('#' lines are comments)
+        maximum_crawl_depth: Maximum depth to crawl from each seed
+        additional_topic_categories: Additional topic categories beyond defaults
+        concurrency: Seeds crawled at the same time (defaults to BATCH_CRAWL_CONCURRENCY, 4)
+        output_path: Also write the per-seed results to this file, one JSON line per seed
+        profile: Profile the batch into PROFILE_DIR (defaults to the PROFILE environment variable)
+        
+    Returns:
+        One result per seed with its crawl run, status and average topic scores
+    """
+    start_metrics_export()
+    run_profiler = get_run_profiler(profile)
+    try:
+        seed_urls = read_seed_file(seed_file_path)
+        with profile_stage(run_profiler, 'batch_crawl_and_classify'):
+            seed_results = BatchCrawlClassifier(
+                seed_urls,
+                maximum_crawl_depth,
+                additional_topic_categories,
+                concurrency=concurrency
+            ).run()
+        
+        log_seed_results(seed_results)
+        if output_path:
+            write_seed_results(seed_results, output_path)
+            logger.info(f"Per-seed results written to {output_path}")
+        return seed_results
+        
+    except Exception as e:
+        logger.error(f"Error during batch crawling and classification: {e}")
+        raise
+    finally:
+        end_run_profiling(run_profiler)
 
 
 if __name__ == "__main__":
@@ -63,12 +233,13 @@ if __name__ == "__main__":
     
     # Simple fallback for direct execution
     import sys
-    if len(sys.argv) > 1:
-        url = sys.argv[1]
-        depth = int(sys.argv[2]) if len(sys.argv) > 2 else 2
-        topics = sys.argv[3:] if len(sys.argv) > 3 else None
-        crawl_website_and_classify_links(url, depth, topics)
+    arguments = [argument for argument in sys.argv[1:] if argument != '--profile']
+    if arguments:
+        url = arguments[0]
+        depth = int(arguments[1]) if len(arguments) > 1 else 2
+        topics = arguments[2:] if len(arguments) > 2 else None
+        crawl_website_and_classify_links(url, depth, topics, profile=True if '--profile' in sys.argv else None)
     else:
-        print("Usage: python main.py <url> [depth] [topics...]")
+        print("Usage: python main.py [--profile] <url> [depth] [topics...]")
         print("Or use: poetry run poe scrape-url <url> [depth]")
         print("Or use: poetry run poe scrape-with-topics <url> [depth] [topics...]")
\ No newline at end of file
@@ -1,13 +1,20 @@
-from .models import (
-    WebScrapingConfig,
-    ExtractedLink,
-    CrawledPageData,
-)
-from .crawler import WebSiteCrawler
+from ..lazy_exports import lazy_module_attributes
+
+# The database layer imports scraper.models, so the crawler modules load on first use.
+__getattr__, __dir__ = lazy_module_attributes(__name__, {
+    "WebSiteCrawler": ".crawler",
+    "WebScrapingConfig": ".models",
+    "ExtractedLink": ".models",
+    "CrawledPageData": ".models",
+    "IncrementalRecrawler": ".recrawl",
+    "RecrawlConfig": ".models",
+})
 
 __all__ = [
     "WebSiteCrawler",
     "WebScrapingConfig",
     "ExtractedLink",
     "CrawledPageData",
+    "IncrementalRecrawler",
+    "RecrawlConfig",
 ] 
\ No newline at end of file
@@ -1,5 +1,6 @@
+import hashlib
 import time
-from typing import List, Optional
+from typing import Callable, Iterable, Iterator, List, Optional
 from urllib.parse import urljoin, urlparse
 
 import requests
@@ -7,9 +8,28 @@ from requests import Response
 from bs4 import BeautifulSoup, Tag
 
 from ..database.url_db_manager import WebCrawlDatabaseManager
-from ..utils.log_handler import logger
+from ..utils.log_handler import logger, rate_limited
+from ..utils.metrics import metrics
 from .models import WebScrapingConfig, ExtractedLink, CrawledPageData
 
+FETCH_SECONDS = metrics.histogram('crawler_fetch_seconds', 'HTTP fetch time per page', ['host'])
+DOWNLOADED_BYTES = metrics.counter('crawler_downloaded_bytes_total', 'Response body bytes downloaded', ['host'])
+FETCH_FAILURES = metrics.counter('crawler_fetch_failures_total', 'Page downloads that failed', ['host'])
+PARSE_SECONDS = metrics.histogram('crawler_parse_seconds', 'Parse time per page (html: BeautifulSoup, extract: title, links, hash)', ['stage'])
+PAGES_STORED = metrics.counter('crawler_pages_stored_total', 'Pages parsed and stored')
+
+
+def dispose_parse_tree(parsed_html_document: BeautifulSoup) -> None:
+    """Free a parse tree now rather than at the next full garbage collection.
+
+    Tree nodes reference each other, so a dropped tree waits for the cyclic collector. The
+    BeautifulSoup object is not linked into the element chain that decompose() walks, so
+    decomposing only the root leaves the whole tree behind; its top-level elements go first.
+    """
+    for top_level_element in list(parsed_html_document.contents):
+        top_level_element.decompose()
+    parsed_html_document.decompose()
+
 
 class UrlValidator:
     @staticmethod
@@ -26,15 +46,21 @@ class WebpageDownloader:
         self._config = config
     
     def download_and_parse_webpage(self, url: str) -> Optional[BeautifulSoup]:
+        host = urlparse(url).netloc
         try:
-            http_response: Response = requests.get(
-                url, 
-                timeout=self._config.http_request_timeout_seconds
-            )
+            with FETCH_SECONDS.labels(host).time():
+                http_response: Response = requests.get(
+                    url, 
+                    timeout=self._config.http_request_timeout_seconds
+                )
+            DOWNLOADED_BYTES.labels(host).inc(len(http_response.content))
             http_response.raise_for_status()
-            return BeautifulSoup(http_response.text, 'html.parser')
+            with PARSE_SECONDS.labels('html').time():
+                return BeautifulSoup(http_response.text, 'html.parser')
         except requests.RequestException as e:
-            logger.error(f"Failed to download webpage from {url}: {str(e)}")
+            FETCH_FAILURES.labels(host).inc()
+            logger.error("Failed to download webpage from %s: %s", url, e,
+                         extra=rate_limited(f"host {host}", "download errors"))
             return None
 
 
@@ -68,35 +94,89 @@ class HtmlContentExtractor:
     
     def _extract_surrounding_content(self, anchor_tag: Tag) -> str:
         if anchor_tag.parent:
-            parent_text_content = anchor_tag.parent.get_text(strip=True)
-            return parent_text_content[:self._config.content_excerpt_size]
+            # Same text as parent.get_text(strip=True), but only as much of it as the excerpt needs:
+            # joining the whole parent is quadratic on pages whose links sit in one large container.
+            excerpt_parts, excerpt_length = [], 0
+            for parent_string in anchor_tag.parent.stripped_strings:
+                excerpt_parts.append(parent_string)
+                excerpt_length += len(parent_string)
+                if excerpt_length >= self._config.content_excerpt_size:
+                    break
+            return "".join(excerpt_parts)[:self._config.content_excerpt_size]
         return 'No content'
     
-    def extract_all_links_from_page(self, parsed_html_document: BeautifulSoup, base_url: str) -> List[ExtractedLink]:
-        extracted_links = []
+    def extract_all_links_from_page(self, parsed_html_document: BeautifulSoup, base_url: str) -> Iterator[ExtractedLink]:
         for anchor_tag in parsed_html_document.find_all('a', href=True):
             extracted_link = self.extract_link_from_anchor_tag(anchor_tag, base_url)
             if extracted_link:
-                extracted_links.append(extracted_link)
-        return extracted_links
+                yield extracted_link
     
     def parse_complete_webpage(self, parsed_html_document: BeautifulSoup, current_url: str, referring_url: Optional[str], crawl_depth: int) -> CrawledPageData:
         page_title = self.extract_page_title(parsed_html_document)
-        extracted_links = self.extract_all_links_from_page(parsed_html_document, current_url)
+        extracted_links = list(self.extract_all_links_from_page(parsed_html_document, current_url))
         
         return CrawledPageData(
             url=current_url,
             source_url=referring_url,
             crawl_depth=crawl_depth,
             page_title=page_title,
-            extracted_links=extracted_links
+            extracted_links=extracted_links,
+            content_hash=self.compute_content_hash(parsed_html_document, extracted_links)
         )
 
+    def stream_page_links(self, parsed_html_document: BeautifulSoup, current_url: str) -> "PageLinkStream":
+        return PageLinkStream(
+            self.extract_all_links_from_page(parsed_html_document, current_url),
+            self._start_content_digest(parsed_html_document)
+        )
+
+    def compute_content_hash(self, parsed_html_document: BeautifulSoup, extracted_links: Iterable[ExtractedLink]) -> str:
+        """Hash the visible text and link targets, ignoring markup-only changes."""
+        content_digest = self._start_content_digest(parsed_html_document)
+        for extracted_link in extracted_links:
+            content_digest.update(b'\0' + extracted_link.url.encode('utf-8'))
+        return content_digest.hexdigest()
+
+    @staticmethod
+    def _start_content_digest(parsed_html_document: BeautifulSoup):
+        return hashlib.sha256(parsed_html_document.get_text(" ", strip=True).encode('utf-8'))
+
+
+class PageLinkStream:
+    """A page's links, yielded once and straight from the parse tree.
+
+    Each link URL is added to the content hash and to link_urls as it is yielded, so the
+    crawler can store links chunk by chunk instead of collecting the page's links first.
+    content_hash() matches compute_content_hash once the stream is exhausted.
+    """
+
+    def __init__(self, extracted_links: Iterator[ExtractedLink], content_digest):
+        self._extracted_links = extracted_links
+        self._content_digest = content_digest
+        self.link_urls: List[str] = []
+        self.extract_seconds = 0.0
+
+    def __iter__(self) -> Iterator[ExtractedLink]:
+        while True:
+            started = time.perf_counter()
+            extracted_link = next(self._extracted_links, None)
+            self.extract_seconds += time.perf_counter() - started
+            if extracted_link is None:
+                return
+            self._content_digest.update(b'\0' + extracted_link.url.encode('utf-8'))
+            self.link_urls.append(extracted_link.url)
+            yield extracted_link
+
+    def content_hash(self) -> str:
+        return self._content_digest.hexdigest()
+
 
 class RecursiveWebCrawler:
-    def __init__(self, config: WebScrapingConfig, database_manager: WebCrawlDatabaseManager):
+    def __init__(self, config: WebScrapingConfig, database_manager: WebCrawlDatabaseManager,
+                 page_stored_callback: Optional[Callable[[CrawledPageData], None]] = None):
         self._config = config
         self._database_manager = database_manager
+        self._page_stored_callback = page_stored_callback
         self._webpage_downloader = WebpageDownloader(config)
         self._html_content_extractor = HtmlContentExtractor(config)
         self._total_pages_crawled = 0
@@ -113,9 +193,26 @@ class RecursiveWebCrawler:
         if not parsed_html_document:
             return None
         
-        crawled_page_data = self._html_content_extractor.parse_complete_webpage(parsed_html_document, url, referring_url, crawl_depth)
+        try:
+            extract_started = time.perf_counter()
+            page_title = self._html_content_extractor.extract_page_title(parsed_html_document)
+            page_link_stream = self._html_content_extractor.stream_page_links(parsed_html_document, url)
+            extract_seconds = time.perf_counter() - extract_started
+            # The page row goes in first so its links can be written in chunks while they are
+            # extracted; the content hash covers every link URL, so it is set once they are all stored.
+            crawled_page_data = CrawledPageData(url, referring_url, crawl_depth, page_title, page_link_stream)
+            page_database_id = self._database_manager.store_crawled_page_data(crawled_page_data)
+        finally:
+            dispose_parse_tree(parsed_html_document)
+        PARSE_SECONDS.labels('extract').observe(extract_seconds + page_link_stream.extract_seconds)
         
-        self._database_manager.store_crawled_page_data(crawled_page_data)
+        crawled_page_data.extracted_links = []
+        crawled_page_data.link_urls = page_link_stream.link_urls
+        crawled_page_data.content_hash = page_link_stream.content_hash()
+        self._database_manager.update_page_content_hash(page_database_id, crawled_page_data.content_hash)
+        PAGES_STORED.inc()
+        if self._page_stored_callback:
+            self._page_stored_callback(crawled_page_data)
         
         return crawled_page_data
     
@@ -127,8 +224,8 @@ class RecursiveWebCrawler:
         self._total_pages_crawled += 1
         
         logger.info(
-            f"Crawling webpage: {url} (depth: {current_depth}, "
-            f"pages crawled: {self._total_pages_crawled}/{self._config.max_urls_to_crawl})"
+            "Crawling webpage: %s (depth: %d, pages crawled: %d/%d)",
+            url, current_depth, self._total_pages_crawled, self._config.max_urls_to_crawl
         )
         
         time.sleep(self._config.request_delay_seconds)
@@ -137,8 +234,11 @@ class RecursiveWebCrawler:
         if not crawled_page_data:
             return
         
-        for extracted_link in crawled_page_data.extracted_links:
-            self.crawl_website_recursively(extracted_link.url, url, current_depth + 1, maximum_crawl_depth)
+        # The links are stored; only their URLs stay on the stack while the crawl descends.
+        child_urls = crawled_page_data.link_urls
+        crawled_page_data = None
+        for child_url in child_urls:
+            self.crawl_website_recursively(child_url, url, current_depth + 1, maximum_crawl_depth)
     
     @property
     def total_pages_crawled_count(self) -> int:
@@ -146,7 +246,8 @@ class RecursiveWebCrawler:
 
 
 class WebSiteCrawler:
-    def __init__(self, starting_url: str, maximum_crawl_depth: int, config: Optional[WebScrapingConfig] = None):
+    def __init__(self, starting_url: str, maximum_crawl_depth: int, config: Optional[WebScrapingConfig] = None,
+                 page_stored_callback: Optional[Callable[[CrawledPageData], None]] = None):
         if not UrlValidator.is_valid_url(starting_url):
             raise ValueError(f"Invalid starting URL provided: {starting_url}")
         
@@ -156,20 +257,27 @@ class WebSiteCrawler:
         self._maximum_crawl_depth = maximum_crawl_depth
         self._crawling_config = config or WebScrapingConfig()
         self._database_manager = WebCrawlDatabaseManager()
-        self._recursive_crawler = RecursiveWebCrawler(self._crawling_config, self._database_manager)
+        self._recursive_crawler = RecursiveWebCrawler(self._crawling_config, self._database_manager, page_stored_callback)
     
+    def begin_crawl_run(self) -> int:
+        """Register the crawl run up front, so consumers can follow it before crawling starts."""
+        return self._database_manager.crawl_run_id or self._database_manager.start_crawl_run(self._starting_url, self._maximum_crawl_depth)
+
     def start_website_crawling(self) -> None:
         try:
-            logger.info(f"Starting website crawl from {self._starting_url} with maximum depth {self._maximum_crawl_depth}")
+            crawl_run_id = self.begin_crawl_run()
+            logger.info(f"Starting website crawl run {crawl_run_id} from {self._starting_url} with maximum depth {self._maximum_crawl_depth}")
             self._recursive_crawler.crawl_website_recursively(
                 self._starting_url, 
                 None, 
                 0, 
                 self._maximum_crawl_depth
             )
+            self._database_manager.finish_crawl_run('completed')
             logger.info(f"Website crawling completed. Total pages crawled: {self._recursive_crawler.total_pages_crawled_count}")
         except Exception as e:
             logger.error(f"Website crawling failed with error: {str(e)}")
+            self._database_manager.finish_crawl_run('failed')
             raise
         finally:
             self._cleanup_database_resources()
@@ -185,3 +293,7 @@ class WebSiteCrawler:
     def total_pages_crawled_count(self) -> int:
         return self._recursive_crawler.total_pages_crawled_count
 
+    @property
+    def crawl_run_id(self) -> Optional[int]:
+        return self._database_manager.crawl_run_id
+
@@ -1,5 +1,6 @@
-from typing import List, Optional
-from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, List, Optional
+from dataclasses import dataclass, field
 
 
 @dataclass
@@ -10,17 +11,41 @@ class WebScrapingConfig:
     http_request_timeout_seconds: int = 10
 
 
-@dataclass
+@dataclass(slots=True)
 class ExtractedLink:
     url: str
     anchor_text: str
     surrounding_content: str
 
 
-@dataclass
+@dataclass(slots=True)
 class CrawledPageData:
     url: str
     source_url: Optional[str]
     crawl_depth: int
     page_title: str
-    extracted_links: List[ExtractedLink] 
\ No newline at end of file
+    # The crawler streams links from the parse tree into the database; once the page is
+    # stored it keeps only their URLs in link_urls.
+    extracted_links: Iterable[ExtractedLink]
+    content_hash: Optional[str] = None
+    link_urls: List[str] = field(default_factory=list)
+
+
+@dataclass
+class RecrawlConfig:
+    fetch_budget: int = 32
+    default_change_rate_per_hour: float = 1 / 24
+    min_change_probability: float = 0.0
+
+
+@dataclass(slots=True)
+class RecrawlCandidate:
+    page_id: int
+    url: str
+    source_url: Optional[str]
+    crawl_depth: int
+    content_hash: Optional[str]
+    fetch_count: int
+    change_count: int
+    first_fetched_at: Optional[datetime]
+    change_probability: float 
\ No newline at end of file
@@ -0,0 +1,110 @@
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+from ..database.url_db_manager import WebCrawlDatabaseManager
+from ..utils.log_handler import logger
+from .crawler import UrlValidator, WebpageDownloader, HtmlContentExtractor, dispose_parse_tree
+from .models import WebScrapingConfig, RecrawlConfig, RecrawlCandidate
+
+
+def estimate_change_rate(revisit_count: int, change_count: int, observed_hours: float, default_change_rate_per_hour: float) -> float:
+    """Estimate a page's change rate (changes per hour) from its fetch history.
+
+    Uses the Gamma-Poisson posterior mean with the default rate as a prior worth one
+    expected change, so pages with little history stay close to the default and a page
+    that never changed still gets revisited eventually.
+    """
+    if revisit_count <= 0 or observed_hours <= 0:
+        return default_change_rate_per_hour
+    prior_hours = 1 / default_change_rate_per_hour
+    return (change_count + 1) / (observed_hours + prior_hours)
+
+
+class IncrementalRecrawler:
+    """Re-fetch the seed's pages most likely to have changed, within a fetch budget.
+
+    Unchanged pages only get their fetch statistics updated, so their links keep their
+    classifications. Changed pages have their links synced; links that are new are stored
+    under the recrawl run and are the only ones queued for classification.
+    """
+
+    def __init__(self, starting_url: str, recrawl_config: Optional[RecrawlConfig] = None,
+                 config: Optional[WebScrapingConfig] = None, db_name: str = None):
+        if not UrlValidator.is_valid_url(starting_url):
+            raise ValueError(f"Invalid starting URL provided: {starting_url}")
+
+        self._starting_url = starting_url
+        self._recrawl_config = recrawl_config or RecrawlConfig()
+        self._crawling_config = config or WebScrapingConfig()
+        self._database_manager = WebCrawlDatabaseManager(db_name)
+        self._webpage_downloader = WebpageDownloader(self._crawling_config)
+        self._html_content_extractor = HtmlContentExtractor(self._crawling_config)
+        self._recrawl_summary: Dict[str, int] = {'fetched': 0, 'changed': 0, 'unchanged': 0, 'failed': 0, 'new_links': 0}
+
+    def _recrawl_single_page(self, recrawl_candidate: RecrawlCandidate) -> None:
+        parsed_html_document = self._webpage_downloader.download_and_parse_webpage(recrawl_candidate.url)
+        if not parsed_html_document:
+            self._recrawl_summary['failed'] += 1
+            return
+
+        try:
+            crawled_page_data = self._html_content_extractor.parse_complete_webpage(
+                parsed_html_document, recrawl_candidate.url, recrawl_candidate.source_url, recrawl_candidate.crawl_depth
+            )
+        finally:
+            dispose_parse_tree(parsed_html_document)
+        content_changed = crawled_page_data.content_hash != recrawl_candidate.content_hash
+
+        fetched_at = datetime.strptime(self._database_manager.current_timestamp, '%Y-%m-%d %H:%M:%S')
+        observed_hours = (
+            (fetched_at - recrawl_candidate.first_fetched_at).total_seconds() / 3600
+            if recrawl_candidate.first_fetched_at else 0.0
+        )
+        change_rate = estimate_change_rate(
+            revisit_count=recrawl_candidate.fetch_count,
+            change_count=recrawl_candidate.change_count + int(content_changed),
+            observed_hours=observed_hours,
+            default_change_rate_per_hour=self._recrawl_config.default_change_rate_per_hour
+        )
+        self._database_manager.record_page_refetch(recrawl_candidate.page_id, crawled_page_data.content_hash, content_changed, change_rate)
+
+        self._recrawl_summary['fetched'] += 1
+        if content_changed:
+            self._recrawl_summary['changed'] += 1
+            self._recrawl_summary['new_links'] += self._database_manager.replace_page_links(
+                recrawl_candidate.page_id, crawled_page_data.extracted_links
+            )
+        else:
+            self._recrawl_summary['unchanged'] += 1
+
+    def start_recrawl(self) -> Dict[str, int]:
+        try:
+            crawl_run_id = self._database_manager.start_crawl_run(self._starting_url, 0)
+            recrawl_candidates = self._database_manager.select_pages_due_for_recrawl(
+                self._starting_url,
+                self._recrawl_config.fetch_budget,
+                self._recrawl_config.default_change_rate_per_hour,
+                self._recrawl_config.min_change_probability
+            )
+            logger.info(f"Starting recrawl run {crawl_run_id} for {self._starting_url}: {len(recrawl_candidates)} pages due")
+
+            for recrawl_candidate in recrawl_candidates:
+                logger.info("Recrawling webpage: %s (change probability: %.2f)",
+                            recrawl_candidate.url, recrawl_candidate.change_probability)
+                time.sleep(self._crawling_config.request_delay_seconds)
+                self._recrawl_single_page(recrawl_candidate)
+
+            self._database_manager.finish_crawl_run('completed')
+            logger.info(f"Recrawl completed: {self._recrawl_summary}")
+            return self._recrawl_summary
+        except Exception as e:
+            logger.error(f"Recrawl failed with error: {str(e)}")
+            self._database_manager.finish_crawl_run('failed')
+            raise
+        finally:
+            self._database_manager.close_database_connection()
+
+    @property
+    def crawl_run_id(self) -> Optional[int]:
+        return self._database_manager.crawl_run_id
@@ -0,0 +1,108 @@
+import os
+import queue
+import threading
+from typing import List, Optional
+
+from .classifier import LinkTopicClassifier
+from .classifier.link_processor import LINK_CLASSIFICATION_BATCH_SIZE
+from .scraper import WebSiteCrawler
+from .scraper.models import CrawledPageData, WebScrapingConfig
+from .utils import logger
+from .utils.metrics import QUEUE_DEPTH
+
+DEFAULT_STREAM_BUFFER_PAGES = 64
+_CRAWL_FINISHED = object()
+
+
+class ClassificationConsumerStopped(RuntimeError):
+    """Raised in the crawler thread when the classification side has stopped consuming."""
+
+
+class StreamingCrawlClassifier:
+    """Crawl a website and classify its links while the crawl is still running.
+
+    The crawler runs on a background thread and announces every stored page on a bounded
+    buffer; the calling thread loads the model and classifies newly stored links from the
+    database as announcements arrive. A full buffer blocks the crawler, so the unclassified
+    backlog stays bounded. Shutdown order: the crawler posts an end marker, the consumer
+    drains it and runs a final catch-up pass, then the crawler thread is joined.
+    """
+
+    def __init__(self, starting_url: str, maximum_crawl_depth: int,
+                 additional_topic_categories: Optional[List[str]] = None,
+                 config: Optional[WebScrapingConfig] = None, buffer_pages: int = None):
+        self._starting_url = starting_url
+        self._additional_topic_categories = additional_topic_categories
+        self._page_buffer: "queue.Queue" = queue.Queue(
+            maxsize=buffer_pages or int(os.environ.get('STREAM_BUFFER_PAGES', DEFAULT_STREAM_BUFFER_PAGES))
+        )
+        self._buffer_depth = QUEUE_DEPTH.labels('stream_pages')
+        self._consumer_stopped = threading.Event()
+        self._crawl_error: Optional[BaseException] = None
+        self._website_crawler = WebSiteCrawler(starting_url, maximum_crawl_depth, config,
+                                               page_stored_callback=self._announce_stored_page)
+
+    def _publish(self, message) -> bool:
+        while not self._consumer_stopped.is_set():
+            try:
+                self._page_buffer.put(message, timeout=0.5)
+                self._buffer_depth.set(self._page_buffer.qsize())
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _announce_stored_page(self, crawled_page_data: CrawledPageData) -> None:
+        if not self._publish(len(crawled_page_data.link_urls)):
+            raise ClassificationConsumerStopped("Link classification stopped; aborting crawl")
+
+    def _run_crawler(self) -> None:
+        try:
+            self._website_crawler.start_website_crawling()
+        except BaseException as crawl_error:
+            self._crawl_error = crawl_error
+        finally:
+            self._publish(_CRAWL_FINISHED)
+
+    def _consume_stored_pages(self, link_classifier: LinkTopicClassifier) -> int:
+        total_links_classified = 0
+        last_processed_link_id: Optional[int] = None
+        announced_links = 0
+        while True:
+            message = self._page_buffer.get()
+            self._buffer_depth.set(self._page_buffer.qsize())
+            if message is _CRAWL_FINISHED:
+                break
+            announced_links += message
+            # Classify once a batch has accumulated, or right away when the crawler is the bottleneck.
+            if announced_links >= LINK_CLASSIFICATION_BATCH_SIZE or self._page_buffer.empty():
+                links_classified, last_processed_link_id = link_classifier.classify_pending_links(last_processed_link_id)
+                total_links_classified += links_classified
+                announced_links = 0
+
+        links_classified, _ = link_classifier.classify_pending_links(last_processed_link_id)
+        return total_links_classified + links_classified
+
+    def run(self) -> int:
+        """Crawl and classify concurrently; return the crawl run id."""
+        crawl_run_id = self._website_crawler.begin_crawl_run()
+        crawler_thread = threading.Thread(target=self._run_crawler, name="website-crawler", daemon=True)
+        crawler_thread.start()
+        logger.info(f"Streaming classification for crawl run {crawl_run_id}")
+
+        link_classifier = None
+        try:
+            # The model loads while the first pages are being fetched.
+            link_classifier = LinkTopicClassifier(self._starting_url, self._additional_topic_categories,
+                                                  crawl_run_id=crawl_run_id)
+            total_links_classified = self._consume_stored_pages(link_classifier)
+            logger.info(f"Streaming classification completed: {total_links_classified} links classified")
+        finally:
+            self._consumer_stopped.set()
+            crawler_thread.join()
+            if link_classifier:
+                link_classifier.close()
+
+        if self._crawl_error:
+            raise self._crawl_error
+        return crawl_run_id
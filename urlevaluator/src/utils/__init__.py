@@ -1,10 +1,19 @@
-from .log_handler import logger
-from .analytics import aggregate_topic_scores
+from .log_handler import logger, rate_limited
+from .analytics import aggregate_topic_scores, TopicAnalytics
+from .metrics import metrics, start_metrics_export
+from .profiling import end_run_profiling, get_run_profiler, profile_stage
 from .query_db import get_db_connection, delete_all_but_eight_rows, clear_topic_columns, truncate_tables, get_table_info
 
 __all__ = [
     "logger",
+    "rate_limited",
     "aggregate_topic_scores",
+    "TopicAnalytics",
+    "metrics",
+    "start_metrics_export",
+    "get_run_profiler",
+    "end_run_profiling",
+    "profile_stage",
     "get_db_connection",
     "delete_all_but_eight_rows", 
     "clear_topic_columns",
@@ -1,29 +1,52 @@
+import argparse
+import importlib
+from typing import Dict, Optional, Sequence
+
 from .log_handler import logger
-import duckdb
+from ..database.connection import connection_registry
 
-def aggregate_topic_scores(initial_url: str, db_path: str):
-    conn = duckdb.connect(db_path)
-    query = """
-        WITH numbered_scores AS (
-            SELECT
-                l.topic_scores::JSON AS json_blob
-            FROM links l
-            JOIN pages p ON l.page_id = p.id
-            WHERE l.topic_scores IS NOT NULL
-            AND p.source_url = ?
-        ),
-        unpacked_keys AS (
+RESULT_FORMATS = ('arrow', 'pandas', 'numpy')
+BREAKDOWN_COLUMNS = {'depth': 'depth', 'domain': 'domain', 'run': 'run_id'}
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+
+
+def _topic_scores_ctes(scope_condition: str) -> str:
+    """CTEs ending in topic_scores: one row per (link, topic) with the link's run, source page depth and domain.
+
+    topic_scores JSON is parsed once per link into a MAP and unnested, instead of one
+    json_extract call per key.
+    """
+    return f"""
+        scored_links AS (
             SELECT
-                json_blob,
-                UNNEST(json_keys(json_blob)) AS topic_name
-            FROM numbered_scores
+                links.id AS link_id,
+                links.run_id,
+                links.url,
+                links.link_text_id,
+                pages.depth,
+                lower(regexp_extract(links.url, '^[A-Za-z][A-Za-z0-9+.-]*://([^/:?#]+)', 1)) AS domain,
+                UNNEST(map_entries(json_transform(links.topic_scores, '"MAP(VARCHAR, DOUBLE)"'))) AS topic_score
+            FROM links
+            LEFT JOIN pages ON pages.id = links.page_id
+            WHERE links.topic_scores IS NOT NULL
+            AND {scope_condition}
         ),
         topic_scores AS (
-            SELECT
-                topic_name AS topic,
-                CAST(json_extract_string(json_blob, '$."' || topic_name || '"') AS DOUBLE) AS score
-            FROM unpacked_keys
+            SELECT * EXCLUDE (topic_score), topic_score.key AS topic, topic_score.value AS score
+            FROM scored_links
         )
+    """
+
+
+def aggregate_topic_scores(initial_url: str, db_path: str, crawl_run_id: Optional[int] = None):
+    conn = connection_registry.cursor(db_path)
+    query = f"""
+        WITH run AS (
+            SELECT COALESCE(?::BIGINT, MAX(id)) AS id
+            FROM crawl_runs
+            WHERE seed_url = ?
+        ),
+        {_topic_scores_ctes('links.run_id = (SELECT id FROM run)')}
         SELECT
             topic,
             AVG(score) AS average_score
@@ -31,13 +54,211 @@ def aggregate_topic_scores(initial_url: str, db_path: str):
         GROUP BY topic
         ORDER BY topic;
     """
-    
-    results = conn.execute(query, [initial_url]).fetchall()
-    
+
+    results = conn.execute(query, [crawl_run_id, initial_url]).fetchall()
+
     logger.info("\nTopic Score Aggregation Results:")
     logger.info("=" * 40)
     logger.info(f"{'Topic':<15} {'Average Score':<15} ")
     logger.info("-" * 40)
     for topic, average_score in results:
         logger.info(f"{topic:<15} {average_score:.4f}")
-    conn.close()
\ No newline at end of file
+    conn.close()
+
+
+def aggregate_topic_scores_by_run(crawl_run_ids: Sequence[int], db_path: str) -> Dict[int, Dict[str, float]]:
+    """Average score per topic for each of crawl_run_ids, in one query; runs without scored links are left out."""
+    conn = connection_registry.cursor(db_path)
+    try:
+        results = conn.execute(f"""
+            WITH {_topic_scores_ctes('list_contains(?::BIGINT[], links.run_id)')}
+            SELECT run_id, topic, AVG(score) AS average_score
+            FROM topic_scores
+            GROUP BY run_id, topic
+            ORDER BY run_id, topic
+        """, [list(crawl_run_ids)]).fetchall()
+    finally:
+        conn.close()
+    average_scores_by_run: Dict[int, Dict[str, float]] = {}
+    for run_id, topic, average_score in results:
+        average_scores_by_run.setdefault(run_id, {})[topic] = average_score
+    return average_scores_by_run
+
+
+class TopicAnalytics:
+    """Topic score analytics over stored classifications, each computed by a single DuckDB query.
+
+    The scope is one crawl run (crawl_run_id), every run of a seed (seed_url), or the whole
+    database; topics optionally restricts which topics are included. Results are fetched
+    column-wise, as a pyarrow Table ('arrow'), a pandas DataFrame ('pandas') or a dict of
+    numpy arrays ('numpy', no extra dependency). Arrow and pandas need the analytics extra.
+    """
+
+    def __init__(self, db_path: str, seed_url: Optional[str] = None, crawl_run_id: Optional[int] = None,
+                 topics: Optional[Sequence[str]] = None, result_format: str = 'arrow'):
+        if result_format not in RESULT_FORMATS:
+            raise ValueError(f"Unknown result format '{result_format}', expected one of {', '.join(RESULT_FORMATS)}")
+        if result_format != 'numpy':
+            self._require_module('pyarrow' if result_format == 'arrow' else 'pandas')
+        self.result_format = result_format
+        self.connection = connection_registry.cursor(db_path)
+        scope_conditions, self._scope_params = [], []
+        if crawl_run_id is not None:
+            scope_conditions.append('links.run_id = ?')
+            self._scope_params.append(crawl_run_id)
+        elif seed_url is not None:
+            scope_conditions.append('links.run_id IN (SELECT id FROM crawl_runs WHERE seed_url = ?)')
+            self._scope_params.append(seed_url)
+        self._topic_ctes = _topic_scores_ctes(' AND '.join(scope_conditions) or 'TRUE')
+        self._topic_condition = 'TRUE'
+        if topics is not None:
+            self._topic_condition = 'list_contains(?::VARCHAR[], topic)'
+            self._scope_params.append(list(topics))
+
+    @staticmethod
+    def _require_module(module_name: str) -> None:
+        try:
+            importlib.import_module(module_name)
+        except ImportError as e:
+            raise ImportError(f"Analytics results as {module_name} objects require {module_name}: "
+                              "pip install 'urlevaluator[analytics]'") from e
+
+    def _fetch(self, select_sql: str, params: Sequence = (), extra_ctes: str = ''):
+        ctes = [self._topic_ctes, f"scoped_topic_scores AS (SELECT * FROM topic_scores WHERE {self._topic_condition})"]
+        query = f"WITH {', '.join(ctes + ([extra_ctes] if extra_ctes else []))} {select_sql}"
+        result = self.connection.execute(query, [*self._scope_params, *params])
+        if self.result_format == 'arrow':
+            return result.fetch_arrow_table()
+        if self.result_format == 'pandas':
+            return result.df()
+        return result.fetchnumpy()
+
+    def topic_summary(self):
+        """Per topic: scored links, mean, standard deviation, min and max score."""
+        return self._fetch("""
+            SELECT topic, COUNT(*) AS links, AVG(score) AS mean_score, STDDEV_SAMP(score) AS stddev_score,
+                   MIN(score) AS min_score, MAX(score) AS max_score
+            FROM scoped_topic_scores
+            GROUP BY topic
+            ORDER BY topic
+        """)
+
+    def breakdown(self, by: str, high_score_threshold: float = 0.5, min_links: int = 1):
+        """Per group of `by` ('depth' of the source page, link 'domain', or crawl 'run') and topic:
+        links, mean score and the share of links scoring at least high_score_threshold."""
+        if by not in BREAKDOWN_COLUMNS:
+            raise ValueError(f"Unknown breakdown '{by}', expected one of {', '.join(BREAKDOWN_COLUMNS)}")
+        group_column = BREAKDOWN_COLUMNS[by]
+        return self._fetch(f"""
+            SELECT {group_column}, topic, COUNT(*) AS links, AVG(score) AS mean_score,
+                   AVG(CAST(score >= ? AS DOUBLE)) AS high_score_share
+            FROM scoped_topic_scores
+            GROUP BY {group_column}, topic
+            HAVING COUNT(*) >= ?
+            ORDER BY {group_column}, topic
+        """, [high_score_threshold, min_links])
+
+    def score_histogram(self, bins: int = 10):
+        """Per topic: link counts in bins equal-width score bins over [0, 1], including empty bins."""
+        if bins < 1:
+            raise ValueError("bins must be at least 1")
+        binned_cte = f"""
+            binned AS (
+                SELECT topic, GREATEST(LEAST(CAST(floor(score * {bins}) AS INTEGER), {bins - 1}), 0) AS bin
+                FROM scoped_topic_scores
+            )
+        """
+        return self._fetch(f"""
+            SELECT topics.topic, bins.bin, bins.bin / {bins} AS bin_start, (bins.bin + 1) / {bins} AS bin_end,
+                   COUNT(binned.bin) AS links
+            FROM (SELECT DISTINCT topic FROM binned) topics
+            CROSS JOIN range({bins}) bins(bin)
+            LEFT JOIN binned ON binned.topic = topics.topic AND binned.bin = bins.bin
+            GROUP BY topics.topic, bins.bin
+            ORDER BY topics.topic, bins.bin
+        """, extra_ctes=binned_cte)
+
+    def score_quantiles(self, quantiles: Sequence[float] = DEFAULT_QUANTILES):
+        """Per topic: approximate score quantiles (t-digest), one column per quantile named like p50 or p99.9."""
+        if not quantiles or not all(0 <= quantile <= 1 for quantile in quantiles):
+            raise ValueError("quantiles must be between 0 and 1")
+        quantile_columns = ", ".join(f'approx_quantile(score, {float(quantile)}) AS "p{quantile * 100:g}"'
+                                     for quantile in quantiles)
+        return self._fetch(f"""
+            SELECT topic, COUNT(*) AS links, {quantile_columns}
+            FROM scoped_topic_scores
+            GROUP BY topic
+            ORDER BY topic
+        """)
+
+    def top_links(self, k: int = 10):
+        """Per topic: the k highest-scoring links with their rank, score, url, anchor text, run and depth."""
+        return self._fetch("""
+            SELECT ranked.topic, ranked.rank, ranked.score, ranked.url, texts.content AS link_text,
+                   ranked.run_id, ranked.depth, ranked.link_id
+            FROM (
+                SELECT *, row_number() OVER (PARTITION BY topic ORDER BY score DESC, link_id) AS rank
+                FROM scoped_topic_scores
+                QUALIFY rank <= ?
+            ) ranked
+            LEFT JOIN texts ON texts.id = ranked.link_text_id
+            ORDER BY ranked.topic, ranked.rank
+        """, [k])
+
+    def close(self) -> None:
+        if self.connection:
+            self.connection.close()
+            self.connection = None
+
+
+REPORTS = ('summary', 'depth', 'domain', 'run', 'histogram', 'quantiles', 'top')
+
+
+def format_columns(columns: Dict) -> str:
+    """Plain-text table of a column dict as returned with result_format='numpy'."""
+    column_names = list(columns)
+    rows = [[f"{value:.4f}" if isinstance(value, float) else str(value) for value in row]
+            for row in zip(*(columns[name].tolist() for name in column_names))]
+    widths = [max([len(name)] + [len(row[index]) for row in rows]) for index, name in enumerate(column_names)]
+    lines = ["  ".join(name.ljust(width) for name, width in zip(column_names, widths)).rstrip()]
+    lines.append("  ".join("-" * width for width in widths))
+    lines.extend("  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip() for row in rows)
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Print topic score analytics for the crawl database (DB_NAME)")
+    parser.add_argument('seed_url', nargs='?', help='limit to crawls of this seed (the latest one for the summary)')
+    parser.add_argument('--run-id', type=int, help='limit to this crawl run')
+    parser.add_argument('--report', choices=REPORTS, default='summary')
+    parser.add_argument('--topics', nargs='+', help='only these topics')
+    parser.add_argument('--bins', type=int, default=10, help='histogram bins')
+    parser.add_argument('--top-k', type=int, default=10, help='links per topic for the top report')
+    parser.add_argument('--min-links', type=int, default=1, help='smallest group shown by the depth, domain and run reports')
+    arguments = parser.parse_args(argv)
+
+    from ..database.init_db import get_db_manager
+
+    db_path = get_db_manager().get_db_path()
+    if arguments.report == 'summary' and arguments.seed_url and not arguments.topics:
+        aggregate_topic_scores(arguments.seed_url, db_path, arguments.run_id)
+        return
+    topic_analytics = TopicAnalytics(db_path, arguments.seed_url, arguments.run_id, arguments.topics, result_format='numpy')
+    try:
+        if arguments.report == 'summary':
+            report = topic_analytics.topic_summary()
+        elif arguments.report in BREAKDOWN_COLUMNS:
+            report = topic_analytics.breakdown(arguments.report, min_links=arguments.min_links)
+        elif arguments.report == 'histogram':
+            report = topic_analytics.score_histogram(arguments.bins)
+        elif arguments.report == 'quantiles':
+            report = topic_analytics.score_quantiles()
+        else:
+            report = topic_analytics.top_links(arguments.top_k)
+    finally:
+        topic_analytics.close()
+    print(format_columns(report))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,232 @@
+import atexit
+import json
 import logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(filename)s:%(lineno)d - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
\ No newline at end of file
+import logging.handlers
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+TEXT_LOG_FORMAT = '%(asctime)s - %(filename)s:%(lineno)d - %(levelname)s - %(message)s'
+DEFAULT_RATE_LIMIT_BURST = 5
+DEFAULT_RATE_LIMIT_WINDOW_SECONDS = 60
+RATE_LIMIT_SWEEP_SECONDS = 1.0
+_STANDARD_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+
+def rate_limited(key: str, event: str) -> Dict[str, str]:
+    """The `extra` of a log call that is rate limited per key, e.g. extra=rate_limited(f"host {host}", "download errors").
+
+    Only the first LOG_RATE_LIMIT_BURST records per key and window are written. When the
+    window closes, the rest are summarised as "host example.com: 4,312 download errors in
+    the last 60s (4,307 not logged)".
+    """
+    return {'rate_limit_key': key, 'rate_limit_event': event}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with any `extra` fields of the call as top-level keys."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        log_entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'file': record.filename,
+            'line': record.lineno,
+            'thread': record.threadName,
+        }
+        log_entry.update({name: value for name, value in vars(record).items() if name not in _STANDARD_RECORD_ATTRIBUTES})
+        if record.exc_info:
+            log_entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(log_entry, default=str)
+
+
+class _RateLimitWindow:
+    __slots__ = ('started', 'count', 'first_record')
+
+    def __init__(self, started: float, first_record: logging.LogRecord):
+        self.started = started
+        self.count = 0
+        self.first_record = first_record
+
+
+class RateLimitFilter(logging.Filter):
+    """Passes at most burst records per rate_limit_key and window to its handler, then summarises the rest.
+
+    Summaries are written through the same handler when a window closes, from a background
+    sweep every second, and for all open windows on close().
+    """
+
+    def __init__(self, handler: logging.Handler, burst: int = DEFAULT_RATE_LIMIT_BURST,
+                 window_seconds: float = DEFAULT_RATE_LIMIT_WINDOW_SECONDS):
+        super().__init__()
+        self.handler = handler
+        self.burst = burst
+        self.window_seconds = window_seconds
+        self._windows: Dict[str, _RateLimitWindow] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        handler.addFilter(self)
+        self._sweeper = threading.Thread(target=self._sweep_expired_windows, name="log-rate-limit", daemon=True)
+        self._sweeper.start()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate_limit_key = getattr(record, 'rate_limit_key', None)
+        if rate_limit_key is None or getattr(record, 'rate_limit_summary', False):
+            return True
+        now = time.monotonic()
+        expired_window = None
+        with self._lock:
+            window = self._windows.get(rate_limit_key)
+            if window is None or now - window.started >= self.window_seconds:
+                expired_window = window
+                window = self._windows[rate_limit_key] = _RateLimitWindow(now, record)
+            window.count += 1
+            admitted = window.count <= self.burst
+        if expired_window is not None:
+            self._write_summary(rate_limit_key, expired_window, now)
+        return admitted
+
+    def _write_summary(self, rate_limit_key: str, window: _RateLimitWindow, now: float) -> None:
+        suppressed_count = window.count - self.burst
+        if suppressed_count <= 0:
+            return
+        first_record = window.first_record
+        event = getattr(first_record, 'rate_limit_event', 'messages')
+        summary_record = logging.LogRecord(
+            first_record.name, first_record.levelno, first_record.pathname, first_record.lineno,
+            "%s: %s %s in the last %ds (%s not logged)",
+            (rate_limit_key, f"{window.count:,}", event, round(min(now - window.started, self.window_seconds)),
+             f"{suppressed_count:,}"),
+            None,
+        )
+        summary_record.__dict__.update(rate_limit_key=rate_limit_key, rate_limit_event=event, rate_limit_summary=True,
+                                       rate_limit_count=window.count, rate_limit_suppressed=suppressed_count)
+        self.handler.handle(summary_record)
+
+    def flush(self, force: bool = False) -> None:
+        now = time.monotonic()
+        with self._lock:
+            expired_keys = [rate_limit_key for rate_limit_key, window in self._windows.items()
+                            if force or now - window.started >= self.window_seconds]
+            expired_windows = [(rate_limit_key, self._windows.pop(rate_limit_key)) for rate_limit_key in expired_keys]
+        for rate_limit_key, window in expired_windows:
+            self._write_summary(rate_limit_key, window, now)
+
+    def _sweep_expired_windows(self) -> None:
+        while not self._stopped.wait(RATE_LIMIT_SWEEP_SECONDS):
+            self.flush()
+
+    def close(self) -> None:
+        self._stopped.set()
+        self._sweeper.join()
+        self.flush(force=True)
+
+
+class DeferredFormattingQueueHandler(logging.handlers.QueueHandler):
+    """Enqueues records as they are, so %-style arguments are formatted on the listener thread.
+
+    The stock QueueHandler formats in the calling thread so records can be pickled; the
+    listener here is a thread in the same process, so that is not needed.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class _LoggingSetup:
+    def __init__(self, root_handler: logging.Handler, rate_limit_filter: RateLimitFilter,
+                 listener: Optional[logging.handlers.QueueListener], log_format: str):
+        self.root_handler = root_handler
+        self.rate_limit_filter = rate_limit_filter
+        self.listener = listener
+        self.log_format = log_format
+
+    def close(self) -> None:
+        self.rate_limit_filter.close()
+        if self.listener:
+            self.listener.stop()
+
+
+_logging_setups: List[_LoggingSetup] = []
+
+
+def configure_logging(log_format: Optional[str] = None, level: Optional[str] = None,
+                      asynchronous: Optional[bool] = None, force: bool = False) -> None:
+    """Send the root logger to stderr through a queue, with per-key rate limiting.
+
+    Like logging.basicConfig, this does nothing if the root logger already has handlers,
+    unless force is set. Settings default to LOG_FORMAT (text or json), LOG_LEVEL (INFO),
+    LOG_ASYNC (1; 0 writes from the calling thread), LOG_RATE_LIMIT_BURST (5) and
+    LOG_RATE_LIMIT_WINDOW_SECONDS (60). The queue is unbounded, so logging never blocks;
+    queued records are written at exit.
+    """
+    root_logger = logging.getLogger()
+    if root_logger.handlers and not force:
+        return
+    log_format = log_format or os.environ.get('LOG_FORMAT', 'text')
+    if log_format not in ('text', 'json'):
+        raise ValueError(f"Unknown LOG_FORMAT '{log_format}', expected text or json")
+    shutdown_logging()
+    for existing_handler in list(root_logger.handlers):
+        root_logger.removeHandler(existing_handler)
+
+    asynchronous = asynchronous if asynchronous is not None else os.environ.get('LOG_ASYNC', '1') == '1'
+    _add_root_handler(log_format, asynchronous)
+    root_logger.setLevel(level or os.environ.get('LOG_LEVEL', 'INFO'))
+
+
+def _add_root_handler(log_format: str, asynchronous: bool) -> None:
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(JsonFormatter() if log_format == 'json' else logging.Formatter(TEXT_LOG_FORMAT))
+
+    listener = None
+    root_handler = stream_handler
+    if asynchronous:
+        log_queue = queue.SimpleQueue()
+        root_handler = DeferredFormattingQueueHandler(log_queue)
+        listener = logging.handlers.QueueListener(log_queue, stream_handler)
+        listener.start()
+    rate_limit_filter = RateLimitFilter(
+        root_handler,
+        int(os.environ.get('LOG_RATE_LIMIT_BURST', DEFAULT_RATE_LIMIT_BURST)),
+        float(os.environ.get('LOG_RATE_LIMIT_WINDOW_SECONDS', DEFAULT_RATE_LIMIT_WINDOW_SECONDS)),
+    )
+    logging.getLogger().addHandler(root_handler)
+    _logging_setups.append(_LoggingSetup(root_handler, rate_limit_filter, listener, log_format))
+
+
+def shutdown_logging() -> None:
+    """Write pending rate-limit summaries and drain the queue; registered to run at exit."""
+    while _logging_setups:
+        logging_setup = _logging_setups.pop()
+        logging_setup.close()
+        logging.getLogger().removeHandler(logging_setup.root_handler)
+
+
+def _log_synchronously_after_fork() -> None:
+    """Give a forked child (e.g. an inference worker) its own setup that writes from the calling thread.
+
+    The listener and sweeper threads do not survive a fork, so records queued in the child
+    would never be written. The inherited setups are dropped without closing them, which
+    would write the parent's pending records and summaries a second time.
+    """
+    if not _logging_setups:
+        return
+    log_format = _logging_setups[-1].log_format
+    root_logger = logging.getLogger()
+    for logging_setup in _logging_setups:
+        root_logger.removeHandler(logging_setup.root_handler)
+    _logging_setups.clear()
+    _add_root_handler(log_format, asynchronous=False)
+
+
+configure_logging()
+atexit.register(shutdown_logging)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_log_synchronously_after_fork)
+logger = logging.getLogger(__name__)
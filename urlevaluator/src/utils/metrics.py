@@ -0,0 +1,286 @@
+import atexit
+import bisect
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .log_handler import logger
+
+DEFAULT_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+DEFAULT_METRICS_DUMP_INTERVAL_SECONDS = 15
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape_label_value(label_value: str) -> str:
+    return label_value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(label_names: Sequence[str], label_values: Sequence[str], extra_label: Optional[Tuple[str, str]] = None) -> str:
+    label_pairs = list(zip(label_names, label_values)) + ([extra_label] if extra_label else [])
+    if not label_pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape_label_value(value)}"' for name, value in label_pairs) + '}'
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != float('inf') else '+Inf'
+
+
+class _CounterChild:
+    __slots__ = ('value', '_lock')
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+
+class _HistogramChild:
+    __slots__ = ('bucket_bounds', 'bucket_counts', 'sum', 'count', '_lock')
+
+    def __init__(self, bucket_bounds: Tuple[float, ...]):
+        self.bucket_bounds = bucket_bounds
+        self.bucket_counts = [0] * (len(bucket_bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        bucket_index = bisect.bisect_left(self.bucket_bounds, value)
+        with self._lock:
+            self.bucket_counts[bucket_index] += 1
+            self.sum += value
+            self.count += 1
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+
+class Metric(ABC):
+    """A named metric with optional labels; each label combination is a child created on first use.
+
+    Call sites resolve their child once with labels(...) where they can, so the hot path is a
+    dict lookup at most and a short lock around the update.
+    """
+    metric_type = 'untyped'
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def _new_child(self):
+        """The per-label-combination object that holds the values."""
+
+    def labels(self, *label_values) -> object:
+        label_values = tuple(str(label_value) for label_value in label_values)
+        child = self._children.get(label_values)
+        if child is None:
+            if len(label_values) != len(self.label_names):
+                raise ValueError(f"{self.name} expects labels {self.label_names}, got {label_values}")
+            with self._lock:
+                child = self._children.setdefault(label_values, self._new_child())
+        return child
+
+    def _samples(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.label_names, label_values)} {_format_value(child.value)}"
+                for label_values, child in list(self._children.items())]
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.metric_type}", *self._samples()]
+
+
+class Counter(Metric):
+    metric_type = 'counter'
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+
+class Gauge(Metric):
+    metric_type = 'gauge'
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+
+class Histogram(Metric):
+    metric_type = 'histogram'
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        super().__init__(name, help_text, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def time(self):
+        return self.labels().time()
+
+    def _samples(self) -> List[str]:
+        samples = []
+        for label_values, child in list(self._children.items()):
+            with child._lock:
+                bucket_counts, observed_sum, observed_count = list(child.bucket_counts), child.sum, child.count
+            cumulative_count = 0
+            for upper_bound, bucket_count in zip((*self.buckets, float('inf')), bucket_counts):
+                cumulative_count += bucket_count
+                bucket_labels = _format_labels(self.label_names, label_values, ('le', _format_value(upper_bound)))
+                samples.append(f"{self.name}_bucket{bucket_labels} {cumulative_count}")
+            series_labels = _format_labels(self.label_names, label_values)
+            samples.append(f"{self.name}_sum{series_labels} {_format_value(observed_sum)}")
+            samples.append(f"{self.name}_count{series_labels} {observed_count}")
+        return samples
+
+
+class MetricsRegistry:
+    """Process-wide set of metrics, rendered in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric_class: type, name: str, help_text: str, label_names: Sequence[str], **options) -> Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = metric_class(name, help_text, label_names, **options)
+            elif not isinstance(metric, metric_class) or metric.label_names != tuple(label_names):
+                raise ValueError(f"Metric {name} is already registered with a different type or labels")
+            return metric
+
+    def counter(self, name: str, help_text: str, label_names: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, help_text, label_names)
+
+    def gauge(self, name: str, help_text: str, label_names: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge, name, help_text, label_names)
+
+    def histogram(self, name: str, help_text: str, label_names: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, help_text, label_names, buckets=buckets)
+
+    def render(self) -> str:
+        with self._lock:
+            registered_metrics = list(self._metrics.values())
+        return "\n".join(line for metric in registered_metrics for line in metric.render()) + "\n"
+
+
+metrics = MetricsRegistry()
+QUEUE_DEPTH = metrics.gauge('pipeline_queue_depth', 'Items waiting in an in-process pipeline queue', ['queue'])
+
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    server: "MetricsServer"
+
+    def do_GET(self) -> None:
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        response_body = self.server.registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", PROMETHEUS_CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(response_body)))
+        self.end_headers()
+        self.wfile.write(response_body)
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+class MetricsServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, registry: MetricsRegistry, host: str, port: int):
+        self.registry = registry
+        super().__init__((host, port), MetricsRequestHandler)
+
+
+def start_metrics_server(port: int, host: str = '127.0.0.1', registry: MetricsRegistry = metrics) -> MetricsServer:
+    """Serve GET /metrics for a Prometheus scraper on a background thread."""
+    metrics_server = MetricsServer(registry, host, port)
+    threading.Thread(target=metrics_server.serve_forever, name="metrics-server", daemon=True).start()
+    logger.info(f"Serving metrics on http://{host}:{metrics_server.server_address[1]}/metrics")
+    return metrics_server
+
+
+class MetricsFileDumper:
+    """Rewrite a Prometheus text file every interval_seconds (e.g. for node_exporter's textfile collector)."""
+
+    def __init__(self, file_path: str, interval_seconds: float = DEFAULT_METRICS_DUMP_INTERVAL_SECONDS,
+                 registry: MetricsRegistry = metrics):
+        self.file_path = file_path
+        self.interval_seconds = interval_seconds
+        self.registry = registry
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-dumper", daemon=True)
+        self._thread.start()
+
+    def dump(self) -> None:
+        temporary_path = f"{self.file_path}.tmp"
+        with open(temporary_path, 'w') as metrics_file:
+            metrics_file.write(self.registry.render())
+        os.replace(temporary_path, self.file_path)
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval_seconds):
+            self.dump()
+
+    def close(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+        self.dump()
+
+
+_metrics_export_started = False
+
+
+def start_metrics_export() -> None:
+    """Start the exporters configured by METRICS_PORT and/or METRICS_FILE; safe to call more than once."""
+    global _metrics_export_started
+    if _metrics_export_started:
+        return
+    _metrics_export_started = True
+    metrics_port = os.environ.get('METRICS_PORT')
+    if metrics_port:
+        start_metrics_server(int(metrics_port))
+    metrics_file_path = os.environ.get('METRICS_FILE')
+    if metrics_file_path:
+        metrics_file_dumper = MetricsFileDumper(
+            metrics_file_path, float(os.environ.get('METRICS_DUMP_INTERVAL_SECONDS', DEFAULT_METRICS_DUMP_INTERVAL_SECONDS))
+        )
+        atexit.register(metrics_file_dumper.close)
@@ -0,0 +1,175 @@
+import contextlib
+import cProfile
+import io
+import itertools
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from typing import Callable, ContextManager, Iterator, Optional
+
+from .log_handler import logger
+
+DEFAULT_PROFILE_DIRECTORY = os.path.join('resources', 'profiles')
+DEFAULT_PROFILE_TOP_N = 20
+DEFAULT_TORCH_PROFILE_CALLS = 3
+
+
+def profiling_enabled() -> bool:
+    return os.environ.get('PROFILE', '0') == '1'
+
+
+def torch_profiling_enabled() -> bool:
+    return profiling_enabled() and os.environ.get('PROFILE_TORCH', '0') == '1'
+
+
+def _profile_directory() -> str:
+    return os.environ.get('PROFILE_DIR', DEFAULT_PROFILE_DIRECTORY)
+
+
+def _profile_top_n() -> int:
+    return int(os.environ.get('PROFILE_TOP_N', DEFAULT_PROFILE_TOP_N))
+
+
+class RunProfiler:
+    """Profiles the stages of one run: a cProfile dump and a tracemalloc snapshot per stage.
+
+    Each stage writes <output_directory>/<stage>.prof (open with pstats or snakeviz) and
+    <stage>.tracemalloc (tracemalloc.Snapshot.load), then logs its top_n functions by own
+    time and its top_n allocation sites by memory still held at the end of the stage.
+    cProfile only sees the thread that runs the stage; tracemalloc sees every thread.
+    """
+
+    def __init__(self, output_directory: str, top_n: int = DEFAULT_PROFILE_TOP_N, trace_allocations: bool = True):
+        self.output_directory = output_directory
+        self.top_n = top_n
+        self.trace_allocations = trace_allocations
+        self._previous_profile_flag: Optional[str] = None
+        self._profile_flag_set = False
+
+    def set_profile_flag(self) -> None:
+        """Set PROFILE=1 until close(), so inference worker processes started during the run inherit it."""
+        self._previous_profile_flag = os.environ.get('PROFILE')
+        self._profile_flag_set = True
+        os.environ['PROFILE'] = '1'
+
+    def close(self) -> None:
+        """Restore PROFILE to its value before the run, so later runs in this process are not profiled."""
+        if not self._profile_flag_set:
+            return
+        self._profile_flag_set = False
+        if self._previous_profile_flag is None:
+            os.environ.pop('PROFILE', None)
+        else:
+            os.environ['PROFILE'] = self._previous_profile_flag
+
+    @contextlib.contextmanager
+    def stage(self, stage_name: str) -> Iterator[None]:
+        os.makedirs(self.output_directory, exist_ok=True)
+        started_tracing = self.trace_allocations and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        if self.trace_allocations:
+            tracemalloc.reset_peak()
+            start_snapshot = tracemalloc.take_snapshot()
+        stage_profiler = cProfile.Profile()
+        started = time.perf_counter()
+        stage_profiler.enable()
+        try:
+            yield
+        finally:
+            stage_profiler.disable()
+            elapsed_seconds = time.perf_counter() - started
+            if self.trace_allocations:
+                # Taken before the cProfile report, whose own allocations would otherwise top the list.
+                _, peak_bytes = tracemalloc.get_traced_memory()
+                end_snapshot = tracemalloc.take_snapshot()
+                if started_tracing:
+                    tracemalloc.stop()
+            self._report_hotspots(stage_name, stage_profiler, elapsed_seconds)
+            if self.trace_allocations:
+                self._report_allocations(stage_name, start_snapshot, end_snapshot, peak_bytes)
+
+    def _report_hotspots(self, stage_name: str, stage_profiler: cProfile.Profile, elapsed_seconds: float) -> None:
+        profile_path = os.path.join(self.output_directory, f"{stage_name}.prof")
+        stage_profiler.dump_stats(profile_path)
+        hotspots = io.StringIO()
+        pstats.Stats(stage_profiler, stream=hotspots).sort_stats('tottime').print_stats(self.top_n)
+        logger.info(f"Stage {stage_name} took {elapsed_seconds:.2f}s, profile written to {profile_path}. "
+                    f"Top {self.top_n} functions by own time:\n{hotspots.getvalue().strip()}")
+
+    def _report_allocations(self, stage_name: str, start_snapshot: tracemalloc.Snapshot,
+                            end_snapshot: tracemalloc.Snapshot, peak_bytes: int) -> None:
+        snapshot_path = os.path.join(self.output_directory, f"{stage_name}.tracemalloc")
+        end_snapshot = end_snapshot.filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, cProfile.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ])
+        end_snapshot.dump(snapshot_path)
+        allocation_growth = end_snapshot.compare_to(start_snapshot, 'lineno')[:self.top_n]
+        allocation_lines = "\n".join(str(statistic) for statistic in allocation_growth)
+        logger.info(f"Stage {stage_name} peak traced memory {peak_bytes / 2 ** 20:.1f} MiB, snapshot written to "
+                    f"{snapshot_path}. Top {self.top_n} allocation sites by growth:\n{allocation_lines}")
+
+
+def get_run_profiler(enabled: Optional[bool] = None) -> Optional[RunProfiler]:
+    """A RunProfiler writing under PROFILE_DIR/<timestamp> when profiling is on, else None.
+
+    enabled defaults to the PROFILE environment variable. PROFILE_TRACEMALLOC=0 skips
+    allocation tracing, which slows allocation-heavy stages down noticeably. PROFILE=1 is
+    set until end_run_profiling, so the run's inference workers profile too.
+    """
+    if enabled is None:
+        enabled = profiling_enabled()
+    if not enabled:
+        return None
+    run_profiler = RunProfiler(os.path.join(_profile_directory(), time.strftime('%Y%m%d-%H%M%S')), _profile_top_n(),
+                               os.environ.get('PROFILE_TRACEMALLOC', '1') == '1')
+    run_profiler.set_profile_flag()
+    return run_profiler
+
+
+def end_run_profiling(run_profiler: Optional[RunProfiler]) -> None:
+    """Close run_profiler at the end of its run; without one this does nothing."""
+    if run_profiler:
+        run_profiler.close()
+
+
+def profile_stage(run_profiler: Optional[RunProfiler], stage_name: str) -> ContextManager:
+    """Profile a stage with run_profiler; without one this is a no-op context."""
+    return run_profiler.stage(stage_name) if run_profiler else contextlib.nullcontext()
+
+
+def profile_torch_calls(compute_predictions: Callable, call_count: Optional[int] = None) -> Callable:
+    """Wrap a model forward function so that its first call_count calls run under torch.profiler.
+
+    Each profiled call is exported as a Chrome trace (chrome://tracing or Perfetto) to
+    PROFILE_DIR/torch and its top operators are logged; later calls go straight through.
+    call_count defaults to PROFILE_TORCH_CALLS.
+    """
+    import torch.profiler
+
+    call_count = call_count if call_count is not None else int(os.environ.get('PROFILE_TORCH_CALLS', DEFAULT_TORCH_PROFILE_CALLS))
+    trace_directory = os.path.join(_profile_directory(), 'torch')
+    top_n = _profile_top_n()
+    call_numbers = itertools.count(1)
+    call_numbers_lock = threading.Lock()
+
+    def profiled_compute_predictions(*args, **kwargs):
+        with call_numbers_lock:
+            call_number = next(call_numbers)
+        if call_number > call_count:
+            return compute_predictions(*args, **kwargs)
+        with torch.profiler.profile(activities=[torch.profiler.ProfilerActivity.CPU],
+                                    record_shapes=True, profile_memory=True) as torch_profile:
+            predictions = compute_predictions(*args, **kwargs)
+        os.makedirs(trace_directory, exist_ok=True)
+        trace_path = os.path.join(trace_directory, f"predictions_{time.strftime('%Y%m%d-%H%M%S')}_{os.getpid()}_{call_number}.json")
+        torch_profile.export_chrome_trace(trace_path)
+        logger.info(f"Torch profile of prediction call {call_number} written to {trace_path}:\n"
+                    f"{torch_profile.key_averages().table(sort_by='self_cpu_time_total', row_limit=top_n)}")
+        return predictions
+
+    return profiled_compute_predictions
@@ -1,12 +1,11 @@
-import os
-import duckdb
 from dotenv import load_dotenv
 
 load_dotenv()
 
 def get_db_connection():
-    db_path = os.getenv('DB_PATH', 'resources/scraping_results.db')
-    return duckdb.connect(db_path)
+    # Imported here: the database package imports utils, so a module-level import would be circular.
+    from ..database.init_db import get_db_manager
+    return get_db_manager().get_cursor()
 
 def delete_all_but_eight_rows():
     with get_db_connection() as conn:
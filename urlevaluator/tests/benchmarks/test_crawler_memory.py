@@ -0,0 +1,30 @@
+"""
+Checks the RSS summary of the crawler memory benchmark and a small end-to-end run.
+"""
+
+import pytest
+
+from urlevaluator.benchmarks.crawler_memory import run_benchmark, summarize_samples
+from urlevaluator.benchmarks.crawler_throughput import SyntheticSiteConfig
+
+
+def test_summary_measures_growth_per_worker_and_over_the_second_half():
+    samples = [(0, 100.0), (2, 110.0), (5, 130.0), (8, 126.0), (10, 131.0)]
+    summary = summarize_samples(samples, baseline_rss_mb=100.0, worker_count=2)
+    assert summary['peak_rss_mb'] == 131.0
+    assert summary['peak_growth_per_worker_mb'] == 15.5
+    assert summary['second_half_growth_mb'] == 1.0
+
+
+def test_more_workers_than_subtrees_is_rejected():
+    with pytest.raises(ValueError, match="fan_out"):
+        run_benchmark(SyntheticSiteConfig(fan_out=2, depth=2), [3])
+
+
+def test_benchmark_crawls_every_worker_subtree():
+    site_config = SyntheticSiteConfig(fan_out=2, depth=3, page_bytes=2048)
+
+    benchmark_result = run_benchmark(site_config, [1, 2], live_heap_objects=0)
+
+    assert [run['pages_stored'] for run in benchmark_result['runs']] == [7, 14]
+    assert all(run['peak_rss_mb'] >= run['baseline_rss_mb'] for run in benchmark_result['runs'])
@@ -0,0 +1,45 @@
+"""
+Checks the synthetic site behind the crawler throughput benchmark and a small end-to-end run.
+"""
+
+from urlevaluator.benchmarks.crawler_throughput import (
+    SyntheticSiteConfig, child_page_ids, is_error_page, render_page, run_benchmark
+)
+
+
+def test_site_graph_is_a_complete_tree():
+    site_config = SyntheticSiteConfig(fan_out=3, depth=2)
+    assert site_config.page_count == 13
+    assert child_page_ids(0, site_config) == [1, 2, 3]
+    assert child_page_ids(3, site_config) == [10, 11, 12]
+    assert child_page_ids(4, site_config) == []
+
+
+def test_pages_are_padded_and_link_to_children_and_parent():
+    site_config = SyntheticSiteConfig(fan_out=2, depth=3, page_bytes=8192)
+    page = render_page(3, site_config).decode('utf-8')
+    assert 8192 - 400 < len(page) <= 8192 + 400
+    assert '/page/7"' in page and '/page/8"' in page and '/page/1"' in page
+    assert '/page/0"' in render_page(1, site_config).decode('utf-8')
+    assert render_page(1, site_config) == render_page(1, site_config)
+
+
+def test_error_rate_never_fails_the_root():
+    site_config = SyntheticSiteConfig(fan_out=4, depth=3, error_rate=1.0)
+    assert not is_error_page(0, site_config)
+    assert all(is_error_page(page_id, site_config) for page_id in range(1, site_config.page_count))
+
+
+def test_benchmark_crawls_the_whole_site(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    site_config = SyntheticSiteConfig(fan_out=2, depth=3, page_bytes=2048)
+
+    benchmark_result = run_benchmark(site_config)
+
+    assert benchmark_result['pages_stored'] == site_config.page_count
+    assert benchmark_result['pages_failed'] == 0
+    assert benchmark_result['pages_refetched'] == 0
+    assert benchmark_result['pages_per_second'] > 0
+    assert benchmark_result['fetch_to_store_ms']['p50'] <= benchmark_result['fetch_to_store_ms']['p99']
+    assert benchmark_result['peak_rss_mb'] > 0
+    assert list(tmp_path.iterdir()) == []
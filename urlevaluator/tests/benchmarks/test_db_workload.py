@@ -0,0 +1,58 @@
+"""
+Checks the synthetic databases behind the DuckDB workload benchmark and a small end-to-end run.
+"""
+
+from urlevaluator.benchmarks.db_workload import generate_synthetic_database, run_benchmark
+from urlevaluator.src.database.connection import connection_registry
+from urlevaluator.src.database.init_db import get_db_manager
+from urlevaluator.src.database.queue import QueueManager
+
+TOPICS = ['sports', 'politics']
+
+
+def test_generated_database_matches_requested_shape(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    generate_synthetic_database('workload.db', 2000, run_count=2, classified_fraction=0.5, topics=TOPICS)
+    connection = get_db_manager('workload.db').get_cursor()
+    try:
+        assert connection.execute("SELECT COUNT(*), COUNT(DISTINCT run_id) FROM links").fetchone() == (2000, 2)
+        assert connection.execute("SELECT COUNT(*) FROM pages").fetchone()[0] == 80
+        assert connection.execute(
+            "SELECT COUNT(*) FROM links WHERE link_text_id NOT IN (SELECT id FROM texts)").fetchone()[0] == 0
+        classified_share = connection.execute(
+            "SELECT AVG(CASE WHEN topic_scores IS NULL THEN 0 ELSE 1 END) FROM links WHERE run_id = 2").fetchone()[0]
+        assert 0.4 < classified_share < 0.6
+        assert sorted(connection.execute(
+            "SELECT json_keys(topic_scores) FROM links WHERE topic_scores IS NOT NULL LIMIT 1").fetchone()[0]) == sorted(TOPICS)
+
+        queue_manager = QueueManager("https://seed2.example/", 'workload.db', crawl_run_id=2)
+        assert queue_manager.get_total_pending(TOPICS) == connection.execute(
+            "SELECT COUNT(*) FROM links WHERE run_id = 2 AND topic_scores IS NULL").fetchone()[0]
+        pending_batch = queue_manager.fetch_pending_batch(10, None, TOPICS)
+        assert len(pending_batch) == 10 and all(link_text for _, link_text, _ in pending_batch)
+        queue_manager.close()
+
+        assert connection.execute("SELECT nextval('links_id_seq'), nextval('pages_id_seq')").fetchone() == (2001, 81)
+    finally:
+        connection.close()
+        connection_registry.close_all()
+
+
+def test_benchmark_reports_every_access_path_per_variant(tmp_path):
+    benchmark_result = run_benchmark(
+        [1000], run_count=2, calls=10, topics=TOPICS, work_directory=str(tmp_path),
+        schema_variants={'baseline': [], 'links_url_index': ['CREATE INDEX links_url_idx ON links (url)']},
+    )
+
+    scale_result = benchmark_result['scales'][0]
+    assert scale_result['links'] == 1000 and scale_result['generation_seconds'] is not None
+    assert set(scale_result['variants']) == {'baseline', 'links_url_index'}
+    for variant_result in scale_result['variants'].values():
+        assert set(variant_result['access_paths']) == {
+            'is_url_already_visited', 'fetch_pending_batch', 'get_total_pending', 'aggregate_topic_scores',
+            'store_crawled_page_data', 'mark_url_as_visited', 'update_classifications'}
+        assert all(summary['calls'] > 0 for summary in variant_result['access_paths'].values())
+    assert scale_result['variants']['baseline']['p50_vs_baseline']['fetch_pending_batch'] == 1.0
+    # The generated database is kept in the work directory and reused by the next run.
+    assert run_benchmark([1000], run_count=2, calls=10, topics=TOPICS, work_directory=str(tmp_path),
+                         schema_variants={'baseline': []})['scales'][0]['generation_seconds'] is None
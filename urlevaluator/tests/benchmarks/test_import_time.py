@@ -0,0 +1,26 @@
+"""
+Guards against import-time regressions: package entry points must not load the ML stack.
+"""
+
+import pytest
+import urlevaluator
+import urlevaluator.src
+from urlevaluator.benchmarks.import_time import LIGHT_IMPORT_TARGETS, measure_import
+
+
+@pytest.mark.parametrize("module", LIGHT_IMPORT_TARGETS)
+def test_entry_point_does_not_import_torch_or_transformers(module):
+    assert measure_import(module)['heavy_modules'] == []
+
+
+def test_lazy_exports_resolve_to_the_defining_objects():
+    from urlevaluator.src.scraper.crawler import WebSiteCrawler
+    from urlevaluator.src.database.init_db import get_db_manager
+    assert urlevaluator.WebSiteCrawler is WebSiteCrawler
+    assert urlevaluator.src.get_db_manager is get_db_manager
+    assert set(urlevaluator.__all__) <= set(dir(urlevaluator))
+
+
+def test_unknown_attribute_raises():
+    with pytest.raises(AttributeError):
+        urlevaluator.src.not_an_export
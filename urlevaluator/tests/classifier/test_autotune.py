@@ -0,0 +1,74 @@
+"""
+Tests for batch-size autotuning.
+"""
+
+import time
+import pytest
+import torch
+from unittest.mock import Mock, patch
+from urlevaluator.src.classifier.autotune import BatchSettings, autotune_batch_settings, load_or_autotune
+
+
+class TimedClassifier:
+    """Stand-in for TopicClassifier whose inference is fastest at a 4096 token budget and with bf16."""
+
+    def __init__(self, model_path):
+        self.topics = ["sports"]
+        self.precision = "fp32"
+        self.max_tokens_per_batch = 8192
+        self.inference_backend = "torch"
+        self.device = torch.device("cpu")
+        self.model_manager = Mock(**{"get_model_path.return_value": str(model_path)})
+        self.calls = 0
+
+    def _infer_batch(self, texts):
+        self.calls += 1
+        delay = 0.001 if self.max_tokens_per_batch == 4096 else 0.004
+        time.sleep(delay / (2 if self.precision == "bf16" else 1))
+        return [{"sports": 0.5} for _ in texts]
+
+
+def test_autotune_picks_fastest_settings_and_restores_classifier(tmp_path):
+    topic_classifier = TimedClassifier(tmp_path)
+
+    batch_settings = autotune_batch_settings(topic_classifier, ["text"] * 64, ("fp32", "bf16"),
+                                             token_budget_candidates=(2048, 4096), link_batch_candidates=(32, 64))
+
+    assert batch_settings.max_tokens_per_batch == 4096
+    assert batch_settings.precision == "bf16"
+    assert batch_settings.link_batch_size == 64
+    assert batch_settings.texts_per_second > batch_settings.fp32_texts_per_second
+    assert (topic_classifier.precision, topic_classifier.max_tokens_per_batch) == ("fp32", 8192)
+
+
+@patch('urlevaluator.src.classifier.autotune.autotune_batch_settings')
+def test_load_or_autotune_caches_per_host(mock_autotune, tmp_path):
+    mock_autotune.return_value = BatchSettings(4096, 64, "fp32", 100.0, 100.0)
+
+    first_classifier = TimedClassifier(tmp_path)
+    assert load_or_autotune(first_classifier, ["text"] * 256).link_batch_size == 64
+    second_classifier = TimedClassifier(tmp_path)
+    assert load_or_autotune(second_classifier, ["text"] * 8).max_tokens_per_batch == 4096
+
+    mock_autotune.assert_called_once()
+    assert second_classifier.max_tokens_per_batch == 4096
+    assert list((tmp_path / "autotune").iterdir())
+
+
+def test_load_or_autotune_without_texts_keeps_settings(tmp_path):
+    topic_classifier = TimedClassifier(tmp_path)
+    assert load_or_autotune(topic_classifier, []) is None
+    assert topic_classifier.max_tokens_per_batch == 8192
+
+
+@patch('urlevaluator.src.classifier.autotune.autotune_batch_settings')
+def test_small_first_sample_neither_tunes_nor_caches(mock_autotune, tmp_path):
+    topic_classifier = TimedClassifier(tmp_path)
+    assert load_or_autotune(topic_classifier, ["text"] * 3) is None
+    mock_autotune.assert_not_called()
+    assert not (tmp_path / "autotune").exists()
+
+
+def test_autotune_rejects_a_sample_smaller_than_the_largest_link_batch(tmp_path):
+    with pytest.raises(ValueError, match="at least 64"):
+        autotune_batch_settings(TimedClassifier(tmp_path), ["text"] * 3, link_batch_candidates=(32, 64))
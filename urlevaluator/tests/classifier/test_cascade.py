@@ -0,0 +1,95 @@
+"""Tests for the hashed-feature cascade stage.
+
+Training is checked against a real temporary DuckDB database.
+"""
+
+import json
+from urlevaluator.src.classifier.cascade import (
+    CascadeGate, HashedLinearScorer, hash_text_features, load_cascade_gate, train_cascade
+)
+from urlevaluator.src.classifier.classification_cache import ClassificationCache
+from urlevaluator.src.database.connection import connection_registry
+from urlevaluator.src.database.init_db import DatabaseManager
+from urlevaluator.src.database.text_store import store_texts
+
+TOPICS = ["sports", "politics"]
+NAVIGATION_TEXTS = ["Next", "Read more", "Previous", "Page 2", "Page 3", "Home", "Contact", "More"]
+SPORTS_TEXTS = ["Football match report", "Tennis final results", "Football transfer news", "Basketball playoffs"]
+
+
+def training_rows():
+    return [(text, {"sports": 0.02, "politics": 0.02}) for text in NAVIGATION_TEXTS] + \
+           [(text, {"sports": 0.97, "politics": 0.03}) for text in SPORTS_TEXTS]
+
+
+def test_hashed_features_fold_digits():
+    assert list(hash_text_features("Page 2", 1024)) == list(hash_text_features("PAGE 7", 1024))
+    assert list(hash_text_features("Page 2", 1024)) != list(hash_text_features("Page 17", 1024))
+
+
+def test_scorer_learns_soft_targets_and_round_trips(tmp_path):
+    texts, scores = zip(*training_rows())
+    scorer = HashedLinearScorer(TOPICS, feature_count=4096)
+    scorer.fit(list(texts), [[s["sports"], s["politics"]] for s in scores], epochs=200)
+
+    predicted, coverage = scorer.predict(["Read more", "Football match report", "Quantum chromodynamics"])
+    assert predicted[0, 0] < 0.2 and predicted[1, 0] > 0.8
+    assert coverage[0] == 1.0 and coverage[2] < 1.0
+
+    scorer.save(str(tmp_path / "scorer.npz"))
+    restored = HashedLinearScorer.load(str(tmp_path / "scorer.npz"))
+    assert restored.topics == TOPICS
+    assert (restored.predict(["Read more"])[0] == scorer.predict(["Read more"])[0]).all()
+
+
+def test_gate_answers_confident_texts_and_escalates_the_rest():
+    texts, scores = zip(*training_rows())
+    scorer = HashedLinearScorer(TOPICS, feature_count=4096)
+    scorer.fit(list(texts), [[s["sports"], s["politics"]] for s in scores], epochs=200)
+    gate = CascadeGate(scorer, low_threshold=0.1, high_threshold=0.9, min_feature_coverage=1.0)
+    escalated = []
+
+    def full_model(uncertain_texts):
+        escalated.extend(uncertain_texts)
+        return [{"sports": 0.5, "politics": 0.5} for _ in uncertain_texts]
+
+    results = gate.route(["Next", "Election debate tonight"], full_model)
+
+    assert escalated == ["Election debate tonight"]
+    assert results[0]["sports"] < 0.1
+    assert results[1] == {"sports": 0.5, "politics": 0.5}
+    assert (gate.answered_count, gate.escalated_count) == (1, 1)
+    assert "50.0%" in gate.summary()
+
+
+def test_train_cascade_from_cached_model_scores(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("CASCADE", raising=False)
+    database_manager = DatabaseManager("cascade_test.db")
+    database_manager.create_database()
+    connection = database_manager.get_cursor()
+    cache = ClassificationCache("cascade_test.db")
+    try:
+        texts, scores = zip(*training_rows())
+        cache.put_many("model:nli:torch:fp32", list(texts), list(scores))
+        cache.put_many("other-model:nli:torch:fp32", ["Cricket scores"], [{"sports": 0.9, "politics": 0.1}])
+        # Another backend of the same model scores differently and must not be mixed in.
+        cache.put_many("model:nli:onnx-int8:fp32", list(texts) + ["Rugby"], [{"sports": 0.5, "politics": 0.5}] * (len(texts) + 1))
+        # Scores on links may be the cascade's own answers, so they are not training data.
+        text_ids = store_texts(connection, ["Weather"])
+        connection.execute("INSERT INTO pages (id, url) VALUES (1, 'https://example.com')")
+        connection.execute(
+            "INSERT INTO links (id, page_id, url, link_text_id, topic_scores) VALUES (1, 1, 'https://example.com/1', ?, ?)",
+            [text_ids["Weather"], json.dumps({"sports": 0.01, "politics": 0.01})]
+        )
+
+        training_report = train_cascade(TOPICS, str(tmp_path / "model"), connection, "model:nli:torch:fp32",
+                                        feature_count=4096)
+
+        assert training_report['training_texts'] == len(NAVIGATION_TEXTS) + len(SPORTS_TEXTS)
+        assert load_cascade_gate(TOPICS, str(tmp_path / "model")) is not None
+        assert load_cascade_gate(["other"], str(tmp_path / "model")) is None
+    finally:
+        cache.close()
+        connection.close()
+        connection_registry.close(database_manager.get_db_path())
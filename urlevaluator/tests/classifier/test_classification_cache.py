@@ -0,0 +1,77 @@
+"""Tests for the two-tier classification cache.
+
+Uses a real temporary DuckDB database for the persistent tier.
+"""
+
+import pytest
+from unittest.mock import patch
+from urlevaluator.src.classifier.classification_cache import ClassificationCache, normalize_text_for_cache
+from urlevaluator.src.classifier.topic_classifier import TopicClassifier
+from urlevaluator.src.database.init_db import DatabaseManager
+from urlevaluator.src.database.connection import connection_registry
+
+
+@pytest.fixture
+def cache_database(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    DatabaseManager("cache_test.db").create_database()
+    yield "cache_test.db"
+    connection_registry.close(DatabaseManager("cache_test.db").get_db_path())
+
+
+def test_normalize_text_collapses_whitespace():
+    assert normalize_text_for_cache("  Read\n more ") == "Read more"
+
+def test_miss_then_memory_hit(cache_database):
+    cache = ClassificationCache(cache_database)
+    assert cache.get_many("model-a", ["Home"], ["tech"]) == [None]
+    cache.put_many("model-a", ["Home"], [{"tech": 0.4}])
+    assert cache.get_many("model-a", ["Home "], ["tech"]) == [{"tech": 0.4}]
+    assert (cache.memory_hits, cache.persistent_hits, cache.misses) == (1, 0, 1)
+
+def test_persistent_tier_survives_new_instance(cache_database):
+    ClassificationCache(cache_database).put_many("model-a", ["Home"], [{"tech": 0.4, "sports": 0.1}])
+    cache = ClassificationCache(cache_database)
+    assert cache.get_many("model-a", ["Home"], ["tech", "sports"]) == [{"tech": 0.4, "sports": 0.1}]
+    assert cache.persistent_hits == 1
+
+def test_keyed_on_scorer_and_topics(cache_database):
+    cache = ClassificationCache(cache_database)
+    cache.put_many("model-a", ["Home"], [{"tech": 0.4}])
+    assert cache.get_many("model-b", ["Home"], ["tech"]) == [None]
+    assert ClassificationCache(cache_database).get_many("model-b", ["Home"], ["tech"]) == [None]
+    assert ClassificationCache(cache_database).get_many("model-a", ["Home"], ["tech", "sports"]) == [None]
+
+def test_memory_tier_is_bounded(cache_database):
+    cache = ClassificationCache(cache_database, max_memory_entries=1)
+    cache.put_many("model-a", ["Home", "About"], [{"tech": 0.4}, {"tech": 0.2}])
+    assert len(cache._memory_cache) == 1
+    assert cache.get_many("model-a", ["About"], ["tech"]) == [{"tech": 0.2}]
+    assert cache.memory_hits == 1
+
+def test_topic_classifier_skips_inference_for_cached_texts(cache_database):
+    cache = ClassificationCache(cache_database)
+    with patch('urlevaluator.src.classifier.topic_classifier.AutoTokenizer'), \
+         patch('urlevaluator.src.classifier.topic_classifier.AutoModelForSequenceClassification'), \
+         patch.object(TopicClassifier, '_infer_batch', side_effect=lambda texts: [{"tech": 0.9}] * len(texts)) as mock_infer:
+        classifier = TopicClassifier(["tech"], cache=cache)
+        cache.put_many(classifier.scoring_key, ["Home"], [{"tech": 0.4}])
+        result = classifier.classify_batch(["Home", "About"])
+    assert result == [{"tech": 0.4}, {"tech": 0.9}]
+    mock_infer.assert_called_once_with(["About"])
+    assert cache.hit_rate == 0.5
+
+
+def test_inference_backends_do_not_share_scores(cache_database):
+    cache = ClassificationCache(cache_database)
+    with patch('urlevaluator.src.classifier.topic_classifier.AutoTokenizer'), \
+         patch('urlevaluator.src.classifier.topic_classifier.AutoModelForSequenceClassification'), \
+         patch('urlevaluator.src.classifier.topic_classifier.torch.ao.quantization.quantize_dynamic'):
+        fp32_classifier = TopicClassifier(["tech"], cache=cache)
+        int8_classifier = TopicClassifier(["tech"], cache=cache, inference_backend="torch-int8")
+    with patch.object(TopicClassifier, '_infer_batch', side_effect=lambda texts: [{"tech": 0.9}] * len(texts)):
+        fp32_classifier.classify_batch(["Home"])
+    with patch.object(TopicClassifier, '_infer_batch', side_effect=lambda texts: [{"tech": 0.8}] * len(texts)) as mock_infer:
+        assert int8_classifier.classify_batch(["Home"]) == [{"tech": 0.8}]
+    mock_infer.assert_called_once_with(["Home"])
+    assert fp32_classifier.classify_batch(["Home"]) == [{"tech": 0.9}]
@@ -3,6 +3,7 @@ Tests for the ModelManager class and model download functionality.
 """
 
 import os
+import pytest
 from urlevaluator.src.classifier.download_model import ModelManager
 
 def test_model_manager_uses_env(monkeypatch):
@@ -15,4 +16,25 @@ def test_model_manager_singleton():
     m2 = ModelManager("second/model")
     assert m1.model_name == "first/model"
     assert m2.model_name == "second/model"
-    assert m1 is not m2 
\ No newline at end of file
+    assert m1 is not m2 
+
+def test_model_manager_infers_embedding_mode(monkeypatch):
+    monkeypatch.delenv("CLASSIFIER_MODE", raising=False)
+    assert ModelManager("sentence-transformers/all-MiniLM-L6-v2").classifier_mode == "embedding"
+    assert ModelManager("facebook/bart-large-mnli").classifier_mode == "nli"
+
+def test_model_manager_mode_env_override(monkeypatch):
+    monkeypatch.setenv("CLASSIFIER_MODE", "embedding")
+    assert ModelManager("facebook/bart-large-mnli").classifier_mode == "embedding"
+
+def test_model_manager_rejects_unknown_backend(monkeypatch):
+    monkeypatch.setenv("INFERENCE_BACKEND", "tensorrt")
+    with pytest.raises(ValueError, match="INFERENCE_BACKEND"):
+        ModelManager("facebook/bart-large-mnli")
+
+def test_model_manager_onnx_paths(monkeypatch):
+    monkeypatch.delenv("INFERENCE_BACKEND", raising=False)
+    manager = ModelManager("facebook/bart-large-mnli")
+    assert manager.inference_backend == "torch"
+    assert manager.get_onnx_model_path() == os.path.join(manager.get_model_path(), "onnx", "model.onnx")
+    assert manager.get_onnx_model_path(quantized=True).endswith("model.int8.onnx")
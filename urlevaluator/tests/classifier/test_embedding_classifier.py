@@ -0,0 +1,91 @@
+"""Tests for the embedding-based zero-shot classifier and classifier selection.
+
+Focus on public API and observable behavior with minimal mocking.
+"""
+
+import pytest
+import torch
+from unittest.mock import patch
+from urlevaluator.src.classifier.embedding_classifier import EmbeddingTopicClassifier
+from urlevaluator.src.classifier.classifier_factory import create_topic_classifier
+from urlevaluator.src.classifier.topic_classifier import TopicClassifier, pack_by_token_budget
+
+TOPIC_VECTORS = {
+    "This text is about technology": [1.0, 0.0],
+    "This text is about sports": [0.0, 1.0],
+}
+TEXT_VECTORS = {"new laptop": [1.0, 0.0], "football": [0.0, 1.0]}
+
+
+def fake_encode(texts):
+    vectors = {**TOPIC_VECTORS, **TEXT_VECTORS}
+    return torch.tensor([vectors[text] for text in texts])
+
+
+@pytest.fixture
+def embedding_classifier(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with patch('urlevaluator.src.classifier.embedding_classifier.AutoTokenizer'), \
+         patch('urlevaluator.src.classifier.embedding_classifier.AutoModel'), \
+         patch.object(EmbeddingTopicClassifier, '_encode', side_effect=fake_encode) as mock_encode:
+        classifier = EmbeddingTopicClassifier(["technology", "sports"], "test/embedding-model")
+        yield classifier, mock_encode
+
+
+def test_classify_batch_scores_by_similarity(embedding_classifier):
+    classifier, _ = embedding_classifier
+    laptop_scores, football_scores = classifier.classify_batch(["new laptop", "football"])
+    assert set(laptop_scores) == {"technology", "sports"}
+    assert laptop_scores["technology"] > laptop_scores["sports"]
+    assert football_scores["sports"] > football_scores["technology"]
+    assert all(0.0 <= score <= 1.0 for score in laptop_scores.values())
+
+def test_classify_text_matches_batch(embedding_classifier):
+    classifier, _ = embedding_classifier
+    assert classifier.classify_text("football") == classifier.classify_batch(["football"])[0]
+
+def test_topic_embeddings_encoded_once_and_cached_on_disk(embedding_classifier):
+    classifier, mock_encode = embedding_classifier
+    classifier.classify_batch(["new laptop", "football"])
+    topic_encodes = [call for call in mock_encode.call_args_list if call.args[0] == classifier._topic_hypotheses()]
+    assert len(topic_encodes) == 1
+
+    with patch('urlevaluator.src.classifier.embedding_classifier.AutoTokenizer'), \
+         patch('urlevaluator.src.classifier.embedding_classifier.AutoModel'), \
+         patch.object(EmbeddingTopicClassifier, '_encode', side_effect=fake_encode) as second_encode:
+        EmbeddingTopicClassifier(["technology", "sports"], "test/embedding-model")
+    second_encode.assert_not_called()
+
+def test_pack_by_token_budget_covers_all_indices():
+    batches = list(pack_by_token_budget([3, 9, 1, 4], 8))
+    assert sorted(index for batch in batches for index in batch) == [0, 1, 2, 3]
+    assert batches[0] == [2, 0]
+
+@pytest.mark.parametrize("environment,expected_class", [
+    ({"CLASSIFIER_MODE": "embedding"}, EmbeddingTopicClassifier),
+    ({"CLASSIFIER_MODE": "nli"}, TopicClassifier),
+])
+def test_factory_selects_classifier_by_mode(monkeypatch, environment, expected_class):
+    for name, value in environment.items():
+        monkeypatch.setenv(name, value)
+    with patch('urlevaluator.src.classifier.classifier_factory.EmbeddingTopicClassifier') as mock_embedding, \
+         patch('urlevaluator.src.classifier.classifier_factory.TopicClassifier') as mock_nli:
+        classifier = create_topic_classifier(["technology"], "some/model")
+    expected_mock = mock_embedding if expected_class is EmbeddingTopicClassifier else mock_nli
+    assert classifier is expected_mock.return_value
+
+
+def test_scoring_key_covers_mode_and_calibration(embedding_classifier, monkeypatch):
+    classifier, _ = embedding_classifier
+    with patch('urlevaluator.src.classifier.topic_classifier.AutoTokenizer'), \
+         patch('urlevaluator.src.classifier.topic_classifier.AutoModelForSequenceClassification'):
+        nli_classifier = TopicClassifier(["technology", "sports"], "test/embedding-model")
+    assert nli_classifier.scoring_key == "test/embedding-model:nli:torch:fp32"
+    assert classifier.scoring_key.startswith("test/embedding-model:embedding:torch:fp32:")
+
+    monkeypatch.setenv("EMBEDDING_SCORE_SCALE", "5")
+    with patch('urlevaluator.src.classifier.embedding_classifier.AutoTokenizer'), \
+         patch('urlevaluator.src.classifier.embedding_classifier.AutoModel'), \
+         patch.object(EmbeddingTopicClassifier, '_encode', side_effect=fake_encode):
+        recalibrated_classifier = EmbeddingTopicClassifier(["technology", "sports"], "test/embedding-model")
+    assert recalibrated_classifier.scoring_key != classifier.scoring_key
@@ -0,0 +1,85 @@
+"""
+Tests for the inference server, its dynamic batcher and the remote classifier client.
+"""
+
+import threading
+import pytest
+from unittest.mock import Mock
+from urlevaluator.src.classifier.inference_client import RemoteTopicClassifier, fetch_server_info
+from urlevaluator.src.classifier.inference_server import DynamicBatcher, InferenceServer
+
+
+class LengthClassifier:
+    """Stand-in for TopicClassifier that scores each topic by text length and records batch sizes."""
+
+    def __init__(self, topics):
+        self.topics = list(topics)
+        self.batch_sizes = []
+        self.model_manager = Mock(model_name="stub-model", classifier_mode="nli")
+        self.inference_backend = "torch"
+        self.scoring_key = "stub-model:torch"
+
+    def with_topics(self, topics):
+        topic_classifier = LengthClassifier(topics)
+        topic_classifier.batch_sizes = self.batch_sizes
+        return topic_classifier
+
+    def _infer_batch(self, texts):
+        if any(text == "fail" for text in texts):
+            raise ValueError("model error")
+        self.batch_sizes.append(len(texts))
+        return [{topic: float(len(text)) for topic in self.topics} for text in texts]
+
+
+@pytest.fixture
+def batcher():
+    dynamic_batcher = DynamicBatcher(LengthClassifier(["sports"]), max_batch_texts=100, max_batch_wait_ms=200)
+    yield dynamic_batcher
+    dynamic_batcher.close()
+
+
+def test_concurrent_requests_are_coalesced(batcher):
+    results = {}
+
+    def classify(client_index):
+        results[client_index] = batcher.classify(["x" * client_index], ["sports"])
+
+    threads = [threading.Thread(target=classify, args=(client_index,)) for client_index in range(1, 6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == {client_index: [{"sports": float(client_index)}] for client_index in range(1, 6)}
+    assert batcher.requests_served == 5
+    assert batcher.batches_run < 5
+
+
+def test_requests_are_grouped_by_topic_set(batcher):
+    assert batcher.classify(["ab"], ["sports", "politics"]) == [{"sports": 2.0, "politics": 2.0}]
+
+
+def test_inference_error_reaches_the_caller(batcher):
+    with pytest.raises(ValueError, match="model error"):
+        batcher.classify(["fail"], ["sports"])
+    assert batcher.classify(["ok"], ["sports"]) == [{"sports": 2.0}]
+
+
+def test_remote_classifier_round_trip():
+    inference_server = InferenceServer(LengthClassifier(["sports"]), port=0)
+    server_thread = threading.Thread(target=inference_server.serve_forever, daemon=True)
+    server_thread.start()
+    server_url = f"http://127.0.0.1:{inference_server.server_address[1]}"
+    try:
+        assert fetch_server_info(server_url)['model_name'] == "stub-model"
+        remote_classifier = RemoteTopicClassifier(server_url, ["sports", "science"])
+        assert remote_classifier.classify_batch(["abc", "a"]) == [
+            {"sports": 3.0, "science": 3.0}, {"sports": 1.0, "science": 1.0}
+        ]
+        assert remote_classifier.classify_batch([]) == []
+        with pytest.raises(RuntimeError, match="500"):
+            remote_classifier.classify_text("fail")
+        remote_classifier.close()
+    finally:
+        inference_server.shutdown()
+        inference_server.server_close()
@@ -0,0 +1,32 @@
+"""
+Tests for the ONNX Runtime sequence-classification wrapper.
+"""
+
+import numpy as np
+import pytest
+import torch
+from unittest.mock import patch, Mock
+
+pytest.importorskip("onnxruntime")
+
+from urlevaluator.src.classifier.onnx_backend import OnnxSequenceClassifier
+
+
+@patch('onnxruntime.InferenceSession')
+def test_returns_torch_logits_and_drops_unused_inputs(mock_session_class):
+    session = mock_session_class.return_value
+    session.get_inputs.return_value = [Mock(), Mock()]
+    session.get_inputs.return_value[0].name = "input_ids"
+    session.get_inputs.return_value[1].name = "attention_mask"
+    session.run.return_value = [np.array([[0.1, 0.7, 0.2]], dtype=np.float32)]
+
+    classifier = OnnxSequenceClassifier("model.onnx")
+    outputs = classifier(input_ids=torch.tensor([[1, 2]]),
+                         attention_mask=torch.tensor([[1, 1]]),
+                         token_type_ids=torch.tensor([[0, 0]]))
+
+    output_names, session_inputs = session.run.call_args[0]
+    assert output_names == ['logits']
+    assert set(session_inputs) == {"input_ids", "attention_mask"}
+    assert isinstance(outputs.logits, torch.Tensor)
+    assert outputs.logits.shape == (1, 3)
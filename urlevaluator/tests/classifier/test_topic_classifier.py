@@ -6,7 +6,7 @@ Focus on public API and observable behavior with minimal mocking.
 import pytest
 from unittest.mock import patch, Mock
 from urlevaluator.src.classifier.link_processor import LinkTopicClassifier, DEFAULT_TOPIC_CATEGORIES
-from urlevaluator.src.classifier.topic_classifier import TopicClassifier
+from urlevaluator.src.classifier.topic_classifier import BatchClassificationMixin, TopicClassifier
 
 
 class TestTopicClassifier:
@@ -25,6 +25,14 @@ class TestTopicClassifier:
         with pytest.raises(TypeError, match="missing 1 required positional argument"):
             TopicClassifier()
     
+    def test_batch_frontend_must_implement_infer_batch(self):
+        """Test that a classify_batch frontend without _infer_batch cannot be created."""
+        class IncompleteFrontend(BatchClassificationMixin):
+            topics = ["sports"]
+
+        with pytest.raises(TypeError, match="_infer_batch"):
+            IncompleteFrontend()
+    
     @patch.object(TopicClassifier, '_calculate_topic_scores')
     @patch.object(TopicClassifier, '_compute_model_predictions')
     @patch('urlevaluator.src.classifier.topic_classifier.AutoTokenizer')
@@ -49,12 +57,115 @@ class TestTopicClassifier:
         assert set(result.keys()) == {"technology", "sports"}
         assert all(isinstance(score, (int, float)) for score in result.values())
 
+    @patch('urlevaluator.src.classifier.topic_classifier.AutoTokenizer')
+    @patch('urlevaluator.src.classifier.topic_classifier.AutoModelForSequenceClassification')
+    def test_pack_pairs_respects_token_budget(self, mock_model, mock_tokenizer):
+        """Test that packed batches are sorted by length and stay within the padded token budget."""
+        classifier = TopicClassifier(["technology"], max_tokens_per_batch=20)
+        pair_lengths = [5, 3, 10, 3, 40]
+
+        batches = list(classifier._pack_pairs_by_token_budget(pair_lengths))
+
+        assert sorted(index for batch in batches for index in batch) == list(range(len(pair_lengths)))
+        assert batches[0] == [1, 3, 0]
+        for batch in batches:
+            assert len(batch) == 1 or len(batch) * max(pair_lengths[i] for i in batch) <= 20
+
+    @patch.object(TopicClassifier, '_compute_model_predictions')
+    @patch('urlevaluator.src.classifier.topic_classifier.AutoTokenizer')
+    @patch('urlevaluator.src.classifier.topic_classifier.AutoModelForSequenceClassification')
+    def test_classify_batch_maps_scores_back_to_texts(self, mock_model, mock_tokenizer, mock_compute):
+        """Test that classify_batch returns one score dict per input text, in input order."""
+        import torch
+        tokenizer = mock_tokenizer.from_pretrained.return_value
+        tokenizer.side_effect = lambda premises, hypotheses, **kwargs: (
+            Mock(to=Mock(return_value={"premises": premises}))
+            if kwargs.get("return_tensors") else {"input_ids": [[0] * len(premise) for premise in premises]}
+        )
+        # Confidence for a pair is the premise length, so results can be traced back to their text.
+        mock_compute.side_effect = lambda inputs: torch.tensor(
+            [[0.0, float(len(premise)), 0.0] for premise in inputs["premises"]]
+        )
+        classifier = TopicClassifier(["technology", "sports"])
+        classifier._calculate_confidences = lambda logits: logits[:, 1].tolist()
+
+        result = classifier.classify_batch(["a much longer text", "short"])
+
+        assert result == [{"technology": 18.0, "sports": 18.0}, {"technology": 5.0, "sports": 5.0}]
+        assert classifier.classify_batch([]) == []
+
+    @patch('urlevaluator.src.classifier.topic_classifier.OnnxSequenceClassifier')
+    @patch('urlevaluator.src.classifier.download_model.ModelManager.prepare_onnx_model', return_value='model.int8.onnx')
+    @patch('urlevaluator.src.classifier.topic_classifier.AutoTokenizer')
+    @patch('urlevaluator.src.classifier.topic_classifier.AutoModelForSequenceClassification')
+    def test_onnx_int8_backend_loads_quantized_session(self, mock_model, mock_tokenizer, mock_prepare, mock_onnx_classifier):
+        """Test that the onnx-int8 backend runs the quantized ONNX model on CPU instead of the torch model."""
+        classifier = TopicClassifier(["technology"], inference_backend="onnx-int8")
+
+        mock_prepare.assert_called_once_with(quantized=True)
+        mock_onnx_classifier.assert_called_once_with('model.int8.onnx')
+        mock_model.from_pretrained.assert_not_called()
+        assert classifier.model is mock_onnx_classifier.return_value
+        assert classifier.device.type == "cpu"
+
+    @patch('urlevaluator.src.classifier.topic_classifier.torch.ao.quantization.quantize_dynamic')
+    @patch('urlevaluator.src.classifier.topic_classifier.AutoTokenizer')
+    @patch('urlevaluator.src.classifier.topic_classifier.AutoModelForSequenceClassification')
+    def test_torch_int8_backend_quantizes_linear_layers(self, mock_model, mock_tokenizer, mock_quantize, monkeypatch):
+        """Test that INFERENCE_BACKEND=torch-int8 applies dynamic int8 quantization to the loaded model."""
+        import torch
+        monkeypatch.setenv("INFERENCE_BACKEND", "torch-int8")
+        classifier = TopicClassifier(["technology"])
+
+        mock_quantize.assert_called_once_with(mock_model.from_pretrained.return_value.eval.return_value,
+                                              {torch.nn.Linear}, dtype=torch.qint8)
+        assert classifier.model is mock_quantize.return_value
+
+    def test_with_topics_shares_model_and_drops_cascade(self):
+        """Test that a topic-subset classifier reuses the loaded model but not the topic-set-specific cascade."""
+        with patch('urlevaluator.src.classifier.topic_classifier.AutoTokenizer'), \
+             patch('urlevaluator.src.classifier.topic_classifier.AutoModelForSequenceClassification'):
+            classifier = TopicClassifier(["technology", "sports"], cascade=Mock())
+
+        subset_classifier = classifier.with_topics(["sports"])
+
+        assert subset_classifier.topics == ["sports"]
+        assert subset_classifier.model is classifier.model
+        assert subset_classifier.cascade is None
+        assert classifier.with_topics(["technology", "sports"]).cascade is classifier.cascade
+
+    @patch('urlevaluator.src.classifier.topic_classifier.cpu_supports_bf16')
+    @patch('urlevaluator.src.classifier.topic_classifier.AutoTokenizer')
+    @patch('urlevaluator.src.classifier.topic_classifier.AutoModelForSequenceClassification')
+    def test_bf16_precision_falls_back_without_cpu_support(self, mock_model, mock_tokenizer, mock_bf16_support, monkeypatch):
+        """Test that INFERENCE_PRECISION=bf16 is kept only on CPUs with native bf16 kernels."""
+        monkeypatch.setenv("INFERENCE_PRECISION", "bf16")
+        monkeypatch.setattr("urlevaluator.src.classifier.topic_classifier.torch.cuda.is_available", lambda: False)
+        mock_bf16_support.return_value = True
+        assert TopicClassifier(["technology"]).precision == "bf16"
+        mock_bf16_support.return_value = False
+        assert TopicClassifier(["technology"]).precision == "fp32"
+
+    def test_unknown_precision_is_rejected(self, monkeypatch):
+        """Test that a typo in INFERENCE_PRECISION fails fast."""
+        monkeypatch.setenv("INFERENCE_PRECISION", "fp8")
+        with patch('urlevaluator.src.classifier.topic_classifier.AutoTokenizer'), \
+             patch('urlevaluator.src.classifier.topic_classifier.AutoModelForSequenceClassification'), \
+             pytest.raises(ValueError, match="INFERENCE_PRECISION"):
+            TopicClassifier(["technology"])
+
 
 class TestLinkTopicClassifier:
     """Test the LinkTopicClassifier public interface."""
+
+    @pytest.fixture(autouse=True)
+    def mock_classification_cache(self):
+        """Keep the persistent cache tier away from the real database."""
+        with patch('urlevaluator.src.classifier.link_processor.ClassificationCache') as mock_cache:
+            yield mock_cache
     
     @patch('urlevaluator.src.classifier.link_processor.QueueManager')
-    @patch('urlevaluator.src.classifier.link_processor.TopicClassifier')
+    @patch('urlevaluator.src.classifier.link_processor.create_topic_classifier')
     def test_init_with_url_and_topics(self, mock_topic_classifier, mock_queue_manager):
         """Test initialization with URL and topics."""
         url = "https://example.com"
@@ -68,19 +179,226 @@ class TestLinkTopicClassifier:
         assert mock_topic_classifier.called
     
     @patch('urlevaluator.src.classifier.link_processor.QueueManager')
-    @patch('urlevaluator.src.classifier.link_processor.TopicClassifier')
+    @patch('urlevaluator.src.classifier.link_processor.create_topic_classifier')
     def test_batch_classification(self, mock_topic_classifier, mock_queue_manager):
         """Test batch classification functionality."""
         classifier = LinkTopicClassifier("https://example.com", ["tech", "sports"])
+        mock_topic_classifier.return_value.classify_batch.side_effect = lambda texts: [{"tech": 0.5}] * len(texts)
         
-        # Mock the single classification method
-        classifier._classify_single_link_content = Mock(return_value=True)
-        
-        batch = [(1, "content1"), (2, "content2")]
+        topics = classifier.all_topic_categories
+        batch = [(1, "content1", topics), (2, "content2", topics)]
         result = classifier._classify_link_batch(batch)
         
         assert result == 2
-        assert classifier._classify_single_link_content.call_count == 2
+        mock_topic_classifier.return_value.classify_batch.assert_called_once_with(["content1", "content2"])
+
+    @patch('urlevaluator.src.classifier.link_processor.InferenceWorkerPool')
+    @patch('urlevaluator.src.classifier.link_processor.QueueManager')
+    @patch('urlevaluator.src.classifier.link_processor.create_topic_classifier')
+    def test_inference_workers_route_batches_through_pool(self, mock_topic_classifier, mock_queue_manager, mock_pool, monkeypatch):
+        """Test that INFERENCE_WORKERS > 1 classifies through the worker pool with a proportionally larger batch."""
+        monkeypatch.setenv("INFERENCE_WORKERS", "4")
+        mock_topic_classifier.return_value.device.type = "cpu"
+        mock_pool.return_value.worker_count = 4
+        mock_pool.return_value.classify_batch.side_effect = lambda texts: [{"tech": 0.5}] * len(texts)
+
+        classifier = LinkTopicClassifier("https://example.com", None)
+        classifier._classify_link_batch([(1, "content1", classifier.all_topic_categories)])
+        classifier.close()
+
+        mock_pool.assert_called_once_with(mock_topic_classifier.return_value, 4)
+        assert classifier.link_batch_size == 4 * 128
+        mock_topic_classifier.return_value.classify_batch.assert_not_called()
+        mock_pool.return_value.close.assert_called_once()
+
+    @patch('urlevaluator.src.classifier.link_processor.fetch_server_info',
+           return_value={"model_name": "served/model", "scoring_key": "served/model:onnx"})
+    @patch('urlevaluator.src.classifier.link_processor.RemoteTopicClassifier')
+    @patch('urlevaluator.src.classifier.link_processor.QueueManager')
+    @patch('urlevaluator.src.classifier.link_processor.create_topic_classifier')
+    def test_inference_server_url_uses_remote_backend(self, mock_topic_classifier, mock_queue_manager, mock_remote,
+                                                      mock_server_info, mock_classification_cache, monkeypatch):
+        """Test that INFERENCE_SERVER_URL swaps in the remote client and keys the cache on the server's scorer."""
+        monkeypatch.setenv("INFERENCE_SERVER_URL", "http://127.0.0.1:8008")
+
+        classifier = LinkTopicClassifier("https://example.com", None)
+
+        mock_topic_classifier.assert_not_called()
+        assert classifier.topic_classifier is mock_remote.return_value
+        assert mock_remote.call_args.kwargs['scoring_key'] == "served/model:onnx"
+
+    @patch('urlevaluator.src.classifier.link_processor.QueueManager')
+    @patch('urlevaluator.src.classifier.link_processor.create_topic_classifier')
+    def test_batch_classification_writes_back_once_per_batch(self, mock_topic_classifier, mock_queue_manager):
+        """Test that a batch's scores are written with a single bulk update."""
+        mock_topic_classifier.return_value.classify_batch.side_effect = lambda texts: [{"tech": 0.7}] * len(texts)
+        classifier = LinkTopicClassifier("https://example.com", None)
+
+        topics = classifier.all_topic_categories
+        classifier._classify_link_batch([(1, "content1", topics), (2, "content2", topics)])
+
+        queue_manager = mock_queue_manager.return_value
+        queue_manager.update_classifications.assert_called_once_with([(1, {"tech": 0.7}), (2, {"tech": 0.7})])
+        queue_manager.update_classification.assert_not_called()
+
+    @patch('urlevaluator.src.classifier.link_processor.QueueManager')
+    @patch('urlevaluator.src.classifier.link_processor.create_topic_classifier')
+    def test_batch_classification_runs_once_per_distinct_text(self, mock_topic_classifier, mock_queue_manager):
+        """Test that links sharing a text are sent to the model once."""
+        mock_topic_classifier.return_value.classify_batch.side_effect = lambda texts: [{"tech": 0.7}] * len(texts)
+        classifier = LinkTopicClassifier("https://example.com", None)
+
+        topics = classifier.all_topic_categories
+        result = classifier._classify_link_batch([(1, "Home", topics), (2, "About", topics), (3, "Home", topics)])
+
+        assert result == 3
+        mock_topic_classifier.return_value.classify_batch.assert_called_once_with(["Home", "About"])
+
+    @patch('urlevaluator.src.classifier.link_processor.QueueManager')
+    @patch('urlevaluator.src.classifier.link_processor.create_topic_classifier')
+    def test_batch_classification_scores_only_missing_topics(self, mock_topic_classifier, mock_queue_manager):
+        """Test that links missing a newly added topic are classified against that topic alone."""
+        subset_classifier = mock_topic_classifier.return_value.with_topics.return_value
+        subset_classifier.classify_batch.side_effect = lambda texts: [{"travel": 0.4}] * len(texts)
+        mock_topic_classifier.return_value.classify_batch.side_effect = lambda texts: [{"tech": 0.7}] * len(texts)
+        classifier = LinkTopicClassifier("https://example.com", ["travel"])
+
+        result = classifier._classify_link_batch([(1, "Home", ["travel"]), (2, "About", classifier.all_topic_categories),
+                                                  (3, "News", ["travel"])])
+
+        assert result == 3
+        mock_topic_classifier.return_value.with_topics.assert_called_once_with(["travel"])
+        subset_classifier.classify_batch.assert_called_once_with(["Home", "News"])
+        mock_topic_classifier.return_value.classify_batch.assert_called_once_with(["About"])
+        mock_queue_manager.return_value.update_classifications.assert_called_once_with(
+            [(1, {"travel": 0.4}), (3, {"travel": 0.4}), (2, {"tech": 0.7})]
+        )
+
+    @patch('urlevaluator.src.classifier.link_processor.QueueManager')
+    @patch('urlevaluator.src.classifier.link_processor.create_topic_classifier')
+    def test_classify_pending_links_writes_back_on_its_own_cursor(self, mock_topic_classifier, mock_queue_manager):
+        """Test that prefetched batches are written through a cloned queue and the last written id is returned."""
+        mock_topic_classifier.return_value.classify_batch.side_effect = lambda texts: [{"tech": 0.7}] * len(texts)
+        classifier = LinkTopicClassifier("https://example.com", None)
+        topics = classifier.all_topic_categories
+        cloned_queue_manager = mock_queue_manager.return_value.clone.return_value
+        cloned_queue_manager.fetch_pending_batch.side_effect = [[(3, "Home", topics)], [(8, "About", topics)], []]
+
+        assert classifier.classify_pending_links(last_processed_link_id=2) == (2, 8)
+
+        assert cloned_queue_manager.fetch_pending_batch.call_args_list[0].args == (classifier.link_batch_size, 2, topics)
+        assert cloned_queue_manager.update_classifications.call_count == 2
+        mock_queue_manager.return_value.update_classifications.assert_not_called()
+
+    @patch('urlevaluator.src.classifier.link_processor.PrefetchingBatchReader')
+    @patch('urlevaluator.src.classifier.link_processor.ClassificationWriter')
+    @patch('urlevaluator.src.classifier.link_processor.QueueManager')
+    @patch('urlevaluator.src.classifier.link_processor.create_topic_classifier')
+    def test_failed_pass_closes_the_writer_and_keeps_its_own_error(self, mock_topic_classifier, mock_queue_manager,
+                                                                   mock_writer, mock_reader):
+        """Test that close errors neither skip the writer's close nor replace the error that ended the pass."""
+        mock_reader.return_value.__iter__.side_effect = RuntimeError("read failed")
+        mock_reader.return_value.close.side_effect = RuntimeError("reader close failed")
+        mock_writer.return_value.close.side_effect = RuntimeError("write failed")
+        classifier = LinkTopicClassifier("https://example.com", None)
+
+        with pytest.raises(RuntimeError, match="read failed"):
+            classifier.classify_pending_links()
+
+        mock_writer.return_value.close.assert_called_once()
+        assert classifier._classification_writer is None
+
+    @patch('urlevaluator.src.classifier.link_processor.PrefetchingBatchReader')
+    @patch('urlevaluator.src.classifier.link_processor.ClassificationWriter')
+    @patch('urlevaluator.src.classifier.link_processor.QueueManager')
+    @patch('urlevaluator.src.classifier.link_processor.create_topic_classifier')
+    def test_write_error_is_raised_after_a_successful_pass(self, mock_topic_classifier, mock_queue_manager,
+                                                           mock_writer, mock_reader):
+        """Test that a failed write-back still fails a pass whose reads and inference succeeded."""
+        mock_reader.return_value.__iter__.return_value = iter([])
+        mock_writer.return_value.close.side_effect = RuntimeError("write failed")
+        classifier = LinkTopicClassifier("https://example.com", None)
+
+        with pytest.raises(RuntimeError, match="write failed"):
+            classifier.classify_pending_links()
+
+        mock_reader.return_value.close.assert_called_once()
+
+    @patch('urlevaluator.src.classifier.link_processor.load_or_autotune')
+    @patch('urlevaluator.src.classifier.link_processor.QueueManager')
+    @patch('urlevaluator.src.classifier.link_processor.create_topic_classifier')
+    def test_autotune_batching_sets_link_batch_size(self, mock_topic_classifier, mock_queue_manager, mock_autotune, monkeypatch):
+        """Test that AUTOTUNE_BATCHING tunes on a sample of pending texts and uses the tuned link batch size."""
+        monkeypatch.setenv("AUTOTUNE_BATCHING", "1")
+        mock_queue_manager.return_value.fetch_pending_batch.return_value = [(1, "Home", ["tech"]), (2, None, ["tech"])]
+        mock_autotune.return_value.link_batch_size = 64
+
+        classifier = LinkTopicClassifier("https://example.com", None)
+
+        mock_autotune.assert_called_once_with(mock_topic_classifier.return_value, ["Home"])
+        assert classifier.link_batch_size == 64
+
+    @patch('urlevaluator.src.classifier.link_processor.PrefetchingBatchReader')
+    @patch('urlevaluator.src.classifier.link_processor.ClassificationWriter')
+    @patch('urlevaluator.src.classifier.link_processor.load_or_autotune')
+    @patch('urlevaluator.src.classifier.link_processor.QueueManager')
+    @patch('urlevaluator.src.classifier.link_processor.create_topic_classifier')
+    def test_classifier_without_a_run_autotunes_on_the_first_selected_run(self, mock_topic_classifier, mock_queue_manager,
+                                                                          mock_autotune, mock_writer, mock_reader, monkeypatch):
+        """Test that a classifier built without a seed URL waits for classify_crawl_run before autotuning."""
+        monkeypatch.setenv("AUTOTUNE_BATCHING", "1")
+        mock_queue_manager.return_value.crawl_run_id = None
+        mock_reader.return_value.__iter__.return_value = iter([])
+        mock_writer.return_value.last_written_id = None
+
+        classifier = LinkTopicClassifier(None, None)
+        mock_autotune.assert_not_called()
+
+        classifier.classify_crawl_run(7)
+        classifier.classify_crawl_run(8)
+
+        mock_queue_manager.assert_called_once_with(None, crawl_run_id=None)
+        mock_autotune.assert_called_once()
+        assert mock_queue_manager.return_value.crawl_run_id == 8
+
+    @patch('urlevaluator.src.classifier.link_processor.QueueManager')
+    @patch('urlevaluator.src.classifier.link_processor.create_topic_classifier')
+    def test_batch_classification_error_is_logged(self, mock_topic_classifier, mock_queue_manager):
+        """Test that an inference failure skips the batch instead of raising."""
+        mock_topic_classifier.return_value.classify_batch.side_effect = RuntimeError("out of memory")
+        classifier = LinkTopicClassifier("https://example.com", None)
+
+        assert classifier._classify_link_batch([(1, "Home", classifier.all_topic_categories)]) == 0
+
+    @patch('urlevaluator.src.classifier.link_processor.QueueManager')
+    @patch('urlevaluator.src.classifier.link_processor.create_topic_classifier')
+    def test_failing_text_does_not_fail_its_neighbours(self, mock_topic_classifier, mock_queue_manager):
+        """Test that a failed batch is retried per text and only the failing text is skipped."""
+        def classify_batch(texts):
+            if "bad" in texts:
+                raise ValueError("cannot tokenize")
+            return [{"tech": 0.7}] * len(texts)
+        mock_topic_classifier.return_value.classify_batch.side_effect = classify_batch
+        classifier = LinkTopicClassifier("https://example.com", None)
+        topics = classifier.all_topic_categories
+
+        result = classifier._classify_link_batch([(1, "Home", topics), (2, "bad", topics), (3, "About", topics)])
+
+        assert result == 2
+        mock_queue_manager.return_value.update_classifications.assert_called_once_with(
+            [(1, {"tech": 0.7}), (3, {"tech": 0.7})]
+        )
+
+    @patch('urlevaluator.src.classifier.link_processor.QueueManager')
+    @patch('urlevaluator.src.classifier.link_processor.create_topic_classifier')
+    def test_links_without_text_are_skipped(self, mock_topic_classifier, mock_queue_manager):
+        """Test that a link whose text row is missing is not sent to the model."""
+        mock_topic_classifier.return_value.classify_batch.side_effect = lambda texts: [{"tech": 0.7}] * len(texts)
+        classifier = LinkTopicClassifier("https://example.com", None)
+        topics = classifier.all_topic_categories
+
+        assert classifier._classify_link_batch([(1, None, topics), (2, "Home", topics)]) == 1
+        mock_topic_classifier.return_value.classify_batch.assert_called_once_with(["Home"])
 
 
 class TestDefaultTopicCategories:
@@ -0,0 +1,158 @@
+"""
+Tests for the multi-process inference worker pool.
+
+Workers are spawned and build their classifier from its class and settings, so the
+stand-ins below are module-level classes that take the classifier's keyword arguments.
+"""
+
+import multiprocessing
+import os
+import pytest
+import torch
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import Mock, patch
+from urlevaluator.src.classifier import worker_pool
+from urlevaluator.src.classifier.autotune import autotune_batch_settings
+from urlevaluator.src.classifier.worker_pool import InferenceWorkerPool, assign_worker_cores
+
+
+class LengthClassifier:
+    """Stand-in for TopicClassifier that scores a text by its length."""
+    cache = None
+    cascade = None
+    model_manager = Mock(model_name="stub")
+    max_tokens_per_batch = 64
+    inference_backend = "torch"
+    precision = "fp32"
+
+    def __init__(self, topics=("length",), **settings):
+        self.topics = list(topics)
+
+    def with_topics(self, topics):
+        return type(self)(topics)
+
+    def _infer_batch(self, texts):
+        return [{topic: float(len(text)) for topic in self.topics} for text in texts]
+
+
+class CrashingClassifier(LengthClassifier):
+    """Kills its worker process on the text "crash"."""
+
+    def _infer_batch(self, texts):
+        if "crash" in texts:
+            os._exit(1)
+        return super()._infer_batch(texts)
+
+
+class TorchClassifier(LengthClassifier):
+    """Scores texts with a small seeded torch model, large enough to use the intra-op thread pool."""
+
+    def __init__(self, topics=("sports", "politics"), max_tokens_per_batch=64, **settings):
+        super().__init__(topics)
+        self.max_tokens_per_batch = max_tokens_per_batch
+        generator = torch.Generator().manual_seed(0)
+        self.weights = torch.randn(512, 512, generator=generator)
+        self.projection = torch.randn(512, len(self.topics), generator=generator)
+
+    def _infer_batch(self, texts):
+        features = torch.stack([torch.full((512,), float(len(text))) / 100 for text in texts])
+        with torch.no_grad():
+            scores = torch.sigmoid(torch.tanh(features @ self.weights) @ self.projection)
+        return [dict(zip(self.topics, text_scores)) for text_scores in scores.tolist()]
+
+
+def test_assign_worker_cores_splits_contiguously():
+    assert assign_worker_cores(2, [0, 1, 2, 3, 4]) == [[0, 1, 2], [3, 4]]
+    assert assign_worker_cores(3, [0, 1]) == [[0], [1], [0]]
+
+
+def worker_token_budget(_):
+    return worker_pool._worker_classifier.max_tokens_per_batch
+
+
+@pytest.fixture(scope="module")
+def length_pool():
+    inference_pool = InferenceWorkerPool(LengthClassifier(), 2, pin_cores=False)
+    yield inference_pool
+    inference_pool.close()
+
+
+def test_pool_returns_scores_in_input_order(length_pool):
+    texts = ["a", "bbb", "cc", "dddd", "e"]
+    assert length_pool.classify_batch(texts) == [{"length": float(len(text))} for text in texts]
+    assert length_pool.classify_batch([]) == []
+
+
+def test_pool_with_topics_scores_only_those_topics(length_pool):
+    assert length_pool.with_topics(["size"]).classify_batch(["ab", "c"]) == [{"size": 2.0}, {"size": 1.0}]
+
+
+def test_workers_take_their_core_group_by_start_order(monkeypatch):
+    monkeypatch.setattr(worker_pool, '_worker_classifier', None)
+    workers_started = multiprocessing.Value('i', 1)
+    with patch('urlevaluator.src.classifier.worker_pool.torch.set_num_threads') as mock_set_threads, \
+         patch('urlevaluator.src.classifier.worker_pool.os.sched_setaffinity', create=True) as mock_set_affinity:
+        worker_pool._initialize_worker(workers_started, [[0], [1, 2]], True, None, LengthClassifier, {'topics': ["size"]})
+
+    assert workers_started.value == 2
+    mock_set_affinity.assert_called_once_with(0, [1, 2])
+    mock_set_threads.assert_called_once_with(2)
+    assert worker_pool._worker_classifier.topics == ["size"]
+
+
+def test_pool_after_torch_inference_in_the_parent_matches_the_parent():
+    """Workers must not inherit the parent's torch thread pool (a forked child would deadlock on it)."""
+    topic_classifier = TorchClassifier()
+    texts = [f"link text {index}" * (index % 5 + 1) for index in range(64)]
+    original_threads = torch.get_num_threads()
+    torch.set_num_threads(4)
+    try:
+        parent_scores = topic_classifier._infer_batch(texts)
+        inference_pool = InferenceWorkerPool(topic_classifier, 2, pin_cores=False)
+        try:
+            worker_scores = inference_pool.classify_batch(texts)
+        finally:
+            inference_pool.close()
+    finally:
+        torch.set_num_threads(original_threads)
+
+    assert len(worker_scores) == len(texts)
+    for parent_text_scores, worker_text_scores in zip(parent_scores, worker_scores):
+        assert worker_text_scores == pytest.approx(parent_text_scores, abs=1e-5)
+
+
+def test_dead_worker_fails_its_batch_and_the_pool_recovers():
+    inference_pool = InferenceWorkerPool(CrashingClassifier(), 1, pin_cores=False)
+    sized_pool = inference_pool.with_topics(["size"])
+    try:
+        with pytest.raises(BrokenProcessPool):
+            inference_pool.classify_batch(["a", "crash"])
+        assert sized_pool.classify_batch(["ab", "c"]) == [{"size": 2.0}, {"size": 1.0}]
+    finally:
+        inference_pool.close()
+
+
+def test_pool_started_after_autotuning_uses_the_tuned_settings():
+    """AUTOTUNE_BATCHING runs torch inference in the parent right before the pool starts."""
+    topic_classifier = TorchClassifier()
+    topic_classifier.device = torch.device("cpu")
+    texts = [f"anchor {index}" for index in range(64)]
+    original_threads = torch.get_num_threads()
+    torch.set_num_threads(4)
+    try:
+        batch_settings = autotune_batch_settings(topic_classifier, texts, token_budget_candidates=(1024, 2048),
+                                                 link_batch_candidates=(32, 64))
+        topic_classifier.max_tokens_per_batch = batch_settings.max_tokens_per_batch
+        inference_pool = InferenceWorkerPool(topic_classifier, 2, pin_cores=False)
+        try:
+            worker_scores = inference_pool.classify_batch(texts)
+            worker_token_budgets = inference_pool._workers.map(worker_token_budget, [None, None])
+        finally:
+            inference_pool.close()
+    finally:
+        torch.set_num_threads(original_threads)
+
+    for parent_text_scores, worker_text_scores in zip(topic_classifier._infer_batch(texts), worker_scores):
+        assert worker_text_scores == pytest.approx(parent_text_scores, abs=1e-5)
+    assert worker_token_budgets == [batch_settings.max_tokens_per_batch] * 2
+
@@ -0,0 +1,99 @@
+"""
+Tests for the process-wide DuckDB connection registry.
+"""
+
+import os
+import threading
+from unittest.mock import Mock, patch
+
+import duckdb
+import pytest
+from urlevaluator.src.database.connection import DuckDBConnectionRegistry, execute_with_conflict_retry
+
+
+def test_registry_opens_each_file_once(tmp_path):
+    registry = DuckDBConnectionRegistry()
+    db_path = str(tmp_path / "registry.db")
+    try:
+        assert registry.get_connection(db_path) is registry.get_connection(db_path)
+    finally:
+        registry.close_all()
+
+def test_cursors_share_the_database(tmp_path):
+    registry = DuckDBConnectionRegistry()
+    db_path = str(tmp_path / "registry.db")
+    try:
+        writer = registry.cursor(db_path)
+        writer.execute("CREATE TABLE items (id INTEGER)")
+        writer.execute("INSERT INTO items VALUES (1)")
+        writer.close()
+        assert registry.cursor(db_path).execute("SELECT COUNT(*) FROM items").fetchone()[0] == 1
+    finally:
+        registry.close_all()
+
+def test_cursors_from_multiple_threads(tmp_path):
+    registry = DuckDBConnectionRegistry()
+    db_path = str(tmp_path / "registry.db")
+    registry.cursor(db_path).execute("CREATE TABLE items (id INTEGER)")
+
+    def insert_row(row_id):
+        cursor = registry.cursor(db_path)
+        cursor.execute("INSERT INTO items VALUES (?)", [row_id])
+        cursor.close()
+
+    try:
+        threads = [threading.Thread(target=insert_row, args=(row_id,)) for row_id in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert registry.cursor(db_path).execute("SELECT COUNT(*) FROM items").fetchone()[0] == 8
+    finally:
+        registry.close_all()
+
+def test_settings_applied_from_env(tmp_path):
+    registry = DuckDBConnectionRegistry()
+    db_path = str(tmp_path / "registry.db")
+    with patch.dict(os.environ, {"DUCKDB_THREADS": "2", "DUCKDB_MEMORY_LIMIT": "256MB"}):
+        connection = registry.get_connection(db_path)
+    try:
+        assert connection.execute("SELECT current_setting('threads')").fetchone()[0] == 2
+    finally:
+        registry.close_all()
+
+def test_concurrent_idempotent_writes_are_retried(tmp_path):
+    registry = DuckDBConnectionRegistry()
+    db_path = str(tmp_path / "registry.db")
+    registry.cursor(db_path).execute("CREATE TABLE items (id INTEGER PRIMARY KEY, url VARCHAR, visited BOOLEAN)")
+    write_errors = []
+
+    def write_rows(worker_id):
+        cursor = registry.cursor(db_path)
+        try:
+            for row_id in range(50):
+                execute_with_conflict_retry(cursor, "INSERT OR IGNORE INTO items VALUES (?, ?, false)", [row_id, f"u{row_id % 10}"])
+                execute_with_conflict_retry(cursor, "UPDATE items SET visited = true WHERE url = ?", [f"u{(row_id + worker_id) % 10}"],
+                                            attempts=50)
+        except duckdb.Error as write_error:
+            write_errors.append(write_error)
+        finally:
+            cursor.close()
+
+    try:
+        threads = [threading.Thread(target=write_rows, args=(worker_id,)) for worker_id in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert write_errors == []
+        assert registry.cursor(db_path).execute("SELECT COUNT(*) FROM items").fetchone()[0] == 50
+    finally:
+        registry.close_all()
+
+def test_conflict_retry_gives_up_after_attempts():
+    connection = Mock()
+    connection.execute.side_effect = duckdb.TransactionException("Conflict on update!")
+
+    with pytest.raises(duckdb.TransactionException):
+        execute_with_conflict_retry(connection, "UPDATE items SET visited = true", attempts=3)
+    assert connection.execute.call_count == 3
@@ -3,6 +3,7 @@ Tests for the DatabaseManager class and database initialization.
 """
 
 import os
+import duckdb
 from unittest.mock import patch, Mock
 from urlevaluator.src.database.init_db import DatabaseManager, get_db_manager
 
@@ -16,4 +17,47 @@ def test_database_manager_env_override():
     with patch.dict(os.environ, {'DB_NAME': env_db}, clear=True):
         manager = get_db_manager()
         expected_path = os.path.join('resources', env_db)
-        assert manager.db_path == expected_path 
\ No newline at end of file
+        assert manager.db_path == expected_path 
+def test_schema_update_assigns_legacy_pages_and_links_to_runs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    manager = DatabaseManager("legacy.db")
+    conn = duckdb.connect(manager.db_path)
+    conn.execute("CREATE TABLE pages (id BIGINT PRIMARY KEY, url VARCHAR UNIQUE, source_url VARCHAR, depth INTEGER, title VARCHAR, created_at TIMESTAMP)")
+    conn.execute("CREATE TABLE links (id BIGINT PRIMARY KEY, page_id BIGINT, url VARCHAR, topic_scores JSON)")
+    conn.execute("""INSERT INTO pages VALUES
+        (1, 'https://a.com', NULL, 0, 'A', '2024-01-01'),
+        (2, 'https://a.com/x', 'https://a.com', 1, 'AX', '2024-01-01'),
+        (3, 'https://a.com/x/y', 'https://a.com/x', 2, 'AXY', '2024-01-01'),
+        (4, 'https://b.com/1', 'https://b.com', 1, 'B1', '2024-01-02')""")
+    conn.execute("INSERT INTO links VALUES (1, 3, 'https://a.com/z', NULL), (2, 4, 'https://b.com/2', NULL)")
+    conn.close()
+
+    manager.create_database()
+
+    conn = manager.get_cursor()
+    runs = conn.execute("SELECT seed_url, max_depth, status FROM crawl_runs ORDER BY id").fetchall()
+    assert runs == [('https://a.com', 2, 'legacy'), ('https://b.com', 1, 'legacy')]
+    page_seeds = conn.execute("""SELECT pages.id, crawl_runs.seed_url FROM pages JOIN crawl_runs ON crawl_runs.id = pages.run_id
+                                 ORDER BY pages.id""").fetchall()
+    assert page_seeds == [(1, 'https://a.com'), (2, 'https://a.com'), (3, 'https://a.com'), (4, 'https://b.com')]
+    assert conn.execute("SELECT count(*) FROM links l JOIN pages p ON p.id = l.page_id WHERE l.run_id = p.run_id").fetchone()[0] == 2
+
+    manager.create_database()
+    assert conn.execute("SELECT count(*) FROM crawl_runs").fetchone()[0] == 2
+
+def test_schema_update_drops_cache_rows_keyed_on_model_name_only(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    manager = DatabaseManager("old_cache.db")
+    manager.create_database()
+    conn = manager.get_cursor()
+    conn.execute("DROP TABLE classification_cache")
+    conn.execute("""CREATE TABLE classification_cache (text_id UBIGINT, topic VARCHAR, model_name VARCHAR, score DOUBLE,
+                    PRIMARY KEY (text_id, topic, model_name))""")
+    conn.execute("INSERT INTO classification_cache VALUES (1, 'tech', 'model-a', 0.5)")
+
+    manager.create_database()
+
+    columns = [row[0] for row in conn.execute("SELECT column_name FROM information_schema.columns "
+                                              "WHERE table_name = 'classification_cache'").fetchall()]
+    assert 'scorer_key' in columns and 'model_name' not in columns
+    assert conn.execute("SELECT count(*) FROM classification_cache").fetchone()[0] == 0
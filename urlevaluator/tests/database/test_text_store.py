@@ -0,0 +1,30 @@
+"""
+Tests for the content-addressed text store.
+"""
+
+import duckdb
+from urlevaluator.src.database.text_store import compute_text_id, store_texts, fetch_texts
+
+
+def _text_table_connection():
+    connection = duckdb.connect()
+    connection.execute("CREATE TABLE texts (id UBIGINT PRIMARY KEY, content VARCHAR)")
+    return connection
+
+def test_text_id_matches_duckdb_md5_number_lower():
+    connection = duckdb.connect()
+    for text in ["Home", "héllo wörld", ""]:
+        assert compute_text_id(text) == connection.execute("SELECT md5_number_lower(?)", [text]).fetchone()[0]
+
+def test_store_texts_deduplicates():
+    connection = _text_table_connection()
+    text_ids = store_texts(connection, ["Home", "About", "Home"])
+    store_texts(connection, ["Home"])
+    assert set(text_ids) == {"Home", "About"}
+    assert connection.execute("SELECT COUNT(*) FROM texts").fetchone()[0] == 2
+
+def test_fetch_texts_round_trip():
+    connection = _text_table_connection()
+    text_ids = store_texts(connection, ["Home", "About"])
+    assert fetch_texts(connection, [text_ids["Home"], text_ids["Home"]]) == {text_ids["Home"]: "Home"}
+    assert fetch_texts(connection, []) == {}
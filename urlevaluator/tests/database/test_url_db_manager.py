@@ -6,15 +6,16 @@ Focus on public API and observable behavior with minimal mocking.
 
 import pytest
 from unittest.mock import Mock, patch
+from urlevaluator.src.database.init_db import get_db_manager
 from urlevaluator.src.database.url_db_manager import WebCrawlDatabaseManager
-from urlevaluator.src.database.queue import QueueManager
+from urlevaluator.src.database.queue import QueueManager, PrefetchingBatchReader, ClassificationWriter
 from urlevaluator.src.scraper.models import ExtractedLink, CrawledPageData
 
 class TestWebCrawlDatabaseManager:
     def setup_method(self):
-        with patch('urlevaluator.src.database.url_db_manager.duckdb.connect') as mock_connect:
+        with patch('urlevaluator.src.database.url_db_manager.get_db_manager') as mock_get_db_manager:
             self.mock_connection = Mock()
-            mock_connect.return_value = self.mock_connection
+            mock_get_db_manager.return_value.get_cursor.return_value = self.mock_connection
             self.db_manager = WebCrawlDatabaseManager()
 
     def test_is_url_already_visited(self):
@@ -43,38 +44,209 @@ class TestWebCrawlDatabaseManager:
         self.db_manager.store_crawled_page_data(crawled_data)
         self.mock_connection.execute.assert_called()
 
+    def test_start_crawl_run_sets_run_id(self):
+        mock_result = Mock()
+        mock_result.fetchone.return_value = [7]
+        self.mock_connection.execute.return_value = mock_result
+        assert self.db_manager.start_crawl_run("https://example.com", 2) == 7
+        assert self.db_manager.crawl_run_id == 7
+
+    def test_store_crawled_page_data_tags_rows_with_run_id(self):
+        self.db_manager.crawl_run_id = 7
+        mock_page_result = Mock()
+        mock_page_result.fetchone.return_value = [123]
+        self.mock_connection.execute.return_value = mock_page_result
+        extracted_links = [ExtractedLink(url="https://example.com/link1", anchor_text="Link 1", surrounding_content="Context 1")]
+        crawled_data = CrawledPageData(url="https://example.com", source_url=None, crawl_depth=0, page_title="Test", extracted_links=extracted_links)
+        self.db_manager.store_crawled_page_data(crawled_data)
+        executed = [(call.args[0], call.args[1]) for call in self.mock_connection.execute.call_args_list if len(call.args) > 1]
+        page_params = next(params for query, params in executed if 'INTO pages' in query)
+        link_params = next(params for query, params in executed if 'INTO links' in query)
+        assert page_params[0] == 7
+        assert link_params[0] == 7
+
+    def test_store_crawled_page_data_deduplicates_texts(self):
+        mock_page_result = Mock()
+        mock_page_result.fetchone.return_value = [123]
+        self.mock_connection.execute.return_value = mock_page_result
+        extracted_links = [
+            ExtractedLink(url="https://example.com/a", anchor_text="Home", surrounding_content="Menu"),
+            ExtractedLink(url="https://example.com/b", anchor_text="Home", surrounding_content="Menu"),
+        ]
+        crawled_data = CrawledPageData(url="https://example.com", source_url=None, crawl_depth=0, page_title="Test", extracted_links=extracted_links)
+        self.db_manager.store_crawled_page_data(crawled_data)
+        text_params = next(call.args[1] for call in self.mock_connection.execute.call_args_list if 'INTO texts' in call.args[0])
+        assert text_params[1::2] == ["Home", "Menu"]
+
+    @patch('urlevaluator.src.database.url_db_manager.LINK_INSERT_CHUNK_SIZE', 2)
+    def test_streamed_links_are_inserted_in_chunks(self):
+        extracted_links = (ExtractedLink(url=f"https://example.com/{i}", anchor_text=f"Link {i}", surrounding_content="") for i in range(5))
+        self.db_manager._insert_page_links(123, extracted_links)
+        link_inserts = [call.args[1] for call in self.mock_connection.execute.call_args_list if 'INTO links' in call.args[0]]
+        assert [len(params) // 5 for params in link_inserts] == [2, 2, 1]
+        assert link_inserts[-1][2] == "https://example.com/4"
+
+    def test_finish_crawl_run_without_run_is_noop(self):
+        self.db_manager.finish_crawl_run()
+        self.mock_connection.execute.assert_not_called()
+
     def test_close_database_connection(self):
         self.db_manager.close_database_connection()
         self.mock_connection.close.assert_called_once()
 
+def test_storing_a_page_again_in_a_later_run_updates_its_row(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    get_db_manager("pages.db").create_database()
+    db_manager = WebCrawlDatabaseManager("pages.db")
+    links = [ExtractedLink(url="https://example.com/a", anchor_text="A", surrounding_content="")]
+
+    db_manager.current_timestamp = '2024-01-01 00:00:00'
+    first_run_id = db_manager.start_crawl_run("https://example.com", 1)
+    db_manager.store_crawled_page_data(CrawledPageData(url="https://example.com", source_url=None, crawl_depth=0,
+                                                       page_title="Old", extracted_links=links, content_hash="old"))
+    db_manager.current_timestamp = '2024-02-01 00:00:00'
+    second_run_id = db_manager.start_crawl_run("https://example.com", 1)
+    db_manager.store_crawled_page_data(CrawledPageData(url="https://example.com", source_url=None, crawl_depth=0,
+                                                       page_title="New", extracted_links=links, content_hash="new"))
+
+    page = db_manager.database_connection.execute(
+        'SELECT run_id, title, content_hash, CAST(first_fetched_at AS VARCHAR), CAST(last_fetched_at AS VARCHAR) FROM pages'
+    ).fetchall()
+    assert page == [(second_run_id, "New", "new", '2024-01-01 00:00:00', '2024-02-01 00:00:00')]
+    link_runs = db_manager.database_connection.execute('SELECT run_id FROM links ORDER BY run_id').fetchall()
+    assert link_runs == [(first_run_id,), (second_run_id,)]
+    db_manager.close_database_connection()
+
+def test_seed_stored_in_this_run_counts_as_visited(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    get_db_manager("seed.db").create_database()
+    db_manager = WebCrawlDatabaseManager("seed.db")
+    db_manager.start_crawl_run("https://example.com", 1)
+    db_manager.mark_url_as_visited("https://example.com")
+    db_manager.store_crawled_page_data(CrawledPageData(url="https://example.com", source_url=None, crawl_depth=0, page_title="Seed",
+                                                       extracted_links=[ExtractedLink("https://example.com/a", "A", "")]))
+    db_manager.store_crawled_page_data(CrawledPageData(url="https://example.com/a", source_url="https://example.com", crawl_depth=1,
+                                                       page_title="A", extracted_links=[ExtractedLink("https://example.com", "Home", "")]))
+
+    assert db_manager.is_url_already_visited("https://example.com")
+    db_manager.start_crawl_run("https://example.com", 1)
+    assert not db_manager.is_url_already_visited("https://example.com")
+    db_manager.close_database_connection()
+
 class TestQueueManager:
     def setup_method(self):
         with patch('urlevaluator.src.database.queue.get_db_manager') as mock_get_db_manager:
-            mock_db_manager = Mock()
-            mock_db_manager.get_db_path.return_value = "test.db"
-            mock_get_db_manager.return_value = mock_db_manager
-            with patch('urlevaluator.src.database.queue.duckdb.connect') as mock_connect:
-                self.mock_connection = Mock()
-                mock_connect.return_value = self.mock_connection
-                self.queue_manager = QueueManager("https://example.com")
+            self.mock_connection = Mock()
+            self.mock_connection.execute.return_value.fetchone.return_value = [1]
+            mock_get_db_manager.return_value.get_cursor.return_value = self.mock_connection
+            self.queue_manager = QueueManager("https://example.com")
 
     def test_get_total_pending(self):
         mock_result = Mock()
         mock_result.fetchone.return_value = [42]
         self.mock_connection.execute.return_value = mock_result
-        assert self.queue_manager.get_total_pending() == 42
+        assert self.queue_manager.get_total_pending(["tech"]) == 42
 
     def test_fetch_pending_batch_with_data(self):
         mock_result = Mock()
-        mock_result.fetchall.return_value = [(1, "content1"), (2, "content2")]
+        mock_result.fetchall.side_effect = [[(1, 11, ["tech", "sports"]), (2, 12, ["sports"])],
+                                            [(11, "content1"), (12, "content2")]]
         self.mock_connection.execute.return_value = mock_result
-        result = self.queue_manager.fetch_pending_batch(2, None)
-        assert result == [(1, "content1"), (2, "content2")]
+        result = self.queue_manager.fetch_pending_batch(2, None, ["tech", "sports"])
+        assert result == [(1, "content1", ["tech", "sports"]), (2, "content2", ["sports"])]
+
+    def test_resolves_latest_crawl_run_for_seed(self):
+        assert self.queue_manager.crawl_run_id == 1
+
+    def test_fetch_pending_batch_filters_on_run_id(self):
+        self.queue_manager.crawl_run_id = 3
+        self.mock_connection.execute.return_value.fetchall.return_value = []
+        self.queue_manager.fetch_pending_batch(10, 5, ["tech"])
+        query, params = self.mock_connection.execute.call_args.args
+        assert "run_id = ?" in query
+        assert "JOIN pages" not in query
+        assert params == [["tech"], 3, 5, 10]
 
     def test_update_classification(self):
         self.queue_manager.update_classification(1, {"topic": 0.9})
         self.mock_connection.execute.assert_called()
 
+    def test_update_classifications_uses_single_staged_update(self):
+        self.queue_manager.update_classifications([(1, {"topic": 0.9}), (2, {"topic": 0.1})])
+        queries = [call.args[0] for call in self.mock_connection.execute.call_args_list]
+        assert sum("INSERT INTO classification_staging" in query for query in queries) == 1
+        assert sum("UPDATE links" in query for query in queries) == 1
+        insert_params = next(call.args[1] for call in self.mock_connection.execute.call_args_list
+                             if "INSERT INTO classification_staging" in call.args[0])
+        assert insert_params == [1, '{"topic": 0.9}', 2, '{"topic": 0.1}']
+
+    def test_update_classifications_empty_batch_is_noop(self):
+        self.mock_connection.execute.reset_mock()
+        self.queue_manager.update_classifications([])
+        self.mock_connection.execute.assert_not_called()
+
     def test_close_connection(self):
         self.queue_manager.close()
-        self.mock_connection.close.assert_called_once() 
\ No newline at end of file
+        self.mock_connection.close.assert_called_once()
+
+    def test_clone_uses_its_own_cursor(self):
+        cloned_queue_manager = self.queue_manager.clone()
+        assert cloned_queue_manager.connection is self.mock_connection.cursor.return_value
+        assert cloned_queue_manager.crawl_run_id == self.queue_manager.crawl_run_id
+
+
+class TestPrefetchingBatchReader:
+    def test_reads_keyset_pages_until_empty(self):
+        mock_queue_manager = Mock()
+        mock_queue_manager.fetch_pending_batch.side_effect = [[(1, "a", ["t"]), (2, "b", ["t"])], [(5, "c", ["t"])], []]
+
+        batch_reader = PrefetchingBatchReader(mock_queue_manager, 2, ["t"], last_id=None)
+        assert [[link_id for link_id, _, _ in batch] for batch in batch_reader] == [[1, 2], [5]]
+        batch_reader.close()
+
+        assert [call.args[1] for call in mock_queue_manager.fetch_pending_batch.call_args_list] == [None, 2, 5]
+        mock_queue_manager.close.assert_called_once()
+
+    def test_read_error_reaches_the_consumer(self):
+        mock_queue_manager = Mock()
+        mock_queue_manager.fetch_pending_batch.side_effect = RuntimeError("database locked")
+
+        batch_reader = PrefetchingBatchReader(mock_queue_manager, 2, ["t"])
+        with pytest.raises(RuntimeError, match="database locked"):
+            list(batch_reader)
+        batch_reader.close()
+
+    def test_close_stops_a_blocked_reader(self):
+        mock_queue_manager = Mock()
+        mock_queue_manager.fetch_pending_batch.return_value = [(1, "a", ["t"])]
+
+        batch_reader = PrefetchingBatchReader(mock_queue_manager, 1, ["t"], prefetch_batches=1)
+        next(iter(batch_reader))
+        batch_reader.close()
+
+
+class TestClassificationWriter:
+    def test_writes_and_commits_in_order(self):
+        mock_queue_manager = Mock()
+        classification_writer = ClassificationWriter(mock_queue_manager)
+
+        classification_writer.submit([(1, {"t": 0.1})], 1)
+        classification_writer.submit([(2, {"t": 0.2})], 2)
+        classification_writer.close()
+
+        assert [call.args[0] for call in mock_queue_manager.update_classifications.call_args_list] == [
+            [(1, {"t": 0.1})], [(2, {"t": 0.2})]
+        ]
+        assert mock_queue_manager.connection.commit.call_count == 2
+        assert classification_writer.last_written_id == 2
+
+    def test_failed_write_is_raised_and_not_marked_written(self):
+        mock_queue_manager = Mock()
+        mock_queue_manager.update_classifications.side_effect = [None, RuntimeError("disk full")]
+        classification_writer = ClassificationWriter(mock_queue_manager)
+
+        classification_writer.submit([(1, {"t": 0.1})], 1)
+        classification_writer.submit([(2, {"t": 0.2})], 2)
+        with pytest.raises(RuntimeError, match="disk full"):
+            classification_writer.close()
+        assert classification_writer.last_written_id == 1
@@ -4,6 +4,8 @@ Modern tests for the crawler module.
 Focus on public API and observable behavior with minimal mocking.
 """
 
+import gc
+import weakref
 import pytest
 from unittest.mock import Mock, patch
 from bs4 import BeautifulSoup
@@ -12,8 +14,10 @@ from urlevaluator.src.scraper.crawler import (
     UrlValidator,
     WebpageDownloader,
     HtmlContentExtractor,
+    RecursiveWebCrawler,
+    dispose_parse_tree,
 )
-from urlevaluator.src.scraper.models import WebScrapingConfig
+from urlevaluator.src.scraper.models import ExtractedLink, WebScrapingConfig
 
 class TestUrlValidator:
     @pytest.mark.parametrize("url,expected", [
@@ -38,6 +42,7 @@ class TestWebpageDownloader:
         html_content = "<html><head><title>Test</title></head><body>Content</body></html>"
         mock_response = Mock()
         mock_response.text = html_content
+        mock_response.content = html_content.encode('utf-8')
         mock_response.raise_for_status.return_value = None
         mock_get.return_value = mock_response
         result = self.downloader.download_and_parse_webpage("https://example.com")
@@ -95,4 +100,67 @@ class TestHtmlContentExtractor:
         soup = BeautifulSoup(html, 'html.parser')
         anchor_tag = soup.find('a')
         link = self.extractor.extract_link_from_anchor_tag(anchor_tag, "https://example.com")
-        assert link is None 
\ No newline at end of file
+        assert link is None
+
+    def test_content_hash_ignores_markup_changes(self):
+        first = BeautifulSoup('<div><a href="/a">Link</a> text</div>', 'html.parser')
+        second = BeautifulSoup('<section class="x"><a href="/a">Link</a> text</section>', 'html.parser')
+        links = list(self.extractor.extract_all_links_from_page(first, "https://example.com"))
+        assert self.extractor.compute_content_hash(first, links) == self.extractor.compute_content_hash(second, links)
+
+    def test_content_hash_changes_with_text(self):
+        first = BeautifulSoup('<p>old text</p>', 'html.parser')
+        second = BeautifulSoup('<p>new text</p>', 'html.parser')
+        assert self.extractor.compute_content_hash(first, []) != self.extractor.compute_content_hash(second, [])
+
+    def test_extract_all_links_is_lazy_and_skips_invalid_links(self):
+        soup = BeautifulSoup('<a href="/a">A</a><a href="">empty</a><a href="http://">bad</a><a href="/b">B</a>', 'html.parser')
+        links = self.extractor.extract_all_links_from_page(soup, "https://example.com")
+        assert next(links).url == "https://example.com/a"
+        assert [link.url for link in links] == ["https://example.com/b"]
+
+    def test_surrounding_content_matches_full_parent_text(self):
+        html = "<div>" + "".join(f'<p>item {i} <a href="/{i}">link {i}</a></p> <!-- note --> text {i}' for i in range(100)) + "</div>"
+        soup = BeautifulSoup(html, 'html.parser')
+        for anchor_tag in soup.find_all('a')[:3] + [soup.div]:
+            expected = anchor_tag.parent.get_text(strip=True)[:self.config.content_excerpt_size]
+            assert self.extractor._extract_surrounding_content(anchor_tag) == expected
+
+
+def test_dispose_parse_tree_frees_nodes_without_the_garbage_collector():
+    soup = BeautifulSoup('<html><body><div><p>text <a href="/a">A</a></p></div></body></html>', 'html.parser')
+    paragraph = weakref.ref(soup.find('p'))
+    gc.disable()
+    try:
+        dispose_parse_tree(soup)
+        del soup
+        assert paragraph() is None
+    finally:
+        gc.enable()
+
+
+class TestRecursiveWebCrawler:
+    def test_links_are_streamed_into_the_database_and_the_hash_set_afterwards(self):
+        soup = BeautifulSoup('<html><title>T</title><body><p>text <a href="/a">A</a> <a href="/b">B</a></p></body></html>', 'html.parser')
+        expected_hash = HtmlContentExtractor(WebScrapingConfig()).compute_content_hash(
+            soup, [ExtractedLink("https://example.com/a", "A", ""), ExtractedLink("https://example.com/b", "B", "")])
+        stored_pages = []
+
+        def store_crawled_page_data(crawled_page_data):
+            stored_pages.append((crawled_page_data.content_hash, [link.url for link in crawled_page_data.extracted_links], soup.decomposed))
+            return 42
+
+        database_manager = Mock()
+        database_manager.store_crawled_page_data.side_effect = store_crawled_page_data
+        crawler = RecursiveWebCrawler(WebScrapingConfig(), database_manager)
+
+        with patch.object(crawler._webpage_downloader, 'download_and_parse_webpage', return_value=soup):
+            crawled_page_data = crawler.crawl_and_store_single_page("https://example.com", None, 0)
+
+        assert stored_pages == [(None, ["https://example.com/a", "https://example.com/b"], False)]
+        assert soup.decomposed
+        database_manager.update_page_content_hash.assert_called_once_with(42, expected_hash)
+        assert crawled_page_data.page_title == "T"
+        assert crawled_page_data.content_hash == expected_hash
+        assert crawled_page_data.extracted_links == []
+        assert crawled_page_data.link_urls == ["https://example.com/a", "https://example.com/b"]
@@ -53,4 +53,12 @@ def test_crawled_page_data_creation():
     assert page_data.source_url == "https://referring.com"
     assert page_data.crawl_depth == 1
     assert page_data.page_title == "Test Page"
-    assert page_data.extracted_links == extracted_links 
\ No newline at end of file
+    assert page_data.extracted_links == extracted_links 
+
+def test_per_page_models_are_slotted():
+    link = ExtractedLink(url="https://example.com/page", anchor_text="Page", surrounding_content="")
+    page_data = CrawledPageData(url="https://example.com", source_url=None, crawl_depth=0, page_title="Test", extracted_links=[link])
+    for model in (link, page_data):
+        assert not hasattr(model, '__dict__')
+        with pytest.raises(AttributeError):
+            model.unexpected_attribute = 1
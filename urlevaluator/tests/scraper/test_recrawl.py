@@ -0,0 +1,85 @@
+"""
+Tests for the incremental recrawl scheduler.
+
+Focus on public API and observable behavior with minimal mocking.
+"""
+
+import pytest
+from datetime import datetime
+from unittest.mock import Mock, patch
+from bs4 import BeautifulSoup
+from urlevaluator.src.scraper.models import RecrawlCandidate, RecrawlConfig, WebScrapingConfig
+from urlevaluator.src.scraper.recrawl import IncrementalRecrawler, estimate_change_rate
+
+
+class TestEstimateChangeRate:
+    def test_no_history_uses_default_rate(self):
+        assert estimate_change_rate(0, 0, 0.0, 0.1) == 0.1
+
+    def test_frequent_changes_raise_rate(self):
+        assert estimate_change_rate(10, 10, 10.0, 0.1) > 0.1
+
+    def test_stable_page_rate_decays_but_stays_positive(self):
+        rate = estimate_change_rate(10, 0, 1000.0, 0.1)
+        assert 0 < rate < 0.1
+
+
+class TestIncrementalRecrawler:
+    def setup_method(self):
+        with patch('urlevaluator.src.scraper.recrawl.WebCrawlDatabaseManager') as mock_db_manager_class:
+            self.mock_db_manager = mock_db_manager_class.return_value
+            self.mock_db_manager.current_timestamp = '2026-01-02 00:00:00'
+            self.mock_db_manager.replace_page_links.return_value = 1
+            self.recrawler = IncrementalRecrawler(
+                "https://example.com",
+                RecrawlConfig(fetch_budget=5),
+                WebScrapingConfig(request_delay_seconds=0)
+            )
+        self.html = '<html><head><title>T</title></head><body><a href="/a">A</a></body></html>'
+        self.recrawler._webpage_downloader = Mock()
+        self.recrawler._webpage_downloader.download_and_parse_webpage.side_effect = \
+            lambda url: BeautifulSoup(self.html, 'html.parser')
+
+    def _candidate(self, content_hash):
+        return RecrawlCandidate(
+            page_id=1, url="https://example.com", source_url=None, crawl_depth=0,
+            content_hash=content_hash, fetch_count=1, change_count=0,
+            first_fetched_at=datetime(2026, 1, 1), change_probability=0.9
+        )
+
+    def _current_hash(self):
+        soup = BeautifulSoup(self.html, 'html.parser')
+        extractor = self.recrawler._html_content_extractor
+        return extractor.compute_content_hash(soup, extractor.extract_all_links_from_page(soup, "https://example.com"))
+
+    def test_invalid_url_rejected(self):
+        with pytest.raises(ValueError):
+            IncrementalRecrawler("not-a-url")
+
+    def test_unchanged_page_keeps_links(self):
+        self.mock_db_manager.select_pages_due_for_recrawl.return_value = [self._candidate(self._current_hash())]
+        summary = self.recrawler.start_recrawl()
+        assert summary['unchanged'] == 1
+        self.mock_db_manager.replace_page_links.assert_not_called()
+        assert self.mock_db_manager.record_page_refetch.call_args.args[2] is False
+
+    def test_changed_page_syncs_links(self):
+        self.mock_db_manager.select_pages_due_for_recrawl.return_value = [self._candidate("stale-hash")]
+        summary = self.recrawler.start_recrawl()
+        assert summary['changed'] == 1
+        assert summary['new_links'] == 1
+        self.mock_db_manager.replace_page_links.assert_called_once()
+        self.mock_db_manager.finish_crawl_run.assert_called_once_with('completed')
+
+    def test_fetch_budget_passed_to_scheduler(self):
+        self.mock_db_manager.select_pages_due_for_recrawl.return_value = []
+        self.recrawler.start_recrawl()
+        assert self.mock_db_manager.select_pages_due_for_recrawl.call_args.args[1] == 5
+
+    def test_failed_fetch_is_counted(self):
+        self.recrawler._webpage_downloader.download_and_parse_webpage.side_effect = None
+        self.recrawler._webpage_downloader.download_and_parse_webpage.return_value = None
+        self.mock_db_manager.select_pages_due_for_recrawl.return_value = [self._candidate("hash")]
+        summary = self.recrawler.start_recrawl()
+        assert summary['failed'] == 1
+        self.mock_db_manager.record_page_refetch.assert_not_called()
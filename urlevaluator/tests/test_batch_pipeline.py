@@ -0,0 +1,108 @@
+"""
+Tests for batch crawling and classification of many seeds.
+
+Focus on public API and observable behavior with minimal mocking.
+"""
+
+import json
+import threading
+import pytest
+from unittest.mock import Mock, patch
+from urlevaluator.src.batch_pipeline import BatchCrawlClassifier, SeedCrawlResult, read_seed_file, write_seed_results
+
+SEEDS = ["https://a.example", "https://b.example", "https://c.example"]
+
+
+class TestBatchCrawlClassifier:
+    @pytest.fixture(autouse=True)
+    def mocks(self):
+        with patch('urlevaluator.src.batch_pipeline.WebSiteCrawler') as mock_crawler_class, \
+             patch('urlevaluator.src.batch_pipeline.LinkTopicClassifier') as mock_classifier_class, \
+             patch('urlevaluator.src.batch_pipeline.aggregate_topic_scores_by_run') as mock_aggregate, \
+             patch('urlevaluator.src.batch_pipeline.get_db_manager'):
+            self.crawl_threads = set()
+            self.mock_crawler_class = mock_crawler_class
+            mock_crawler_class.side_effect = self.create_crawler
+            self.mock_classifier_class = mock_classifier_class
+            self.mock_classifier = mock_classifier_class.return_value
+            self.mock_classifier.classify_crawl_run.side_effect = lambda crawl_run_id: crawl_run_id * 10
+            self.mock_aggregate = mock_aggregate
+            mock_aggregate.side_effect = lambda crawl_run_ids, db_path: {
+                crawl_run_id: {"sports": crawl_run_id / 10} for crawl_run_id in crawl_run_ids
+            }
+            yield
+
+    def create_crawler(self, seed_url, maximum_crawl_depth, config):
+        crawler = Mock(crawl_run_id=SEEDS.index(seed_url) + 1, total_pages_crawled_count=5)
+        crawler.start_website_crawling.side_effect = lambda: self.crawl_threads.add(threading.current_thread().name)
+        return crawler
+
+    def test_crawls_every_seed_and_classifies_with_one_model(self):
+        seed_results = BatchCrawlClassifier(SEEDS, 2, ["finance"], concurrency=2).run()
+
+        self.mock_classifier_class.assert_called_once_with(None, ["finance"])
+        assert sorted(call.args[0] for call in self.mock_classifier.classify_crawl_run.call_args_list) == [1, 2, 3]
+        self.mock_classifier.close.assert_called_once()
+        self.mock_aggregate.assert_called_once()
+        assert all(name.startswith("batch-crawler") for name in self.crawl_threads)
+        assert [seed_result.seed_url for seed_result in seed_results] == SEEDS
+        assert seed_results[1] == SeedCrawlResult("https://b.example", 2, 'completed', 5, 20, {"sports": 0.2})
+
+    def test_failed_crawl_is_reported_and_its_links_still_classified(self):
+        def crawler_for_seed(seed_url, maximum_crawl_depth, config):
+            if seed_url == "not a url":
+                raise ValueError(f"Invalid starting URL provided: {seed_url}")
+            crawler = self.create_crawler(seed_url, maximum_crawl_depth, config)
+            if seed_url == SEEDS[1]:
+                crawler.start_website_crawling.side_effect = RuntimeError("connection reset")
+            return crawler
+        self.mock_crawler_class.side_effect = crawler_for_seed
+
+        seed_results = BatchCrawlClassifier(SEEDS + ["not a url"], 1).run()
+
+        assert [seed_result.status for seed_result in seed_results] == ['completed', 'failed', 'completed', 'failed']
+        assert seed_results[1].error == "connection reset" and seed_results[1].links_classified == 20
+        assert seed_results[3].crawl_run_id is None and seed_results[3].average_topic_scores == {}
+        assert self.mock_classifier.classify_crawl_run.call_count == 3
+
+    def test_failed_classification_is_reported_per_seed(self):
+        def classify_crawl_run(crawl_run_id):
+            if crawl_run_id == 2:
+                raise RuntimeError("worker died")
+            return crawl_run_id * 10
+        self.mock_classifier.classify_crawl_run.side_effect = classify_crawl_run
+
+        seed_results = BatchCrawlClassifier(SEEDS, 1, concurrency=1).run()
+
+        assert [seed_result.status for seed_result in seed_results] == ['completed', 'failed', 'completed']
+        assert seed_results[1].error == "worker died" and seed_results[1].links_classified == 0
+        assert seed_results[2].links_classified == 30
+        self.mock_aggregate.assert_called_once()
+
+    def test_classifier_failure_is_raised_after_crawls_stop(self):
+        self.mock_classifier_class.side_effect = RuntimeError("model missing")
+
+        with pytest.raises(RuntimeError, match="model missing"):
+            BatchCrawlClassifier(SEEDS, 1, concurrency=1).run()
+        self.mock_aggregate.assert_not_called()
+
+    def test_requires_seeds(self):
+        with pytest.raises(ValueError, match="No seed URLs"):
+            BatchCrawlClassifier([], 1)
+
+
+def test_read_seed_file_skips_comments_blanks_and_repeats(tmp_path):
+    seed_file = tmp_path / "seeds.txt"
+    seed_file.write_text("# news sites\nhttps://a.example\n\n  https://b.example/#top  \nhttps://a.example\n")
+
+    assert read_seed_file(str(seed_file)) == ["https://a.example", "https://b.example/#top"]
+
+
+def test_write_seed_results_as_json_lines(tmp_path):
+    output_path = tmp_path / "results.jsonl"
+    write_seed_results([SeedCrawlResult("https://a.example", 1, 'completed', 3, 9, {"sports": 0.5})], str(output_path))
+
+    assert json.loads(output_path.read_text()) == {
+        "seed_url": "https://a.example", "crawl_run_id": 1, "status": "completed", "pages_crawled": 3,
+        "links_classified": 9, "average_topic_scores": {"sports": 0.5}, "error": None,
+    }
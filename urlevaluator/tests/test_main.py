@@ -0,0 +1,41 @@
+"""
+Tests for classifying an existing crawl run without crawling it again.
+"""
+
+import pytest
+from unittest.mock import patch
+from urlevaluator.src.main import classify_crawl_run_links
+
+
+class TestClassifyCrawlRunLinks:
+    @pytest.fixture(autouse=True)
+    def mocks(self):
+        with patch('urlevaluator.src.main.LinkTopicClassifier') as mock_classifier_class, \
+             patch('urlevaluator.src.main.aggregate_topic_scores') as mock_aggregate, \
+             patch('urlevaluator.src.main.WebSiteCrawler') as mock_crawler_class, \
+             patch('urlevaluator.src.main.get_db_manager'), \
+             patch('urlevaluator.src.main.start_metrics_export'):
+            self.mock_classifier_class = mock_classifier_class
+            self.mock_classifier = mock_classifier_class.return_value
+            self.mock_aggregate = mock_aggregate
+            self.mock_crawler_class = mock_crawler_class
+            yield
+
+    def test_classifies_and_aggregates_the_requested_run_without_crawling(self):
+        self.mock_classifier.classification_queue_manager.crawl_run_id = 7
+
+        classify_crawl_run_links("https://example.com", ["finance"], crawl_run_id=7)
+
+        self.mock_classifier_class.assert_called_once_with("https://example.com", ["finance"], crawl_run_id=7)
+        self.mock_classifier.classify_all_pending_links.assert_called_once()
+        assert self.mock_aggregate.call_args.args[2] == 7
+        self.mock_crawler_class.assert_not_called()
+
+    def test_url_without_a_crawl_run_is_rejected(self):
+        self.mock_classifier.classification_queue_manager.crawl_run_id = None
+
+        with pytest.raises(ValueError, match="No crawl run"):
+            classify_crawl_run_links("https://example.com", ["finance"])
+
+        self.mock_classifier.classify_all_pending_links.assert_not_called()
+        self.mock_classifier.close.assert_called_once()
@@ -0,0 +1,75 @@
+"""
+Tests for pipelined crawling and classification.
+
+Focus on public API and observable behavior with minimal mocking.
+"""
+
+import pytest
+from unittest.mock import patch
+from urlevaluator.src.scraper.models import CrawledPageData
+from urlevaluator.src.streaming_pipeline import StreamingCrawlClassifier, ClassificationConsumerStopped
+
+
+def crawled_page(link_count: int) -> CrawledPageData:
+    return CrawledPageData(
+        url="https://example.com", source_url=None, crawl_depth=0, page_title="Example",
+        extracted_links=[], link_urls=[f"https://example.com/{i}" for i in range(link_count)]
+    )
+
+
+class TestStreamingCrawlClassifier:
+    @pytest.fixture(autouse=True)
+    def mocks(self):
+        with patch('urlevaluator.src.streaming_pipeline.WebSiteCrawler') as mock_crawler_class, \
+             patch('urlevaluator.src.streaming_pipeline.LinkTopicClassifier') as mock_classifier_class:
+            self.mock_crawler_class = mock_crawler_class
+            self.mock_crawler = mock_crawler_class.return_value
+            self.mock_crawler.begin_crawl_run.return_value = 7
+            self.mock_classifier_class = mock_classifier_class
+            self.mock_classifier = mock_classifier_class.return_value
+            self.mock_classifier.classify_pending_links.return_value = (0, None)
+            yield
+
+    def crawl_pages(self, *link_counts):
+        def crawl():
+            page_stored_callback = self.mock_crawler_class.call_args.kwargs['page_stored_callback']
+            for link_count in link_counts:
+                page_stored_callback(crawled_page(link_count))
+        return crawl
+
+    def test_classifies_pages_as_they_are_stored(self):
+        self.mock_crawler.start_website_crawling.side_effect = self.crawl_pages(2, 3)
+
+        assert StreamingCrawlClassifier("https://example.com", 1, buffer_pages=1).run() == 7
+
+        self.mock_classifier_class.assert_called_once_with("https://example.com", None, crawl_run_id=7)
+        # At least one pass while streaming plus the final catch-up pass.
+        assert self.mock_classifier.classify_pending_links.call_count >= 2
+        self.mock_classifier.close.assert_called_once()
+
+    def test_crawl_error_is_raised_after_draining(self):
+        def failing_crawl():
+            self.crawl_pages(1)()
+            raise RuntimeError("network down")
+        self.mock_crawler.start_website_crawling.side_effect = failing_crawl
+
+        with pytest.raises(RuntimeError, match="network down"):
+            StreamingCrawlClassifier("https://example.com", 1).run()
+        self.mock_classifier.classify_pending_links.assert_called()
+        self.mock_classifier.close.assert_called_once()
+
+    def test_classifier_failure_stops_the_crawler(self):
+        self.mock_classifier_class.side_effect = RuntimeError("model missing")
+        crawl_errors = []
+
+        def blocked_crawl():
+            try:
+                self.crawl_pages(*[1] * 10)()
+            except ClassificationConsumerStopped as stop:
+                crawl_errors.append(stop)
+                raise
+        self.mock_crawler.start_website_crawling.side_effect = blocked_crawl
+
+        with pytest.raises(RuntimeError, match="model missing"):
+            StreamingCrawlClassifier("https://example.com", 1, buffer_pages=1).run()
+        assert crawl_errors
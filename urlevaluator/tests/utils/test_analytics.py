@@ -3,15 +3,20 @@
 Focus on public API and observable behavior with minimal mocking.
 """
 
+import json
 import pytest
 from unittest.mock import patch, Mock
-from urlevaluator.src.utils.analytics import aggregate_topic_scores
+from urlevaluator.src.database.init_db import DatabaseManager
+from urlevaluator.src.database.text_store import store_texts
+from urlevaluator.src.utils.analytics import (
+    TopicAnalytics, aggregate_topic_scores, aggregate_topic_scores_by_run, format_columns, main
+)
 
 
 class TestAnalytics:
     """Test analytics functionality."""
     
-    @patch('urlevaluator.src.utils.analytics.duckdb.connect')
+    @patch('urlevaluator.src.utils.analytics.connection_registry.cursor')
     def test_aggregate_topic_scores_success(self, mock_connect):
         """Test successful topic score aggregation."""
         # Setup mock database connection and results
@@ -35,7 +40,7 @@ class TestAnalytics:
         mock_connection.close.assert_called_once()
         mock_logger.info.assert_called()
     
-    @patch('urlevaluator.src.utils.analytics.duckdb.connect')
+    @patch('urlevaluator.src.utils.analytics.connection_registry.cursor')
     def test_aggregate_topic_scores_no_results(self, mock_connect):
         """Test topic score aggregation with no results."""
         mock_connection = Mock()
@@ -52,7 +57,7 @@ class TestAnalytics:
         mock_logger.info.assert_called()
         mock_connection.close.assert_called_once()
     
-    @patch('urlevaluator.src.utils.analytics.duckdb.connect')
+    @patch('urlevaluator.src.utils.analytics.connection_registry.cursor')
     def test_aggregate_topic_scores_database_error(self, mock_connect):
         """Test topic score aggregation with database error."""
         mock_connect.side_effect = Exception("Database connection failed")
@@ -61,6 +66,119 @@ class TestAnalytics:
             aggregate_topic_scores("https://example.com", "test.db")
 
 
+# (run_id, page depth, url, anchor text, sports score, politics score)
+SCORED_LINKS = [
+    (1, 0, "https://news.example/a", "Match report", 0.9, 0.1),
+    (1, 0, "https://News.example:8080/b", "Election night", 0.2, 0.8),
+    (1, 1, "https://blog.example/c", "Cup final", 0.7, 0.3),
+    (2, 1, "https://news.example/d", "Transfer rumours", 0.05, 0.5),
+]
+
+
+@pytest.fixture
+def scored_database(tmp_path, monkeypatch):
+    """A real database with two crawl runs of the same seed and scored links on two depths and domains."""
+    monkeypatch.chdir(tmp_path)
+    database_manager = DatabaseManager("analytics_test.db")
+    database_manager.create_database()
+    connection = database_manager.get_cursor()
+    text_ids = store_texts(connection, [text for _, _, _, text, _, _ in SCORED_LINKS])
+    for run_id in (1, 2):
+        connection.execute("INSERT INTO crawl_runs (id, seed_url, max_depth, status) VALUES (?, 'https://news.example', 1, 'completed')",
+                           [run_id])
+        for depth in (0, 1):
+            connection.execute("INSERT INTO pages (id, run_id, url, depth) VALUES (?, ?, ?, ?)",
+                               [run_id * 10 + depth, run_id, f"https://news.example/{run_id}/{depth}", depth])
+    for link_id, (run_id, depth, url, text, sports, politics) in enumerate(SCORED_LINKS):
+        connection.execute(
+            "INSERT INTO links (id, run_id, page_id, url, link_text_id, topic_scores) VALUES (?, ?, ?, ?, ?, ?)",
+            [link_id, run_id, run_id * 10 + depth, url, text_ids[text], json.dumps({"sports": sports, "politics": politics})]
+        )
+    connection.execute("INSERT INTO links (id, run_id, page_id, url) VALUES (99, 1, 10, 'https://news.example/unscored')")
+    connection.close()
+    return database_manager.get_db_path()
+
+
+class TestTopicAnalytics:
+    """Vectorized analytics against a real DuckDB database."""
+
+    def test_summary_covers_all_runs_of_the_seed(self, scored_database):
+        topic_analytics = TopicAnalytics(scored_database, seed_url="https://news.example", result_format='numpy')
+        summary = topic_analytics.topic_summary()
+        topic_analytics.close()
+
+        assert summary['topic'].tolist() == ["politics", "sports"]
+        assert summary['links'].tolist() == [4, 4]
+        assert summary['mean_score'][1] == pytest.approx((0.9 + 0.2 + 0.7 + 0.05) / 4)
+        assert summary['max_score'].tolist() == [0.8, 0.9]
+
+    def test_breakdowns_by_depth_domain_and_run(self, scored_database):
+        topic_analytics = TopicAnalytics(scored_database, topics=["sports"], result_format='numpy')
+        by_depth = topic_analytics.breakdown('depth', high_score_threshold=0.5)
+        by_domain = topic_analytics.breakdown('domain')
+        by_run = topic_analytics.breakdown('run', min_links=2)
+
+        assert by_depth['depth'].tolist() == [0, 1]
+        assert by_depth['high_score_share'].tolist() == [0.5, 0.5]
+        assert by_domain['domain'].tolist() == ["blog.example", "news.example"]
+        assert by_domain['links'].tolist() == [1, 3]
+        assert by_run['run_id'].tolist() == [1]
+        with pytest.raises(ValueError, match="Unknown breakdown"):
+            topic_analytics.breakdown('language')
+        topic_analytics.close()
+
+    def test_histogram_quantiles_and_top_links_for_one_run(self, scored_database):
+        topic_analytics = TopicAnalytics(scored_database, crawl_run_id=1, result_format='numpy')
+        histogram = topic_analytics.score_histogram(bins=4)
+        quantiles = topic_analytics.score_quantiles([0.5, 1.0])
+        top_links = topic_analytics.top_links(k=2)
+        topic_analytics.close()
+
+        assert histogram['links'].tolist() == [1, 1, 0, 1, 1, 0, 1, 1]
+        assert histogram['bin_end'][-1] == 1.0
+        assert list(quantiles) == ["topic", "links", "p50", "p100"]
+        assert quantiles['p100'].tolist() == [0.8, 0.9]
+        assert top_links['topic'].tolist() == ["politics", "politics", "sports", "sports"]
+        assert top_links['link_text'].tolist() == ["Election night", "Cup final", "Match report", "Cup final"]
+        assert top_links['rank'].tolist() == [1, 2, 1, 2]
+
+    def test_invalid_result_format_and_missing_extra(self, scored_database):
+        with pytest.raises(ValueError, match="Unknown result format"):
+            TopicAnalytics(scored_database, result_format='csv')
+        with patch('urlevaluator.src.utils.analytics.importlib.import_module', side_effect=ImportError):
+            with pytest.raises(ImportError, match=r"urlevaluator\[analytics\]"):
+                TopicAnalytics(scored_database, result_format='pandas')
+
+    def test_arrow_results(self, scored_database):
+        pyarrow = pytest.importorskip("pyarrow", exc_type=ImportError)
+        topic_analytics = TopicAnalytics(scored_database, result_format='arrow')
+        summary = topic_analytics.topic_summary()
+        topic_analytics.close()
+
+        assert isinstance(summary, pyarrow.Table)
+        assert summary.column('topic').to_pylist() == ["politics", "sports"]
+
+    def test_aggregate_by_run(self, scored_database):
+        average_scores_by_run = aggregate_topic_scores_by_run([1, 2, 3], scored_database)
+
+        assert sorted(average_scores_by_run) == [1, 2]
+        assert average_scores_by_run[2] == {"politics": 0.5, "sports": 0.05}
+        assert average_scores_by_run[1]["sports"] == pytest.approx((0.9 + 0.2 + 0.7) / 3)
+
+    def test_cli_prints_report_table(self, scored_database, monkeypatch, capsys):
+        monkeypatch.setenv("DB_NAME", "analytics_test.db")
+        main(["https://news.example", "--report", "domain", "--topics", "politics"])
+
+        lines = capsys.readouterr().out.splitlines()
+        assert lines[0].split() == ["domain", "topic", "links", "mean_score", "high_score_share"]
+        assert lines[2].split()[:3] == ["blog.example", "politics", "1"]
+
+    def test_format_columns_aligns_values(self):
+        table = format_columns({'topic': Mock(tolist=lambda: ["sports"]), 'score': Mock(tolist=lambda: [0.5])})
+
+        assert table.splitlines() == ["topic   score", "------  ------", "sports  0.5000"]
+
+
 class TestLogHandler:
     """Test log handler functionality."""
     
@@ -0,0 +1,131 @@
+"""
+Tests for the queue-based, rate-limited logging setup.
+"""
+
+import json
+import logging
+import os
+import sys
+import time
+import pytest
+from urlevaluator.src.utils.log_handler import (
+    DeferredFormattingQueueHandler, JsonFormatter, RateLimitFilter, configure_logging, rate_limited, shutdown_logging
+)
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def make_record(message, *args, **extra):
+    record = logging.LogRecord('crawler', logging.ERROR, 'crawler.py', 50, message, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+@pytest.fixture
+def root_logger():
+    root_logger = logging.getLogger()
+    original_handlers, original_level = root_logger.handlers[:], root_logger.level
+    yield root_logger
+    shutdown_logging()
+    root_logger.handlers[:] = original_handlers
+    root_logger.setLevel(original_level)
+
+
+def test_rate_limit_passes_burst_and_summarises_the_rest():
+    list_handler = ListHandler()
+    rate_limit_filter = RateLimitFilter(list_handler, burst=2, window_seconds=60)
+
+    for page_number in range(1000):
+        list_handler.handle(make_record("Failed %s", page_number, **rate_limited("host down.example", "download errors")))
+    list_handler.handle(make_record("unrelated"))
+    rate_limit_filter.close()
+
+    assert [record.getMessage() for record in list_handler.records[:3]] == ["Failed 0", "Failed 1", "unrelated"]
+    summary = list_handler.records[3]
+    assert summary.getMessage().startswith("host down.example: 1,000 download errors in the last ")
+    assert summary.getMessage().endswith("(998 not logged)")
+    assert (summary.levelno, summary.rate_limit_suppressed) == (logging.ERROR, 998)
+    assert len(list_handler.records) == 4
+
+
+def test_rate_limit_keys_are_independent_and_windows_expire():
+    list_handler = ListHandler()
+    rate_limit_filter = RateLimitFilter(list_handler, burst=1, window_seconds=0.05)
+
+    for host in ("a", "b", "a"):
+        list_handler.handle(make_record("Failed", **rate_limited(f"host {host}", "download errors")))
+    time.sleep(0.1)
+    list_handler.handle(make_record("Failed again", **rate_limited("host a", "download errors")))
+    rate_limit_filter.close()
+
+    messages = [record.getMessage() for record in list_handler.records]
+    assert messages[:2] == ["Failed", "Failed"]
+    assert messages[2].startswith("host a: 2 download errors") and messages[3] == "Failed again"
+    assert len(messages) == 4
+
+
+def test_queue_handler_defers_formatting():
+    class Unformattable:
+        def __str__(self):
+            raise AssertionError("formatted in the calling thread")
+
+    record = make_record("value %s", Unformattable())
+    assert DeferredFormattingQueueHandler(None).prepare(record) is record
+    assert record.msg == "value %s"
+
+
+def test_json_formatter_includes_extra_fields_and_exceptions():
+    record = make_record("Failed %s", "http://x", **rate_limited("host x", "download errors"))
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record.exc_info = sys.exc_info()
+
+    log_entry = json.loads(JsonFormatter().format(record))
+
+    assert log_entry['message'] == "Failed http://x"
+    assert (log_entry['level'], log_entry['line'], log_entry['rate_limit_key']) == ('ERROR', 50, "host x")
+    assert 'ValueError: boom' in log_entry['exception']
+
+
+def test_configure_logging_writes_json_through_the_queue(root_logger, capsys):
+    configure_logging(log_format='json', level='INFO', force=True)
+
+    logging.getLogger('urlevaluator.test').info("Crawling webpage: %s", "http://x")
+    shutdown_logging()
+
+    log_entry = json.loads(capsys.readouterr().err.strip().splitlines()[-1])
+    assert log_entry['message'] == "Crawling webpage: http://x"
+    assert log_entry['thread'] == "MainThread"
+
+
+def test_configure_logging_keeps_existing_handlers_unless_forced(root_logger):
+    existing_handler = ListHandler()
+    root_logger.handlers[:] = [existing_handler]
+
+    configure_logging()
+    assert root_logger.handlers == [existing_handler]
+    with pytest.raises(ValueError):
+        configure_logging(log_format='xml', force=True)
+    assert root_logger.handlers == [existing_handler]
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="needs fork")
+def test_forked_child_logs_synchronously(root_logger, capfd):
+    configure_logging(log_format='json', level='INFO', asynchronous=True, force=True)
+
+    child_pid = os.fork()
+    if child_pid == 0:
+        logging.getLogger('urlevaluator.worker').info("Torch profile from worker")
+        os._exit(0 if not isinstance(root_logger.handlers[-1], DeferredFormattingQueueHandler) else 1)
+    _, exit_status = os.waitpid(child_pid, 0)
+
+    assert os.waitstatus_to_exitcode(exit_status) == 0
+    assert "Torch profile from worker" in capfd.readouterr().err
@@ -0,0 +1,84 @@
+"""
+Tests for the metrics registry and its Prometheus exporters.
+"""
+
+import threading
+import pytest
+import requests
+from urlevaluator.src.utils.metrics import Metric, MetricsFileDumper, MetricsRegistry, start_metrics_server
+
+
+@pytest.fixture
+def registry():
+    return MetricsRegistry()
+
+
+def test_counter_and_gauge_render_with_labels(registry):
+    fetch_failures = registry.counter('fetch_failures_total', 'Failed fetches', ['host'])
+    fetch_failures.labels('example.com').inc()
+    fetch_failures.labels('example.com').inc(2)
+    registry.gauge('queue_depth', 'Queued items', ['queue']).labels('pre"fetch').set(3)
+
+    rendered = registry.render()
+
+    assert '# TYPE fetch_failures_total counter' in rendered
+    assert 'fetch_failures_total{host="example.com"} 3.0' in rendered
+    assert 'queue_depth{queue="pre\\"fetch"} 3' in rendered
+
+
+def test_histogram_buckets_are_cumulative(registry):
+    fetch_seconds = registry.histogram('fetch_seconds', 'Fetch time', buckets=(0.1, 1.0))
+    for observed_seconds in (0.05, 0.5, 0.7, 5.0):
+        fetch_seconds.observe(observed_seconds)
+
+    rendered = registry.render()
+
+    assert 'fetch_seconds_bucket{le="0.1"} 1' in rendered
+    assert 'fetch_seconds_bucket{le="1.0"} 3' in rendered
+    assert 'fetch_seconds_bucket{le="+Inf"} 4' in rendered
+    assert 'fetch_seconds_count 4' in rendered
+    assert 'fetch_seconds_sum 6.25' in rendered
+
+
+def test_concurrent_increments_are_not_lost(registry):
+    links_classified = registry.counter('links_total', 'Links')
+
+    def increment():
+        for _ in range(10000):
+            links_classified.inc()
+    threads = [threading.Thread(target=increment) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert 'links_total 40000.0' in registry.render()
+
+
+def test_reregistering_returns_the_same_metric_and_rejects_conflicts(registry):
+    assert registry.counter('pages_total', 'Pages') is registry.counter('pages_total', 'Pages')
+    with pytest.raises(ValueError):
+        registry.gauge('pages_total', 'Pages')
+    with pytest.raises(ValueError):
+        registry.counter('pages_total', 'Pages').labels('unexpected')
+
+
+def test_metric_without_a_child_type_cannot_be_created():
+    with pytest.raises(TypeError, match="_new_child"):
+        Metric('untyped_total', 'No child type')
+
+
+def test_metrics_server_and_file_dump(registry, tmp_path):
+    registry.counter('pages_total', 'Pages').inc()
+    metrics_server = start_metrics_server(0, registry=registry)
+    try:
+        response = requests.get(f"http://127.0.0.1:{metrics_server.server_address[1]}/metrics", timeout=5)
+        assert response.status_code == 200
+        assert 'pages_total 1.0' in response.text
+    finally:
+        metrics_server.shutdown()
+        metrics_server.server_close()
+
+    metrics_file_dumper = MetricsFileDumper(str(tmp_path / "metrics.prom"), interval_seconds=60, registry=registry)
+    metrics_file_dumper.close()
+    assert 'pages_total 1.0' in (tmp_path / "metrics.prom").read_text()
@@ -0,0 +1,76 @@
+"""
+Tests for the opt-in stage and torch profiling hooks.
+"""
+
+import contextlib
+import os
+import pstats
+import tracemalloc
+import pytest
+from urlevaluator.src.utils.profiling import (
+    RunProfiler, end_run_profiling, get_run_profiler, profile_stage, profile_torch_calls
+)
+
+
+@pytest.fixture(autouse=True)
+def profile_environment(monkeypatch, tmp_path):
+    monkeypatch.setenv('PROFILE', '0')
+    monkeypatch.setenv('PROFILE_DIR', str(tmp_path / 'profiles'))
+
+
+def allocate_and_spin():
+    retained = [bytearray(1024) for _ in range(200)]
+    sum(range(100_000))
+    return retained
+
+
+def test_profiling_is_off_by_default(tmp_path):
+    assert get_run_profiler() is None
+    assert isinstance(profile_stage(None, 'crawl'), contextlib.nullcontext)
+    assert not (tmp_path / 'profiles').exists()
+
+
+def test_profile_flag_is_set_for_the_run_only(tmp_path):
+    run_profiler = get_run_profiler(True)
+
+    assert run_profiler.output_directory.startswith(str(tmp_path / 'profiles'))
+    assert os.environ['PROFILE'] == '1'
+    end_run_profiling(run_profiler)
+    assert os.environ['PROFILE'] == '0'
+    assert get_run_profiler() is None
+
+
+def test_stage_writes_profile_and_snapshot_and_logs_hotspots(monkeypatch, tmp_path):
+    logged = []
+    monkeypatch.setattr('urlevaluator.src.utils.profiling.logger.info', logged.append)
+    run_profiler = RunProfiler(str(tmp_path / 'run'), top_n=5)
+
+    with profile_stage(run_profiler, 'classify'):
+        retained = allocate_and_spin()
+
+    profile_stats = pstats.Stats(str(tmp_path / 'run' / 'classify.prof'))
+    assert any(function_name == 'allocate_and_spin' for _, _, function_name in profile_stats.stats)
+    snapshot = tracemalloc.Snapshot.load(str(tmp_path / 'run' / 'classify.tracemalloc'))
+    assert any('test_profiling.py' in trace.traceback[0].filename for trace in snapshot.traces)
+    assert 'Stage classify took' in logged[0] and 'allocate_and_spin' in logged[0]
+    assert 'Top 5 allocation sites' in logged[1] and 'test_profiling.py' in logged[1]
+    assert not tracemalloc.is_tracing()
+    assert len(retained) == 200
+
+
+def test_stage_without_allocation_tracing_writes_only_the_profile(tmp_path):
+    with RunProfiler(str(tmp_path / 'run'), trace_allocations=False).stage('crawl'):
+        allocate_and_spin()
+
+    assert sorted(path.name for path in (tmp_path / 'run').iterdir()) == ['crawl.prof']
+
+
+def test_torch_profiling_covers_only_the_first_calls(tmp_path):
+    torch = pytest.importorskip('torch')
+    linear = torch.nn.Linear(4, 2)
+    profiled_forward = profile_torch_calls(linear, call_count=2)
+
+    for _ in range(3):
+        assert profiled_forward(torch.ones(1, 4)).shape == (1, 2)
+
+    assert len(list((tmp_path / 'profiles' / 'torch').glob('predictions_*.json'))) == 2
@@ -9,19 +9,19 @@ from urlevaluator.src.utils.query_db import get_db_connection
 
 
 def test_query_db_default_path():
-    with patch('urlevaluator.src.utils.query_db.duckdb.connect') as mock_connect:
+    with patch('urlevaluator.src.database.init_db.connection_registry.cursor') as mock_cursor, \
+         patch.dict(os.environ, {}, clear=True):
         mock_conn = Mock()
-        mock_connect.return_value = mock_conn
+        mock_cursor.return_value = mock_conn
         result = get_db_connection()
-        mock_connect.assert_called_once_with('resources/scraping_results.db')
+        mock_cursor.assert_called_once_with(os.path.join('resources', 'scraping_results.db'))
         assert result == mock_conn
 
-def test_query_db_env_override():
-    custom_path = "/custom/path/database.db"
-    with patch('urlevaluator.src.utils.query_db.duckdb.connect') as mock_connect, \
-         patch('os.environ', {"DB_PATH": custom_path}):
+def test_query_db_uses_same_database_as_application():
+    with patch('urlevaluator.src.database.init_db.connection_registry.cursor') as mock_cursor, \
+         patch.dict(os.environ, {"DB_NAME": "custom.db", "DB_PATH": "/elsewhere/database.db"}, clear=True):
         mock_conn = Mock()
-        mock_connect.return_value = mock_conn
+        mock_cursor.return_value = mock_conn
         result = get_db_connection()
-        mock_connect.assert_called_once_with(custom_path)
-        assert result == mock_conn 
\ No newline at end of file
+        mock_cursor.assert_called_once_with(os.path.join('resources', 'custom.db'))
+        assert result == mock_conn